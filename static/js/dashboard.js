@@ -193,6 +193,136 @@ document.addEventListener("DOMContentLoaded", function () {
     return el;
   }
 
+  function featureStatusText(f) {
+    return f.is_paused ? "Dayandırılıb" : (f.status === "online" ? "Online" : f.status || "—");
+  }
+
+  function hasLocation(f) {
+    return !!(f.lat && f.lng);
+  }
+
+  // Canlı feed: ilk sorğu tam siyahı, sonrakılar yalnız dəyişənlər (?since=cursor + ETag/304).
+  // Silinmiş istifadəçilər delta-da görünmədiyi üçün arabir tam siyahı yenidən çəkilir.
+  const FEED_FULL_RELOAD_EVERY = 30;
+
+  function createFeed() {
+    return { cursor: null, etag: null, polls: 0, features: new Map() };
+  }
+
+  async function fetchFeed(feed) {
+    const full = !feed.cursor || feed.polls % FEED_FULL_RELOAD_EVERY === 0;
+    feed.polls++;
+    const headers = { "X-CSRFToken": getCSRFToken() || "" };
+    if (!full && feed.etag) headers["If-None-Match"] = feed.etag;
+    const url = "/api/movqe-son-json/" + (full ? "" : "?since=" + encodeURIComponent(feed.cursor));
+    const res = await fetch(url, { credentials: "same-origin", cache: "no-store", headers });
+    if (res.status === 304) {
+      feed.cursor = res.headers.get("X-Feed-Cursor") || feed.cursor;
+      return { ok: true, full: false, changed: [], removed: [] };
+    }
+    if (!res.ok) return { ok: false };
+    const data = await res.json();
+    const changed = data.features || [];
+    feed.cursor = data.cursor || res.headers.get("X-Feed-Cursor");
+    feed.etag = full ? null : res.headers.get("ETag");
+    let removed = [];
+    if (full) {
+      const ids = new Set(changed.map((f) => String(f.id)));
+      removed = [...feed.features.keys()].filter((id) => !ids.has(id));
+      removed.forEach((id) => feed.features.delete(id));
+    }
+    changed.forEach((f) => feed.features.set(String(f.id), f));
+    return { ok: true, full, changed, removed };
+  }
+
+  // Canlı axın (SSE) aktivdirsə hadisələri feed-ə birləşdir; polling yalnız ehtiyat kimi qalır
+  const LIVE_POLL_INTERVAL = 60000;
+
+  function connectLiveFeed(feed, onFeature) {
+    const url = window.LIVE_FEED_URL;
+    if (!url || !window.EventSource) return false;
+    const source = new EventSource(url, { withCredentials: true });
+    const handle = (e) => {
+      let ev;
+      try { ev = JSON.parse(e.data); } catch (_) { return; }
+      const current = feed.features.get(String(ev.id));
+      if (!current) {
+        // Naməlum istifadəçi — növbəti poll tam siyahını çəksin
+        feed.cursor = null;
+        return;
+      }
+      const merged = Object.assign({}, current, ev);
+      delete merged.type;
+      feed.features.set(String(ev.id), merged);
+      onFeature(merged, ev.type);
+    };
+    source.addEventListener("location", handle);
+    source.addEventListener("heartbeat", handle);
+    return true;
+  }
+
+  function renderUserList(features, onClick) {
+    if (!userListEl) return;
+    if (features.length === 0) {
+      userListEl.innerHTML = '<div class="map-empty-hint">İstifadəçi yoxdur</div>';
+      return;
+    }
+    userListEl.innerHTML = features.map((f) => {
+      const hasLoc = f.lat != null && f.lng != null;
+      const clickable = hasLoc ? " map-user-item-clickable" : "";
+      const bat = batteryHTML(f.battery_level);
+      const isSelected = f.id == selectedUserId;
+      return `<div class="map-user-item${clickable}${isSelected ? " selected" : ""}" data-user-id="${f.id}" data-lat="${f.lat ?? ""}" data-lng="${f.lng ?? ""}">
+                <span class="status-dot ${getStatusClass(f)}"></span>
+                <span class="map-user-name">${f.ad || f.username || "İstifadəçi"}</span>
+                ${bat ? `<span class="map-user-battery">${bat}</span>` : ""}
+              </div>`;
+    }).join("");
+    userListEl.querySelectorAll(".map-user-item-clickable").forEach((el) => {
+      el.addEventListener("click", function () { onClick(this); });
+    });
+  }
+
+  // Route siyahısı nöqtəsiz gəlir; göstərilən route-un xətti serverdə sadələşdirilir
+  const ROUTE_GEOMETRY_ZOOM = 16;
+
+  // Encoded polyline → [[lng, lat], ...] (GeoJSON sırası)
+  function decodePolyline(str, precision) {
+    const factor = Math.pow(10, precision || 5);
+    const coords = [];
+    let index = 0, lat = 0, lng = 0;
+    while (index < str.length) {
+      const deltas = [0, 0];
+      for (let k = 0; k < 2; k++) {
+        let result = 0, shift = 0, b;
+        do {
+          b = str.charCodeAt(index++) - 63;
+          result += (b & 0x1f) * Math.pow(2, shift);
+          shift += 5;
+        } while (b >= 0x20);
+        deltas[k] = result % 2 ? -(result + 1) / 2 : result / 2;
+      }
+      lat += deltas[0];
+      lng += deltas[1];
+      coords.push([lng / factor, lat / factor]);
+    }
+    return coords;
+  }
+
+  async function fetchSelectedRoute(userId) {
+    const opts = { credentials: "same-origin", headers: { "X-CSRFToken": getCSRFToken() || "" } };
+    const rRes = await fetch("/api/routes/summary/?user=" + userId, opts);
+    if (!rRes.ok) return undefined;
+    const rData = await rRes.json();
+    const routes = Array.isArray(rData) ? rData : rData.results || [];
+    const route = routes.find((r) => !r.end_time) || routes[routes.length - 1];
+    if (!route) return null;
+    const gRes = await fetch(`/api/routes/${route.id}/geometry/?zoom=${ROUTE_GEOMETRY_ZOOM}&format=polyline`, opts);
+    if (!gRes.ok) return undefined;
+    const geometry = await gRes.json();
+    return Object.assign({}, route, { coordinates: decodePolyline(geometry.polyline, geometry.precision) });
+  }
+
   function initMap() {
     if (!mapEl || !window.mapboxgl) return false;
     const token = window.MAPBOX_ACCESS_TOKEN;
@@ -206,141 +336,154 @@ document.addEventListener("DOMContentLoaded", function () {
     });
     map.addControl(new mapboxgl.NavigationControl(), "top-right");
 
-    let markers = {};
+    const markers = {};
+    const feed = createFeed();
     let polylineSourceId = null;
+    let fittedOnce = false;
+
+    function popupHTML(f) {
+      const name = f.ad || f.username || "İstifadəçi";
+      return `<div style="padding:8px;min-width:180px;font-family:-apple-system,sans-serif;">` +
+        `<b style="font-size:14px;">${name}</b><br>` +
+        `<span style="color:#6b7280;font-size:12px;">${featureStatusText(f)}</span>` +
+        (f.battery_level !== null && f.battery_level !== undefined
+          ? `<br>${batteryHTML(f.battery_level)}` : "") +
+        `<br><span style="font-size:11px;color:#9ca3af;">📍 ${f.lat.toFixed(5)}, ${f.lng.toFixed(5)}</span>` +
+        `</div>`;
+    }
+
+    // Markeri yerində yenilə — yalnız yoxdursa yarat, konumu itibsə sil
+    function upsertMarker(f) {
+      const m = markers[f.id];
+      if (!hasLocation(f)) {
+        if (m) { m.remove(); delete markers[f.id]; }
+        return;
+      }
+      if (m) {
+        m.setLngLat([f.lng, f.lat]);
+        m.getElement().style.background = getMarkerColor(f);
+        m.getPopup().setHTML(popupHTML(f));
+        return;
+      }
+      const popup = new mapboxgl.Popup({ closeButton: false, offset: 14 }).setHTML(popupHTML(f));
+      markers[f.id] = new mapboxgl.Marker({ element: makeMarkerEl(getMarkerColor(f)), anchor: "center" })
+        .setLngLat([f.lng, f.lat])
+        .setPopup(popup)
+        .addTo(map);
+    }
+
+    function removeMarker(id) {
+      if (markers[id]) { markers[id].remove(); delete markers[id]; }
+    }
+
+    function fitAllMarkers() {
+      const pts = [...feed.features.values()].filter(hasLocation).map((f) => [f.lng, f.lat]);
+      if (pts.length === 0) return;
+      const bounds = pts.reduce((b, p) => b.extend(p), new mapboxgl.LngLatBounds(pts[0], pts[0]));
+      map.fitBounds(bounds, { padding: 60, maxZoom: 16 });
+    }
+
+    // Seçilmiş user-in marşrutu
+    async function drawSelectedRoute() {
+      if (polylineSourceId) {
+        try { map.removeLayer(polylineSourceId + "-layer"); map.removeSource(polylineSourceId); } catch (_) {}
+        polylineSourceId = null;
+      }
+      const sel = selectedUserId ? feed.features.get(String(selectedUserId)) : null;
+      if (!sel) {
+        selectedUserId = null;
+        if (userProfileEl) userProfileEl.style.display = "none";
+        return;
+      }
+      try {
+        const active = await fetchSelectedRoute(selectedUserId);
+        if (active && active.coordinates && active.coordinates.length > 1) {
+          const coords = active.coordinates;
+          const srcId = "route-" + selectedUserId;
+          map.addSource(srcId, { type: "geojson", data: { type: "Feature", geometry: { type: "LineString", coordinates: coords } } });
+          map.addLayer({ id: srcId + "-layer", type: "line", source: srcId, paint: {
+            "line-color": getMarkerColor(sel), "line-width": 4, "line-opacity": 0.85,
+            ...( sel.is_paused ? { "line-dasharray": [2, 2] } : {} )
+          }});
+          polylineSourceId = srcId;
+          const bounds2 = coords.reduce((b, c) => b.extend(c), new mapboxgl.LngLatBounds(coords[0], coords[0]));
+          map.fitBounds(bounds2, { padding: 60, maxZoom: 16 });
+          if (userProfileEl) {
+            const startT = active.start_time ? new Date(active.start_time).toLocaleString("az-AZ") : "—";
+            const endT = active.end_time ? new Date(active.end_time).toLocaleString("az-AZ") : "Davam edir";
+            userProfileEl.innerHTML = `<div class="map-user-profile-box"><div class="map-user-profile-title"><i class="fas fa-route"></i> ${sel.ad || sel.username} — Marşrut</div><div class="map-user-profile-row">Başlanğıc: ${startT}</div><div class="map-user-profile-row">Bitmə: ${endT}</div><div class="map-user-profile-row">Nöqtələr: ${active.point_count}</div></div>`;
+            userProfileEl.style.display = "block";
+          }
+        } else if (active !== undefined && userProfileEl) {
+          userProfileEl.innerHTML = `<div class="map-user-profile-box"><div class="map-user-profile-title">${sel.ad || sel.username} — Marşrut yoxdur</div></div>`;
+          userProfileEl.style.display = "block";
+        }
+      } catch (_) {}
+      const m = markers[selectedUserId];
+      if (m && !m.getPopup().isOpen()) m.togglePopup();
+    }
+
+    function onUserClick(el) {
+      const uid = el.dataset.userId;
+      const lat = parseFloat(el.dataset.lat);
+      const lng = parseFloat(el.dataset.lng);
+      selectedUserId = selectedUserId == uid ? null : uid;
+      renderUserList([...feed.features.values()], onUserClick);
+      drawSelectedRoute();
+      if (!selectedUserId && !isNaN(lat) && !isNaN(lng)) {
+        map.flyTo({ center: [lng, lat], zoom: 15, speed: 1.4 });
+      }
+    }
 
     async function loadMapLocations() {
       try {
-        const res = await fetch("/api/movqe-son-json/", {
-          credentials: "same-origin",
-          headers: { "X-CSRFToken": getCSRFToken() || "" },
-        });
-        if (!res.ok) {
+        const result = await fetchFeed(feed);
+        if (!result.ok) {
           if (userListEl) userListEl.innerHTML = '<div class="map-empty-hint">Admin girişi lazımdır</div>';
           return;
         }
-        const data = await res.json();
-        const features = data.features || [];
-
-        // Markerləri yenilə
-        Object.values(markers).forEach((m) => m.remove());
-        markers = {};
-
-        const pts = [];
-        for (const f of features) {
-          if (!f.lat || !f.lng) continue;
-          const color = getMarkerColor(f);
-          const name = f.ad || f.username || "İstifadəçi";
-          const statusTxt = f.is_paused ? "Dayandırılıb" : (f.status === "online" ? "Online" : f.status || "—");
-          const el = makeMarkerEl(color);
-          const popup = new mapboxgl.Popup({ closeButton: false, offset: 14 })
-            .setHTML(
-              `<div style="padding:8px;min-width:180px;font-family:-apple-system,sans-serif;">` +
-              `<b style="font-size:14px;">${name}</b><br>` +
-              `<span style="color:#6b7280;font-size:12px;">${statusTxt}</span>` +
-              (f.battery_level !== null && f.battery_level !== undefined
-                ? `<br>${batteryHTML(f.battery_level)}` : "") +
-              `<br><span style="font-size:11px;color:#9ca3af;">📍 ${f.lat.toFixed(5)}, ${f.lng.toFixed(5)}</span>` +
-              `</div>`
-            );
-          markers[f.id] = new mapboxgl.Marker({ element: el, anchor: "center" })
-            .setLngLat([f.lng, f.lat])
-            .setPopup(popup)
-            .addTo(map);
-          pts.push([f.lng, f.lat]);
-        }
+        if (!result.full && result.changed.length === 0) return;
 
-        // Bütün markerlərə uyğun zoom
-        if (pts.length > 0 && !selectedUserId) {
-          const bounds = pts.reduce((b, p) => b.extend(p), new mapboxgl.LngLatBounds(pts[0], pts[0]));
-          map.fitBounds(bounds, { padding: 60, maxZoom: 16 });
-        }
+        // Yalnız dəyişən markerləri yenilə
+        result.removed.forEach(removeMarker);
+        result.changed.forEach(upsertMarker);
 
-        // Seçilmiş user-in marşrutu
-        if (polylineSourceId) {
-          try { map.removeLayer(polylineSourceId + "-layer"); map.removeSource(polylineSourceId); } catch (_) {}
-          polylineSourceId = null;
-        }
-        if (selectedUserId && !features.find((x) => x.id == selectedUserId)) selectedUserId = null;
-
-        if (selectedUserId) {
-          const sel = features.find((x) => x.id == selectedUserId);
-          if (sel) {
-            try {
-              const rRes = await fetch("/api/routes/?user=" + selectedUserId, {
-                credentials: "same-origin",
-                headers: { "X-CSRFToken": getCSRFToken() || "" },
-              });
-              if (rRes.ok) {
-                const rData = await rRes.json();
-                const routes = Array.isArray(rData) ? rData : rData.results || [];
-                const active = routes.find((r) => !r.end_time) || routes[routes.length - 1];
-                if (active && active.points && active.points.length > 1) {
-                  const coords = active.points.map((p) => [parseFloat(p.longitude), parseFloat(p.latitude)]);
-                  const srcId = "route-" + selectedUserId;
-                  map.addSource(srcId, { type: "geojson", data: { type: "Feature", geometry: { type: "LineString", coordinates: coords } } });
-                  map.addLayer({ id: srcId + "-layer", type: "line", source: srcId, paint: {
-                    "line-color": getMarkerColor(sel), "line-width": 4, "line-opacity": 0.85,
-                    ...( sel.is_paused ? { "line-dasharray": [2, 2] } : {} )
-                  }});
-                  polylineSourceId = srcId;
-                  const bounds2 = coords.reduce((b, c) => b.extend(c), new mapboxgl.LngLatBounds(coords[0], coords[0]));
-                  map.fitBounds(bounds2, { padding: 60, maxZoom: 16 });
-                  if (userProfileEl) {
-                    const startT = active.start_time ? new Date(active.start_time).toLocaleString("az-AZ") : "—";
-                    const endT = active.end_time ? new Date(active.end_time).toLocaleString("az-AZ") : "Davam edir";
-                    userProfileEl.innerHTML = `<div class="map-user-profile-box"><div class="map-user-profile-title"><i class="fas fa-route"></i> ${sel.ad || sel.username} — Marşrut</div><div class="map-user-profile-row">Başlanğıc: ${startT}</div><div class="map-user-profile-row">Bitmə: ${endT}</div><div class="map-user-profile-row">Nöqtələr: ${active.points.length}</div></div>`;
-                    userProfileEl.style.display = "block";
-                  }
-                } else if (userProfileEl) {
-                  userProfileEl.innerHTML = `<div class="map-user-profile-box"><div class="map-user-profile-title">${sel.ad || sel.username} — Marşrut yoxdur</div></div>`;
-                  userProfileEl.style.display = "block";
-                }
-              }
-            } catch (_) {}
-            if (markers[selectedUserId]) markers[selectedUserId].togglePopup();
-          } else if (userProfileEl) userProfileEl.style.display = "none";
-        } else if (userProfileEl) userProfileEl.style.display = "none";
-
-        // Siyahı
-        if (userListEl) {
-          if (features.length === 0) {
-            userListEl.innerHTML = '<div class="map-empty-hint">İstifadəçi yoxdur</div>';
-          } else {
-            userListEl.innerHTML = features.map((f) => {
-              const hasLoc = f.lat != null && f.lng != null;
-              const clickable = hasLoc ? " map-user-item-clickable" : "";
-              const bat = batteryHTML(f.battery_level);
-              const isSelected = f.id == selectedUserId;
-              return `<div class="map-user-item${clickable}${isSelected ? " selected" : ""}" data-user-id="${f.id}" data-lat="${f.lat ?? ""}" data-lng="${f.lng ?? ""}">
-                <span class="status-dot ${getStatusClass(f)}"></span>
-                <span class="map-user-name">${f.ad || f.username || "İstifadəçi"}</span>
-                ${bat ? `<span class="map-user-battery">${bat}</span>` : ""}
-              </div>`;
-            }).join("");
-            userListEl.querySelectorAll(".map-user-item-clickable").forEach((el) => {
-              el.addEventListener("click", function () {
-                const uid = this.dataset.userId;
-                const lat = parseFloat(this.dataset.lat);
-                const lng = parseFloat(this.dataset.lng);
-                selectedUserId = selectedUserId == uid ? null : uid;
-                loadMapLocations();
-                if (!selectedUserId && !isNaN(lat) && !isNaN(lng)) {
-                  map.flyTo({ center: [lng, lat], zoom: 15, speed: 1.4 });
-                }
-              });
-            });
-          }
+        // İlk yükləmədə bütün markerlərə uyğun zoom
+        if (!fittedOnce && !selectedUserId) {
+          fitAllMarkers();
+          fittedOnce = true;
         }
+
+        const selectedChanged = selectedUserId && (
+          result.removed.includes(String(selectedUserId)) ||
+          result.changed.some((f) => f.id == selectedUserId)
+        );
+        if (selectedChanged) await drawSelectedRoute();
+
+        renderUserList([...feed.features.values()], onUserClick);
       } catch (e) {
         console.warn("[MAP] Konum yüklənmədi:", e);
         if (userListEl) userListEl.innerHTML = '<div class="map-empty-hint">Yükləmə xətası</div>';
       }
     }
 
+    let listRenderPending = false;
+    function onLiveFeature(f, type) {
+      upsertMarker(f);
+      if (type === "location" && f.id == selectedUserId) drawSelectedRoute();
+      if (listRenderPending) return;
+      listRenderPending = true;
+      setTimeout(function () {
+        listRenderPending = false;
+        renderUserList([...feed.features.values()], onUserClick);
+      }, 500);
+    }
+
     map.on("load", function () {
-      loadMapLocations();
-      setInterval(loadMapLocations, 10000);
+      loadMapLocations().then(function () {
+        const live = connectLiveFeed(feed, onLiveFeature);
+        setInterval(loadMapLocations, live ? LIVE_POLL_INTERVAL : 10000);
+      });
     });
     return true;
   }
@@ -376,69 +519,67 @@ document.addEventListener("DOMContentLoaded", function () {
       maxZoom: 19,
       attribution: "© OpenStreetMap © CARTO"
     }).addTo(map);
-    let markers = {};
-    let polylines = {};
-    const popupHtml = (f) => `<div style="padding:8px;min-width:180px;"><b>${f.ad || f.username || "İstifadəçi"}</b><br><span style="color:#6b7280;font-size:12px;">${f.is_paused ? "Dayandırılıb" : (f.status === "online" ? "Online" : f.status || "—")}</span>${f.battery_level != null ? "<br>" + batteryHTML(f.battery_level) : ""}<br><span style="font-size:11px;color:#9ca3af;">📍 ${f.lat.toFixed(5)}, ${f.lng.toFixed(5)}</span></div>`;
-    async function load() {
+    const markers = {};
+    const feed = createFeed();
+    let polyline = null;
+    let fittedOnce = false;
+    const popupHtml = (f) => `<div style="padding:8px;min-width:180px;"><b>${f.ad || f.username || "İstifadəçi"}</b><br><span style="color:#6b7280;font-size:12px;">${featureStatusText(f)}</span>${f.battery_level != null ? "<br>" + batteryHTML(f.battery_level) : ""}<br><span style="font-size:11px;color:#9ca3af;">📍 ${f.lat.toFixed(5)}, ${f.lng.toFixed(5)}</span></div>`;
+    function upsertMarker(f) {
+      const m = markers[f.id];
+      if (!hasLocation(f)) { if (m) { map.removeLayer(m); delete markers[f.id]; } return; }
+      if (m) { m.setLatLng([f.lat, f.lng]).setStyle({ fillColor: getMarkerColor(f) }).setPopupContent(popupHtml(f)); return; }
+      markers[f.id] = L.circleMarker([f.lat, f.lng], { radius: 12, fillColor: getMarkerColor(f), color: "#fff", weight: 2, fillOpacity: 1 }).addTo(map).bindPopup(popupHtml(f));
+    }
+    function removeMarker(id) { if (markers[id]) { map.removeLayer(markers[id]); delete markers[id]; } }
+    async function drawSelectedRoute() {
+      if (polyline) { map.removeLayer(polyline); polyline = null; }
+      const sel = selectedUserId ? feed.features.get(String(selectedUserId)) : null;
+      if (!sel) { selectedUserId = null; if (userProfileEl) userProfileEl.style.display = "none"; return; }
       try {
-        const res = await fetch("/api/movqe-son-json/", { credentials: "same-origin", headers: { "X-CSRFToken": getCSRFToken() || "" } });
-        if (!res.ok) { if (userListEl) userListEl.innerHTML = '<div class="map-empty-hint">Admin girişi lazımdır</div>'; return; }
-        const data = await res.json();
-        const features = data.features || [];
-        Object.values(markers).forEach((m) => map.removeLayer(m));
-        Object.values(polylines).forEach((p) => map.removeLayer(p));
-        markers = {};
-        polylines = {};
-        const pts = [];
-        for (const f of features) {
-          if (!f.lat || !f.lng) continue;
-          const color = getMarkerColor(f);
-          const m = L.circleMarker([f.lat, f.lng], { radius: 12, fillColor: color, color: "#fff", weight: 2, fillOpacity: 1 }).addTo(map).bindPopup(popupHtml(f));
-          markers[f.id] = m;
-          pts.push([f.lat, f.lng]);
-        }
-        if (pts.length > 0 && !selectedUserId) {
-          try { map.fitBounds(L.latLngBounds(pts), { padding: [40, 40], maxZoom: 16 }); } catch (_) {}
+        const active = await fetchSelectedRoute(selectedUserId);
+        if (active && active.coordinates && active.coordinates.length > 1) {
+          const linePts = active.coordinates.map((c) => [c[1], c[0]]);
+          polyline = L.polyline(linePts, { color: getMarkerColor(sel), weight: 4, opacity: 0.8, dashArray: sel.is_paused ? "10,5" : null }).addTo(map);
+          map.fitBounds(L.latLngBounds(linePts), { padding: [40, 40], maxZoom: 16 });
+          if (userProfileEl) { userProfileEl.innerHTML = `<div class="map-user-profile-box"><div class="map-user-profile-title"><i class="fas fa-route"></i> ${sel.ad || sel.username} — Marşrut</div></div>`; userProfileEl.style.display = "block"; }
         }
-        if (selectedUserId) {
-          const sel = features.find((x) => x.id == selectedUserId);
-          if (sel) {
-            try {
-              const rRes = await fetch("/api/routes/?user=" + selectedUserId, { credentials: "same-origin", headers: { "X-CSRFToken": getCSRFToken() || "" } });
-              if (rRes.ok) {
-                const rData = await rRes.json();
-                const routes = Array.isArray(rData) ? rData : rData.results || [];
-                const active = routes.find((r) => !r.end_time) || routes[routes.length - 1];
-                if (active && active.points && active.points.length > 1) {
-                  const linePts = active.points.map((p) => [parseFloat(p.latitude), parseFloat(p.longitude)]);
-                  polylines[selectedUserId] = L.polyline(linePts, { color: getMarkerColor(sel), weight: 4, opacity: 0.8, dashArray: sel.is_paused ? "10,5" : null }).addTo(map);
-                  map.fitBounds(L.latLngBounds(linePts), { padding: [40, 40], maxZoom: 16 });
-                  if (userProfileEl) { userProfileEl.innerHTML = `<div class="map-user-profile-box"><div class="map-user-profile-title"><i class="fas fa-route"></i> ${sel.ad || sel.username} — Marşrut</div></div>`; userProfileEl.style.display = "block"; }
-                }
-              }
-            } catch (_) {}
-            if (markers[selectedUserId]) markers[selectedUserId].openPopup();
-          } else if (userProfileEl) userProfileEl.style.display = "none";
-        } else if (userProfileEl) userProfileEl.style.display = "none";
-        if (userListEl) {
-          if (features.length === 0) userListEl.innerHTML = '<div class="map-empty-hint">İstifadəçi yoxdur</div>';
-          else {
-            userListEl.innerHTML = features.map((f) => { const hasLoc = f.lat != null && f.lng != null; const c = hasLoc ? " map-user-item-clickable" : ""; const bat = batteryHTML(f.battery_level); const sel = f.id == selectedUserId ? " selected" : ""; return `<div class="map-user-item${c}${sel}" data-user-id="${f.id}" data-lat="${f.lat ?? ""}" data-lng="${f.lng ?? ""}"><span class="status-dot ${getStatusClass(f)}"></span><span class="map-user-name">${f.ad || f.username || "İstifadəçi"}</span>${bat ? `<span class="map-user-battery">${bat}</span>` : ""}</div>`; }).join("");
-            userListEl.querySelectorAll(".map-user-item-clickable").forEach((el) => {
-              el.addEventListener("click", function () {
-                const uid = this.dataset.userId, lat = parseFloat(this.dataset.lat), lng = parseFloat(this.dataset.lng);
-                selectedUserId = selectedUserId == uid ? null : uid;
-                document.querySelectorAll(".map-user-item").forEach((e) => e.classList.remove("selected"));
-                if (selectedUserId) this.classList.add("selected");
-                load().then(function () { if (!isNaN(lat) && !isNaN(lng) && markers[uid]) { map.setView([lat, lng], 15); markers[uid].openPopup(); } });
-              });
-            });
-          }
+      } catch (_) {}
+      if (markers[selectedUserId]) markers[selectedUserId].openPopup();
+    }
+    function onUserClick(el) {
+      const uid = el.dataset.userId, lat = parseFloat(el.dataset.lat), lng = parseFloat(el.dataset.lng);
+      selectedUserId = selectedUserId == uid ? null : uid;
+      renderUserList([...feed.features.values()], onUserClick);
+      drawSelectedRoute().then(function () { if (!isNaN(lat) && !isNaN(lng) && markers[uid]) { map.setView([lat, lng], 15); markers[uid].openPopup(); } });
+    }
+    async function load() {
+      try {
+        const result = await fetchFeed(feed);
+        if (!result.ok) { if (userListEl) userListEl.innerHTML = '<div class="map-empty-hint">Admin girişi lazımdır</div>'; return; }
+        if (!result.full && result.changed.length === 0) return;
+        result.removed.forEach(removeMarker);
+        result.changed.forEach(upsertMarker);
+        if (!fittedOnce && !selectedUserId) {
+          const pts = [...feed.features.values()].filter(hasLocation).map((f) => [f.lat, f.lng]);
+          if (pts.length > 0) { try { map.fitBounds(L.latLngBounds(pts), { padding: [40, 40], maxZoom: 16 }); } catch (_) {} }
+          fittedOnce = true;
         }
+        if (selectedUserId && (result.removed.includes(String(selectedUserId)) || result.changed.some((f) => f.id == selectedUserId))) await drawSelectedRoute();
+        renderUserList([...feed.features.values()], onUserClick);
       } catch (e) { if (userListEl) userListEl.innerHTML = '<div class="map-empty-hint">Yükləmə xətası</div>'; }
     }
-    load();
-    setInterval(load, 10000);
+    let listRenderPending = false;
+    function onLiveFeature(f, type) {
+      upsertMarker(f);
+      if (type === "location" && f.id == selectedUserId) drawSelectedRoute();
+      if (listRenderPending) return;
+      listRenderPending = true;
+      setTimeout(function () { listRenderPending = false; renderUserList([...feed.features.values()], onUserClick); }, 500);
+    }
+    load().then(function () {
+      const live = connectLiveFeed(feed, onLiveFeature);
+      setInterval(load, live ? LIVE_POLL_INTERVAL : 10000);
+    });
     return true;
   }
 });
@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static files serving
+    "tracking.query_metrics.QueryMetricsMiddleware",  # SQL sorğu sayı / vaxt — /api/metrics/
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -141,6 +142,104 @@ if USE_EXTERNAL_DB:
 # Database Router
 DATABASE_ROUTERS = ['tracking.db_router.ExternalDatabaseRouter']
 
+# Cache — bir neçə gunicorn worker-i arasında paylaşılmalı olan məlumatlar üçün
+# (canlı feed, marşrut keşləri) Redis/Memcached istifadə edin
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "flux-tracker"),
+    }
+}
+
+# Canlı xəritə axını (SSE) — /api/movqe-son-stream/
+# Hər açıq axın bir worker-i tutur: sync gunicorn worker-ləri ilə yalnız
+# gthread/gevent worker-ləri olduqda aktiv edin
+LIVE_FEED_ENABLED = os.getenv("LIVE_FEED_ENABLED", "false").lower() == "true"
+LIVE_FEED_BROKER = os.getenv("LIVE_FEED_BROKER", "tracking.live_feed.LocalBroker")
+LIVE_FEED_STREAM_SECONDS = int(os.getenv("LIVE_FEED_STREAM_SECONDS", "25"))
+LIVE_FEED_KEEPALIVE_SECONDS = int(os.getenv("LIVE_FEED_KEEPALIVE_SECONDS", "10"))
+
+# Offline bufer (POST /api/locations/batch/): bir sorğuda maksimum nöqtə sayı.
+# PostgreSQL-də nöqtələr COPY ilə yazılır, digər DB-lərdə hissə-hissə bulk_create
+LOCATION_BATCH_MAX_POINTS = int(os.getenv("LOCATION_BATCH_MAX_POINTS", "20000"))
+LOCATION_BATCH_USE_COPY = os.getenv("LOCATION_BATCH_USE_COPY", "true").lower() == "true"
+
+# RouteStats batch/drain-də hər dəfə, tək nöqtə yolunda (POST /api/locations/) route başına
+# ən çox bu intervalda bir yenilənir (hər nöqtədə stats sətri kilidlənmir); stop-da tam
+ROUTE_STATS_POINT_INTERVAL = float(os.getenv("ROUTE_STATS_POINT_INTERVAL", "60"))
+
+# POST /api/locations/ rejimi: "sync" — sorğu daxilində yazılır,
+# "queue" — yerli jurnala yazılır (202), DB-yə drain_location_queue worker-i yazır
+LOCATION_INGEST_MODE = os.getenv("LOCATION_INGEST_MODE", "sync")
+LOCATION_QUEUE_DIR = Path(os.getenv("LOCATION_QUEUE_DIR", BASE_DIR / "var" / "location-queue"))
+LOCATION_QUEUE_ROTATE_SECONDS = float(os.getenv("LOCATION_QUEUE_ROTATE_SECONDS", "2"))
+LOCATION_QUEUE_FSYNC = os.getenv("LOCATION_QUEUE_FSYNC", "false").lower() == "true"
+
+# LocationPoint partition-ları (PostgreSQL) və retention — manage_location_partitions əmri
+LOCATION_PARTITION_INTERVAL = os.getenv("LOCATION_PARTITION_INTERVAL", "month")  # month | week
+LOCATION_PARTITION_AHEAD = int(os.getenv("LOCATION_PARTITION_AHEAD", "3"))
+LOCATION_RETENTION_DAYS = int(os.getenv("LOCATION_RETENTION_DAYS", "0"))  # 0 — arxiv yoxdur
+LOCATION_ARCHIVE_DIR = Path(os.getenv("LOCATION_ARCHIVE_DIR", BASE_DIR / "var" / "location-archive"))
+
+# Kompakt nöqtə cədvəli (CompactLocationPoint) — köçürmə addımları tracking/compact_points.py-da
+LOCATION_COMPACT_DUAL_WRITE = os.getenv("LOCATION_COMPACT_DUAL_WRITE", "false").lower() == "true"
+LOCATION_POINT_STORAGE = os.getenv("LOCATION_POINT_STORAGE", "decimal")  # decimal | compact
+
+# Heartbeat-lər cache-də saxlanılır və bu intervalda bir bulk UPDATE ilə DB-yə yazılır
+# (tracking.liveness, flush_heartbeats əmri). 0 — hər heartbeat birbaşa DB-yə yazılır.
+# Yalnız shared CACHE_BACKEND (Redis/Memcached) ilə işləyir — LocMemCache ilə söndürülür
+HEARTBEAT_FLUSH_SECONDS = float(os.getenv("HEARTBEAT_FLUSH_SECONDS", "60"))
+
+# Aktiv route keşi (tracking.active_routes), saniyə. Yalnız shared CACHE_BACKEND-də
+# (Redis/Memcached) işləyir — LocMemCache ilə söndürülür, route hər dəfə DB-dən oxunur
+ACTIVE_ROUTE_CACHE_TTL = int(os.getenv("ACTIVE_ROUTE_CACHE_TTL", "300"))
+
+# External (Solvey) DB cədvəl adlarının keş müddəti (tracking.external_service.ExternalSchema)
+SOLVEY_SCHEMA_TTL = float(os.getenv("SOLVEY_SCHEMA_TTL", "86400"))
+
+# Solvey arayış məlumatı: "external" — birbaşa Solvey DB, "mirror" — default DB-dəki
+# lokal güzgüdən (sync_solvey_mirror əmri/cron doldurur, tracking.solvey_mirror)
+SOLVEY_READ_MODE = os.getenv("SOLVEY_READ_MODE", "external")
+SOLVEY_MIRROR_INTERVAL = float(os.getenv("SOLVEY_MIRROR_INTERVAL", "300"))
+SOLVEY_MIRROR_FULL_EVERY = float(os.getenv("SOLVEY_MIRROR_FULL_EVERY", "3600"))
+SOLVEY_MIRROR_CHUNK = int(os.getenv("SOLVEY_MIRROR_CHUNK", "5000"))
+
+# Arayış kataloqlarının (regions/cities/hospitals/doctors/medicines) versiya snapshot-ları —
+# ?since_version= delta bu müddət ərzində mümkündür (tracking.catalog_versions)
+CATALOG_SNAPSHOT_TTL = int(os.getenv("CATALOG_SNAPSHOT_TTL", str(7 * 24 * 3600)))
+
+# Dərman kataloqu (/api/medicines/) — hazır JSON + gzip cavab keşi (0 — keş yoxdur).
+# Lokal Medicine dəyişiklikləri keş açarındakı DB damğası ilə dərhal görünür; dərman
+# güzgüsünün sync-i isə worker-lərə yalnız shared CACHE_BACKEND ilə çatır (əks halda TTL)
+MEDICINE_CATALOG_CACHE_TTL = int(os.getenv("MEDICINE_CATALOG_CACHE_TTL", "600"))
+
+# Solvey həkim kataloqu (/api/solvey/doctors/) keşi, saniyə — 0 keşi söndürür
+SOLVEY_DIRECTORY_CACHE_TTL = int(os.getenv("SOLVEY_DIRECTORY_CACHE_TTL", "600"))
+
+# Endpoint metrikaları (tracking.query_metrics) — /api/metrics/ Prometheus formatında.
+# Token boşdursa yalnız staff sessiyası ilə açılır
+QUERY_METRICS_ENABLED = os.getenv("QUERY_METRICS_ENABLED", "true").lower() == "true"
+QUERY_METRICS_TOKEN = os.getenv("QUERY_METRICS_TOKEN", "")
+QUERY_METRICS_PUBLISH_SECONDS = float(os.getenv("QUERY_METRICS_PUBLISH_SECONDS", "15"))
+# Endpoint başına maksimum SQL sorğu sayı (url adı və ya pattern). Aşılanda xəbərdarlıq;
+# QUERY_BUDGET_STRICT=true (testlər) olduqda QueryBudgetExceeded. Yoxlama: check_query_budgets
+QUERY_BUDGETS = {
+    "last-locations": 4,
+    "routes-list": 5,
+    "routes-summary": 4,
+    "route-points": 5,
+    "user-dashboard": 14,
+    "get-visited-doctors": 4,
+    "get-visited-pharmacies": 6,
+    "notification-list": 4,
+    "solvey-doctors": 5,
+    "get-medicines": 5,
+    "dashboard_home": 8,
+    "dashboard_users": 5,
+    "dashboard_routes": 6,
+}
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
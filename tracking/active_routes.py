@@ -0,0 +1,86 @@
+"""
+Active Route Resolver
+İstifadəçinin aktiv route-unu (end_time = NULL) hər heartbeat/nöqtədə DB-dən
+axtarmamaq üçün keş:
+
+1. shared Django cache (bütün worker-lər üçün, ACTIVE_ROUTE_CACHE_TTL, default 300)
+2. keşdə yoxdursa — partial index (route_active_user_idx) ilə bir sorğu
+
+Keş yalnız bütün worker-lərin gördüyü backend-də (Redis, Memcached, DB) işləyir —
+process daxili cache (LocMemCache, DummyCache) olduqda və ya TTL 0 olduqda söndürülür
+və hər çağırış DB-yə gedir: bir worker-də dayandırılan route digərlərində aktiv qalmasın.
+
+Keşdə route-un sahələri saxlanılır və Route instance-ı yenidən qurulur. Vəziyyəti
+dəyişən əməliyyatlar (start/stop/pause/resume) fresh=True ilə DB-dən oxuyur və sonra
+remember() çağırır; heartbeat/nöqtə yolları remember() çağırmır (köhnə instance ilə
+dayandırılmış route-u yenidən keşə yazmamaq üçün). Admin-dən dəyişəndə invalidate().
+Dəyişən sahələr (last_ping, last_location_time) keşdən oxunub qərar üçün istifadə
+olunmamalıdır — bunlar şərtli UPDATE ilə yazılır.
+"""
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_KEY = "active-route:{}"
+NO_ROUTE = "none"
+LOCAL_BACKENDS = ("LocMemCache", "DummyCache")
+
+
+def _cache_ttl() -> int:
+    return int(getattr(settings, "ACTIVE_ROUTE_CACHE_TTL", 300))
+
+
+def enabled() -> bool:
+    """Keş yalnız shared backend-də (worker-lər arası) işləyir"""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    return _cache_ttl() > 0 and not backend.endswith(LOCAL_BACKENDS)
+
+
+def _serialize(route) -> Dict:
+    return {f.attname: getattr(route, f.attname) for f in route._meta.concrete_fields}
+
+
+def _deserialize(data: Dict):
+    from .models import Route
+
+    names = list(data)
+    return Route.from_db("default", names, [data[name] for name in names])
+
+
+def _query(user_id: int):
+    from .models import Route
+
+    return (
+        Route.objects.filter(user_id=user_id, end_time__isnull=True)
+        .order_by("-start_time")
+        .first()
+    )
+
+
+def get_active_route(user_id: int, fresh: bool = False):
+    """Aktiv route (yoxdursa None). fresh=True — keşi keçib DB-dən oxu və keşi yenilə
+    (start/stop/pause/resume kimi vəziyyətə baxan əməliyyatlar üçün)."""
+    if not enabled():
+        return _query(user_id)
+
+    key = CACHE_KEY.format(user_id)
+    data = None if fresh else cache.get(key)
+    if data is None:
+        route = _query(user_id)
+        cache.set(key, _serialize(route) if route else NO_ROUTE, timeout=_cache_ttl())
+        return route
+    return _deserialize(data) if data != NO_ROUTE else None
+
+
+def remember(route) -> None:
+    """Yeni başladılmış və ya vəziyyəti dəyişdirilmiş route-u keşə yaz"""
+    if not enabled():
+        return
+    data = _serialize(route) if route.end_time is None else NO_ROUTE
+    cache.set(CACHE_KEY.format(route.user_id), data, timeout=_cache_ttl())
+
+
+def invalidate(user_id: int) -> None:
+    if enabled():
+        cache.delete(CACHE_KEY.format(user_id))
@@ -1,16 +1,17 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import Route, LocationPoint, VisitSchedule, HospitalVisit, UserProfile, Notification, VisitedPharmacy, VisitedPharmacyItem
+from .models import Route, RouteStats, LocationPoint, LocationBatch, VisitSchedule, HospitalVisit, UserProfile, Notification, VisitedPharmacy, VisitedPharmacyItem
 
 
 @admin.register(Route)
 class RouteAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'start_time', 'end_time', 'duration', 'point_count']
+    list_display = ['id', 'user', 'start_time', 'end_time', 'duration', 'point_count', 'distance', 'stop_count']
     list_filter = ['start_time', 'end_time']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['start_time']
     date_hierarchy = 'start_time'
+    list_select_related = ['user', 'stats']
     
     def duration(self, obj):
         if obj.end_time and obj.start_time:
@@ -21,9 +22,46 @@ class RouteAdmin(admin.ModelAdmin):
     duration.short_description = "Müddət"
     
     def point_count(self, obj):
-        return obj.points.count()
+        # RouteStats list_select_related ilə gəlir; statistikası olmayan route üçün sayılır
+        stats = getattr(obj, 'stats', None)
+        return stats.point_count if stats else LocationPoint.objects.for_route(obj).count()
     point_count.short_description = "Nöqtə Sayı"
 
+    def save_model(self, request, obj, form, change):
+        from .active_routes import invalidate
+        super().save_model(request, obj, form, change)
+        invalidate(obj.user_id)
+
+    def delete_model(self, request, obj):
+        from .active_routes import invalidate
+        super().delete_model(request, obj)
+        invalidate(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        from .active_routes import invalidate
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            invalidate(user_id)
+
+    def distance(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return f"{stats.distance_km} km" if stats else "-"
+    distance.short_description = "Məsafə"
+
+    def stop_count(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return stats.stop_count if stats else "-"
+    stop_count.short_description = "Dayanacaq"
+
+
+@admin.register(RouteStats)
+class RouteStatsAdmin(admin.ModelAdmin):
+    list_display = ['route', 'point_count', 'distance_m', 'moving_seconds', 'idle_seconds', 'stop_count', 'max_speed_kmh', 'updated_at']
+    search_fields = ['route__user__username']
+    raw_id_fields = ['route']
+    readonly_fields = ['updated_at']
+
 
 @admin.register(LocationPoint)
 class LocationPointAdmin(admin.ModelAdmin):
@@ -35,6 +73,14 @@ class LocationPointAdmin(admin.ModelAdmin):
     raw_id_fields = ['route']
 
 
+@admin.register(LocationBatch)
+class LocationBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'batch_id', 'route', 'received', 'created', 'duplicates', 'errors', 'created_at']
+    search_fields = ['user__username', 'batch_id']
+    raw_id_fields = ['user', 'route']
+    readonly_fields = ['created_at']
+
+
 @admin.register(VisitSchedule)
 class VisitScheduleAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'hospital_name', 'doctor_name', 'day_of_week_display', 'time_range', 'is_active']
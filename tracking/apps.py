@@ -5,4 +5,10 @@ class TrackingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tracking"
 
+    def ready(self):
+        from . import dashboard_counters, medicine_catalog, user_activity
+        dashboard_counters.connect_signals()
+        medicine_catalog.connect_signals()
+        user_activity.connect_signals()
+
 
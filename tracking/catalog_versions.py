@@ -0,0 +1,107 @@
+"""
+Catalog Versions
+Mobil arayış məlumatı (bölgə, şəhər, xəstəxana, həkim, dərman) üçün versiyalar.
+
+- versiya — datasetin məzmun hash-i (sətirlərin JSON-u üzrə); cavabda "version"
+  və ETag kimi göndərilir, If-None-Match uyğun gələrsə 304 (body yoxdur)
+- hər versiyanın snapshot-u (id → sətir hash-i) cache-də CATALOG_SNAPSHOT_TTL
+  saniyə saxlanılır; ?since_version=<v> ilə yalnız əlavə olunan/dəyişən sətirlər
+  ("changed") və silinən id-lər ("removed") qaytarılır ("delta": true)
+- keşlənən kataloqlar (həkimlər, dərmanlar) versiyanı və sətir hash-lərini
+  keş doldurularkən bir dəfə hesablayır (snapshot()) və siyahı ilə saxlayır —
+  respond() onları hazır alır, hər sorğuda bütün siyahı hash-lənmir
+- köhnə versiyanın snapshot-u tapılmadıqda (vaxtı keçib, başqa cache) adi tam
+  cavab qaytarılır ("data") — telefon siyahını tam əvəz edir
+"""
+import hashlib
+import json
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+SNAPSHOT_KEY = "catalog-snapshot:{}:{}"
+
+
+def _snapshot_ttl() -> int:
+    return int(getattr(settings, "CATALOG_SNAPSHOT_TTL", 7 * 24 * 3600))
+
+
+def _digest(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.md5(encoded.encode()).hexdigest()[:16]
+
+
+def content_version(rows: List[Dict]) -> str:
+    return _digest(rows)
+
+
+def row_hashes(rows: List[Dict]) -> Dict:
+    return {row["id"]: _digest(row) for row in rows}
+
+
+def remember(dataset: str, version: str, rows: List[Dict]) -> None:
+    """Versiyanın snapshot-unu saxla (artıq varsa heç nə etmir)"""
+    key = SNAPSHOT_KEY.format(dataset, version)
+    if not cache.has_key(key):
+        cache.set(key, row_hashes(rows), _snapshot_ttl())
+
+
+def snapshot(dataset: str, rows: List[Dict]) -> Dict:
+    """Keş doldurularkən: {"version", "hashes"} bir dəfə hesablanır, snapshot saxlanılır"""
+    hashes = row_hashes(rows)
+    version = content_version(rows)
+    cache.set(SNAPSHOT_KEY.format(dataset, version), hashes, _snapshot_ttl())
+    return {"version": version, "hashes": hashes}
+
+
+def diff(dataset: str, since_version: str, rows: List[Dict],
+         current: Optional[Dict] = None) -> Optional[Dict]:
+    """since_version → indiki sətirlər; snapshot yoxdursa None. current — hazır sətir hash-ləri"""
+    previous = cache.get(SNAPSHOT_KEY.format(dataset, since_version))
+    if previous is None:
+        return None
+    current = current if current is not None else row_hashes(rows)
+    return {
+        "changed": [row for row in rows if previous.get(row["id"]) != current[row["id"]]],
+        "removed": [row_id for row_id in previous if row_id not in current],
+    }
+
+
+def respond(request, dataset: str, rows: List[Dict], version: Optional[str] = None,
+            full: Optional[Callable] = None, hashes: Optional[Dict] = None):
+    """
+    304 / delta / tam cavab. full — tam cavabı qurmaq üçün callable
+    (yoxdursa {"success", "version", "data"}).
+    version/hashes — keşlənmiş kataloqdan hazır dəyərlər (snapshot() ilə artıq saxlanılıb);
+    verilmədikdə burada hesablanır (kiçik siyahılar: bölgə, şəhər, xəstəxana).
+    """
+    if version is None:
+        version = content_version(rows)
+        remember(dataset, version, rows)
+    headers = {"ETag": quote_etag(version), "Cache-Control": "no-cache", "X-Catalog-Version": version}
+
+    since_version = request.GET.get("since_version")
+    if quote_etag(version) in parse_etags(request.headers.get("If-None-Match", "")) or since_version == version:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if since_version:
+        delta = diff(dataset, since_version, rows, current=hashes)
+        if delta is not None:
+            return Response({
+                "success": True,
+                "version": version,
+                "since_version": since_version,
+                "delta": True,
+                **delta,
+            }, headers=headers)
+
+    if full is None:
+        return Response({"success": True, "version": version, "data": rows}, headers=headers)
+    response = full()
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,136 @@
+"""
+Compact Location Points
+LocationPoint (DecimalField koordinatlar, timestamptz, float) əvəzinə
+CompactLocationPoint: int32 mikrodərəcə, int64 epoch ms, smallint dəqiqlik/sürət/batareya.
+
+Köçürmə yolu (settings):
+1. LOCATION_COMPACT_DUAL_WRITE = True — yeni nöqtələr hər iki cədvələ yazılır
+2. python manage.py convert_location_points — köhnə nöqtələr köçürülür (təkrar işlədilə bilər,
+   (route, ts_ms) unikal olduğu üçün artıq köçürülənlər atlanır)
+3. LOCATION_POINT_STORAGE = "compact" — route analitikası və geometriya kompakt cədvəldən oxuyur
+4. Hər şey yoxlandıqdan sonra LocationPoint yazısı dayandırıla bilər
+
+benchmark_compact_points — sətir ölçüsü, insert və oxu/serializasiya sürəti.
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .geometry import timestamps_ms
+
+BULK_CREATE_CHUNK = 5000
+SMALLINT_MAX = 32767
+
+
+def dual_write_enabled() -> bool:
+    return getattr(settings, "LOCATION_COMPACT_DUAL_WRITE", False)
+
+
+def reads_enabled() -> bool:
+    return getattr(settings, "LOCATION_POINT_STORAGE", "decimal") == "compact"
+
+
+def _e6(values: np.ndarray) -> np.ndarray:
+    return np.round(np.asarray(values, dtype=np.float64) * 1_000_000).astype(np.int32)
+
+
+def _small(value, scale: float = 1.0) -> Optional[int]:
+    """Mənfi/boş dəyər (Android -1 göndərir) → None; smallint həddinə sıxılır"""
+    if value is None:
+        return None
+    value = float(value) * scale
+    if not value >= 0:  # NaN da daxil
+        return None
+    return min(int(round(value)), SMALLINT_MAX)
+
+
+def build_points(route_id: int, latitude, longitude, timestamps: List[datetime],
+                 accuracy, speed, battery_level, is_online) -> list:
+    """Sütunlardan CompactLocationPoint instance-ları; is_online — bool və ya sətir üzrə siyahı"""
+    from .models import CompactLocationPoint
+
+    lat_e6 = _e6(latitude).tolist()
+    lng_e6 = _e6(longitude).tolist()
+    ts_ms = timestamps_ms(timestamps).tolist()
+    online = is_online if isinstance(is_online, (list, tuple)) else [is_online] * len(ts_ms)
+    return [
+        CompactLocationPoint(
+            route_id=route_id,
+            lat_e6=lat_e6[i],
+            lng_e6=lng_e6[i],
+            ts_ms=ts_ms[i],
+            accuracy_m=_small(accuracy[i]),
+            speed_cms=_small(speed[i], 100),
+            battery_level=_small(battery_level[i]),
+            is_online=bool(online[i]),
+        )
+        for i in range(len(ts_ms))
+    ]
+
+
+def bulk_insert(points: list) -> int:
+    from .models import CompactLocationPoint
+
+    for start in range(0, len(points), BULK_CREATE_CHUNK):
+        CompactLocationPoint.objects.bulk_create(points[start:start + BULK_CREATE_CHUNK], ignore_conflicts=True)
+    return len(points)
+
+
+def insert_batch(route, batch, is_online: bool) -> int:
+    """ingest.PointBatch-i kompakt cədvələ yaz (təkrarlar atlanır)"""
+    return bulk_insert(build_points(
+        route.id, batch.latitude, batch.longitude, batch.timestamps,
+        batch.accuracy, batch.speed, batch.battery_level, is_online,
+    ))
+
+
+def insert_point(route, latitude, longitude, timestamp, accuracy=None, speed=None,
+                 battery_level=None, is_online=True) -> int:
+    return bulk_insert(build_points(
+        route.id, [float(latitude)], [float(longitude)], [timestamp],
+        [accuracy], [speed], [battery_level], is_online,
+    ))
+
+
+def _decimal_e6(value: Decimal) -> int:
+    return int(Decimal(value).scaleb(6))
+
+
+def convert_rows(rows: Iterable[Tuple]) -> list:
+    """LocationPoint values_list sətirləri → CompactLocationPoint (Decimal dəqiq çevrilir)"""
+    from .models import CompactLocationPoint
+
+    return [
+        CompactLocationPoint(
+            route_id=route_id,
+            lat_e6=_decimal_e6(lat),
+            lng_e6=_decimal_e6(lng),
+            ts_ms=round(ts.timestamp() * 1000),
+            accuracy_m=_small(accuracy),
+            speed_cms=_small(speed, 100),
+            battery_level=_small(battery),
+            is_online=online,
+        )
+        for route_id, lat, lng, ts, accuracy, speed, battery, online in rows
+    ]
+
+
+CONVERT_FIELDS = ("route_id", "latitude", "longitude", "timestamp", "accuracy", "speed", "battery_level", "is_online")
+
+
+def route_arrays(route, after: Optional[datetime] = None):
+    """Route nöqtələri kompakt cədvəldən: (latlng (N, 2) float64, ts saniyə (N,), son timestamp)"""
+    from .models import CompactLocationPoint
+
+    queryset = CompactLocationPoint.objects.filter(route=route)
+    if after is not None:
+        queryset = queryset.filter(ts_ms__gt=round(after.timestamp() * 1000))
+    rows = list(queryset.order_by("ts_ms").values_list("lat_e6", "lng_e6", "ts_ms"))
+    data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    latlng = data[:, :2] / CompactLocationPoint.SCALE
+    ts = data[:, 2] / 1000.0
+    last = datetime.fromtimestamp(int(data[-1, 2]) / 1000, tz=dt_timezone.utc) if len(data) else None
+    return latlng, ts, last
@@ -0,0 +1,178 @@
+"""
+Dashboard Counters
+Admin ana səhifəsinin rəqəmləri DashboardCounter cədvəlindən (metrik × saat) oxunur.
+
+Yeniləmə:
+- LocationPoint — ingest yolları (tək nöqtə, batch, növbə) yazılan nöqtələrin
+  vaxtlarını record_points() ilə bildirir (bulk insert siqnal göndərmir)
+- digər modellər — post_save (yeni obyekt) / post_delete siqnalları, TrackingConfig.ready-də qoşulur
+- sayğac yazısı transaction commit olunandan sonra, qısa UPDATE ilə (ingest
+  transaction-u boyu sətir kilidlənmir)
+- rebuild_dashboard_counters əmri mənbə cədvəllərdən yenidən hesablayır
+  (dəyişdirilən tarixlər, siqnalsız silinmələr kimi sürüşmələri düzəldir).
+  Arxivlənmiş nöqtələr (tracking.partitions) üçün köhnə saatlar saxlanılır.
+"""
+import logging
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# metrik → (app_label.Model, bucket sahəsi)
+METRICS = {
+    "users": (settings.AUTH_USER_MODEL, "date_joined"),
+    "routes": ("tracking.Route", "start_time"),
+    "locations": ("tracking.LocationPoint", "timestamp"),
+    "hospital_visits": ("tracking.HospitalVisit", "visit_date"),
+    "visited_doctors": ("tracking.VisitedDoctor", "visit_date"),
+    "schedules": ("tracking.VisitSchedule", "created_at"),
+    "location_reports": ("tracking.LocationPermissionReport", "timestamp"),
+}
+# Bu metriklərin mənbəyi retention ilə silinir — rebuild köhnə saatlara toxunmur
+ARCHIVED_METRICS = {"locations"}
+
+
+def hour_of(value) -> datetime:
+    """datetime → saatın başlanğıcı (UTC); date → həmin günün 00:00 UTC"""
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return datetime.combine(value, dt_time.min, tzinfo=dt_timezone.utc)
+
+
+def _apply(deltas: Dict) -> None:
+    """{(metric, hour): delta} — hər bucket üçün bir UPDATE (yoxdursa INSERT)"""
+    from .models import DashboardCounter
+
+    for (metric, hour), delta in deltas.items():
+        if not delta:
+            continue
+        rows = DashboardCounter.objects.filter(metric=metric, hour=hour)
+        if rows.update(value=F("value") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                DashboardCounter.objects.create(metric=metric, hour=hour, value=delta)
+        except IntegrityError:
+            # Paralel sorğu eyni bucket-i yaratdı
+            rows.update(value=F("value") + delta)
+
+
+def add(deltas: Dict) -> None:
+    """Commit-dən sonra tətbiq et; xəta sayğaca görə əsas yazını pozmur"""
+    def apply():
+        try:
+            _apply(deltas)
+        except Exception as e:
+            logger.error(f"[DASHBOARD_COUNTERS] Update failed: {e}")
+
+    transaction.on_commit(apply)
+
+
+def record_points(timestamps: Iterable[datetime]) -> None:
+    deltas = Counter(("locations", hour_of(ts)) for ts in timestamps)
+    if deltas:
+        add(deltas)
+
+
+def _metric_for(sender) -> Optional[tuple]:
+    label = f"{sender._meta.app_label}.{sender._meta.object_name}"
+    for metric, (model_label, field) in METRICS.items():
+        if model_label == label and metric not in ARCHIVED_METRICS:
+            return metric, field
+    return None
+
+
+def _on_save(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    metric, field = _metric_for(sender)
+    value = getattr(instance, field)
+    if value is not None:
+        add({(metric, hour_of(value)): 1})
+
+
+def _on_delete(sender, instance, **kwargs):
+    metric, field = _metric_for(sender)
+    value = getattr(instance, field)
+    if value is not None:
+        add({(metric, hour_of(value)): -1})
+
+
+def connect_signals() -> None:
+    from django.apps import apps
+    from django.db.models.signals import post_delete, post_save
+
+    for metric, (label, _) in METRICS.items():
+        if metric in ARCHIVED_METRICS:
+            continue
+        model = apps.get_model(label)
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"dashboard_counter_save_{metric}")
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f"dashboard_counter_delete_{metric}")
+
+
+def rebuild(metrics: Optional[Iterable[str]] = None, apps=None) -> Dict[str, int]:
+    """Sayğacları mənbə cədvəllərdən yenidən hesabla; metrik → cəmi.
+    apps — migration-dan çağırılanda tarixi model registry-si."""
+    from django.db.models.functions import Trunc
+
+    if apps is None:
+        from django.apps import apps
+    DashboardCounter = apps.get_model("tracking", "DashboardCounter")
+
+    result = {}
+    for metric in metrics or METRICS:
+        label, field = METRICS[metric]
+        model = apps.get_model(label)
+        if model._meta.get_field(field).get_internal_type() == "DateField":
+            rows = model.objects.values_list(field).annotate(n=Count("pk")).order_by()
+        else:
+            rows = (
+                model.objects.annotate(bucket=Trunc(field, "hour", tzinfo=dt_timezone.utc))
+                .values_list("bucket").annotate(n=Count("pk")).order_by()
+            )
+        buckets = Counter()
+        for value, n in rows:
+            if value is not None:
+                buckets[hour_of(value)] += n
+
+        with transaction.atomic():
+            existing = DashboardCounter.objects.filter(metric=metric)
+            if metric in ARCHIVED_METRICS and buckets:
+                existing = existing.filter(hour__gte=min(buckets))
+            existing.delete()
+            DashboardCounter.objects.bulk_create([
+                DashboardCounter(metric=metric, hour=hour, value=n) for hour, n in buckets.items()
+            ], batch_size=1000)
+        result[metric] = DashboardCounter.objects.filter(metric=metric).aggregate(total=Sum("value"))["total"] or 0
+        logger.info(f"[DASHBOARD_COUNTERS] Rebuilt {metric}: {len(buckets)} hours, total {result[metric]}")
+    return result
+
+
+def snapshot(now: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+    """Bir sorğu: hər metrik üçün {"total", "last_24h"}.
+    last_24h — cari saat daxil son 24 saatlıq bucket; hospital_visits üçün
+    (visit_date tarix sahəsidir) 24 saat əvvəlki gündən bəri."""
+    from .models import DashboardCounter
+
+    now = now or timezone.now()
+    since = hour_of(now) - timedelta(hours=23)
+    since_day = hour_of((now - timedelta(hours=24)).astimezone(dt_timezone.utc).date())
+    rows = DashboardCounter.objects.values("metric").annotate(
+        total=Sum("value"),
+        recent=Sum("value", filter=Q(hour__gte=since)),
+        recent_days=Sum("value", filter=Q(hour__gte=since_day)),
+    ).order_by()
+
+    result = {metric: {"total": 0, "last_24h": 0} for metric in METRICS}
+    for row in rows:
+        recent = row["recent_days"] if row["metric"] == "hospital_visits" else row["recent"]
+        result[row["metric"]] = {"total": row["total"] or 0, "last_24h": recent or 0}
+    return result
@@ -1,10 +1,30 @@
 """
 Database Router
 Hangi model'in hangi database'i kullanacağını belirler
+
+SOLVEY_READ_MODE=mirror — Solvey məlumatı default DB-dəki lokal güzgüdən
+(solvey_mirror_* cədvəlləri, sync_solvey_mirror əmri doldurur) oxunur;
+"external" (default) — birbaşa Solvey DB-dən. Kodda
+SolveyX.objects.using('external') əvəzinə solvey_objects(SolveyX) istifadə edin.
 """
 from django.conf import settings
 
 
+def solvey_read_db() -> str:
+    """Solvey məlumatının oxunduğu DB alias-ı"""
+    if getattr(settings, "SOLVEY_READ_MODE", "external") == "mirror":
+        return "default"
+    return "external"
+
+
+def solvey_objects(model):
+    """Solvey modelinin oxu manager-i: mirror rejimində lokal güzgü modeli (default DB)"""
+    if solvey_read_db() == "default":
+        from .models_solvey import MIRRORS
+        return MIRRORS[model].objects.db_manager("default")
+    return model.objects.db_manager("external")
+
+
 class ExternalDatabaseRouter:
     """
     External database router
@@ -20,6 +40,7 @@ class ExternalDatabaseRouter:
         'tracking.SolveyCity',
         'tracking.SolveyHospital',
         'tracking.SolveyDoctor',
+        'tracking.SolveyMedicine',
     ]
     
     def db_for_read(self, model, **hints):
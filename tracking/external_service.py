@@ -6,6 +6,8 @@ External Service Integration
 """
 import requests
 import os
+import threading
+import time
 from django.db import connections
 from django.conf import settings
 from typing import Dict, List, Any, Optional
@@ -14,6 +16,73 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Məntiqi cədvəl → (env dəyişəni, default ad, alternativ adlar). Alternativlər env-dəki
+# ad Solvey-də olmadıqda sırayla yoxlanılır (ORM modellərinin db_table adları daxil)
+SOLVEY_TABLES = {
+    'doctors': ('SOLVEY_DOCTORS_TABLE', 'tracking_doctors', ('doctors_doctors',)),
+    'regions': ('SOLVEY_REGIONS_AREA_TABLE', 'tracking_region', ('regions_region',)),
+    'hospitals': ('SOLVEY_REGIONS_HOSPITAL_TABLE', 'tracking_hospital', ('regions_hospital',)),
+    'cities': ('SOLVEY_CITY_TABLE', 'tracking_city', ('regions_city',)),
+    'medicines': ('SOLVEY_MEDICINES_TABLE', 'medicine_medical',
+                  ('medicine_medical', 'medical', 'tracking_medical', 'medicines')),
+}
+
+
+class ExternalSchema:
+    """
+    External DB cədvəl adlarının keşli həlli.
+    Bütün cədvəl adları bir introspection sorğusu ilə çəkilir və SOLVEY_SCHEMA_TTL
+    saniyə process yaddaşında saxlanılır — hər sorğuda information_schema-ya
+    gediş-gəliş yoxdur. Tapılmayan cədvəl olduqda qısa müddətdən sonra yenidən yoxlanılır.
+    """
+
+    MISSING_RETRY_SECONDS = 60
+
+    def __init__(self, db_alias: str = 'external'):
+        self.db_alias = db_alias
+        self._tables: Optional[set] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def candidates(name: str) -> List[str]:
+        env_name, default, fallbacks = SOLVEY_TABLES[name]
+        preferred = os.getenv(env_name, default)
+        return [preferred] + [table for table in fallbacks if table != preferred]
+
+    def configured(self, name: str) -> str:
+        """Env-dən gələn ad (yoxlanılmadan)"""
+        return self.candidates(name)[0]
+
+    def _load(self) -> set:
+        with self._lock:
+            if self._tables is None or time.monotonic() >= self._expires:
+                connection = connections[self.db_alias]
+                with connection.cursor() as cursor:
+                    self._tables = set(connection.introspection.table_names(cursor))
+                ttl = float(getattr(settings, 'SOLVEY_SCHEMA_TTL', 86400))
+                missing = [name for name in SOLVEY_TABLES if not self._match(name)]
+                if missing:
+                    ttl = min(ttl, self.MISSING_RETRY_SECONDS)
+                    logger.warning(f"[EXTERNAL_SCHEMA] Tables not found: {', '.join(missing)}")
+                self._expires = time.monotonic() + ttl
+                logger.info(f"[EXTERNAL_SCHEMA] Loaded {len(self._tables)} tables from '{self.db_alias}'")
+            return self._tables
+
+    def _match(self, name: str) -> Optional[str]:
+        return next((table for table in self.candidates(name) if table in self._tables), None)
+
+    def table(self, name: str) -> Optional[str]:
+        """Məntiqi cədvəlin Solvey-dəki həqiqi adı; tapılmadıqda None"""
+        self._load()
+        return self._match(name)
+
+    def invalidate(self) -> None:
+        """Növbəti table() çağırışı adları yenidən yükləsin (məs. sorğu xətasından sonra)"""
+        with self._lock:
+            self._tables = None
+
+
 class ExternalAPIService:
     """External API'den veri çekme servisi"""
     
@@ -110,6 +179,15 @@ class ExternalDatabaseService:
             db_alias: settings.py'de tanımlı database alias'ı
         """
         self.db_alias = db_alias
+        self.schema = get_external_schema(db_alias)
+
+    def _table(self, name: str) -> str:
+        """Keşli schema-dan cədvəl adı; tapılmadıqda env-dəki ad"""
+        try:
+            return self.schema.table(name) or self.schema.configured(name)
+        except Exception as e:
+            logger.error(f"[EXTERNAL_DB] Schema lookup failed: {e}")
+            return self.schema.configured(name)
     
     def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict]:
         """Raw SQL query çalıştır"""
@@ -146,11 +224,11 @@ class ExternalDatabaseService:
     
     def get_doctors(self) -> List[Dict]:
         """Solvey database'den doktor listesini çek (Doctors modeli)"""
-        # Tablo adını environment variable'dan al, yoksa default kullan
-        doctors_table = os.getenv('SOLVEY_DOCTORS_TABLE', 'tracking_doctors')
-        region_table = os.getenv('SOLVEY_REGIONS_AREA_TABLE', 'tracking_region')
-        city_table = os.getenv('SOLVEY_CITY_TABLE', 'tracking_city')
-        hospital_table = os.getenv('SOLVEY_REGIONS_HOSPITAL_TABLE', 'tracking_hospital')
+        # Tablo adı keşli schema-dan (env-deki ad, yoksa alternatifler)
+        doctors_table = self._table('doctors')
+        region_table = self._table('regions')
+        city_table = self._table('cities')
+        hospital_table = self._table('hospitals')
         order_by = os.getenv('SOLVEY_DOCTORS_ORDER_BY', 'ad')
         
         # Doctors modeline göre sorgu (ForeignKey'leri JOIN ile çek)
@@ -189,8 +267,8 @@ class ExternalDatabaseService:
     
     def get_regions_areas(self) -> List[Dict]:
         """Solvey database'den bölge alanlarını çek (Region modeli)"""
-        # Tablo adını environment variable'dan al, yoksa default kullan
-        table_name = os.getenv('SOLVEY_REGIONS_AREA_TABLE', 'tracking_region')
+        # Tablo adı keşli schema-dan (env-deki ad, yoksa alternatifler)
+        table_name = self._table('regions')
         order_by = os.getenv('SOLVEY_REGIONS_AREA_ORDER_BY', 'region_name')
         
         # Region modeline göre sorgu
@@ -206,10 +284,10 @@ class ExternalDatabaseService:
     
     def get_hospitals(self) -> List[Dict]:
         """Solvey database'den hastane listesini çek (Hospital modeli)"""
-        # Tablo adını environment variable'dan al, yoksa default kullan
-        hospital_table = os.getenv('SOLVEY_REGIONS_HOSPITAL_TABLE', 'tracking_hospital')
-        region_table = os.getenv('SOLVEY_REGIONS_AREA_TABLE', 'tracking_region')
-        city_table = os.getenv('SOLVEY_CITY_TABLE', 'tracking_city')
+        # Tablo adı keşli schema-dan (env-deki ad, yoksa alternatifler)
+        hospital_table = self._table('hospitals')
+        region_table = self._table('regions')
+        city_table = self._table('cities')
         order_by = os.getenv('SOLVEY_HOSPITALS_ORDER_BY', 'hospital_name')
         
         # Hospital modeline göre sorgu (ForeignKey'leri JOIN ile çek)
@@ -231,8 +309,8 @@ class ExternalDatabaseService:
     
     def get_cities(self, region_id: Optional[int] = None) -> List[Dict]:
         """Solvey database'den şehir listesini çek (City modeli)"""
-        city_table = os.getenv('SOLVEY_CITY_TABLE', 'tracking_city')
-        region_table = os.getenv('SOLVEY_REGIONS_AREA_TABLE', 'tracking_region')
+        city_table = self._table('cities')
+        region_table = self._table('regions')
         order_by = os.getenv('SOLVEY_CITY_ORDER_BY', 'city_name')
         
         if region_id:
@@ -305,6 +383,15 @@ class ExternalDatabaseService:
 # Singleton instance'lar (isteğe bağlı)
 _external_api_service: Optional[ExternalAPIService] = None
 _external_db_service: Optional[ExternalDatabaseService] = None
+_external_schemas: Dict[str, ExternalSchema] = {}
+
+
+def get_external_schema(db_alias: str = 'external') -> ExternalSchema:
+    """Process daxilində paylaşılan ExternalSchema instance'ı"""
+    schema = _external_schemas.get(db_alias)
+    if schema is None:
+        schema = _external_schemas.setdefault(db_alias, ExternalSchema(db_alias))
+    return schema
 
 
 def get_external_api_service() -> ExternalAPIService:
@@ -0,0 +1,213 @@
+"""
+Route Geometry
+Marşrut xəttinin sadələşdirilməsi (Douglas–Peucker) və keşlənməsi.
+
+Koordinatlar metrə proyeksiya olunur (equirectangular — şəhər/region miqyasında
+kifayət qədər dəqiqdir), tolerance metrlə verilir və ya xəritənin zoom
+səviyyəsindən bir piksel kimi hesablanır.
+
+Kompakt formatlar (JSON obyekt massivi əvəzinə):
+- encoded polyline (Google alqoritmi, precision 6 — DB-dəki 6 onluq rəqəm itmir)
+- delta-kodlaşdırılmış int32 massivi (application/octet-stream)
+"""
+import math
+import struct
+from typing import Optional
+
+import numpy as np
+from django.core.cache import cache
+
+EARTH_RADIUS_M = 6371008.8
+
+# Mapbox GL 512px tile: zoom 0-da ekvatorda bir pikselin metr qarşılığı
+METERS_PER_PIXEL_Z0 = 78271.517
+
+MAX_TOLERANCE_M = 10000.0
+GEOMETRY_CACHE_TTL = 60 * 60 * 24
+
+GEOMETRY_KEY = "route-geometry:{}:{}:{}"
+
+
+def tolerance_for_zoom(zoom: float, latitude: float) -> float:
+    """Verilmiş zoom-da bir pikselə uyğun tolerance (metr)"""
+    return METERS_PER_PIXEL_Z0 * math.cos(math.radians(latitude)) / (2 ** zoom)
+
+
+def project(latlng: np.ndarray) -> np.ndarray:
+    """(N, 2) [lat, lng] dərəcə → (N, 2) [x, y] metr"""
+    lat = np.radians(latlng[:, 0])
+    lng = np.radians(latlng[:, 1])
+    cos_lat0 = math.cos(float(lat.mean())) if len(lat) else 1.0
+    return np.column_stack((lng * cos_lat0 * EARTH_RADIUS_M, lat * EARTH_RADIUS_M))
+
+
+def douglas_peucker(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """Saxlanılacaq nöqtələrin boolean maskası (ilk və son nöqtə həmişə saxlanılır).
+
+    Rekursiya yerinə stack istifadə olunur; hər seqmentin bütün daxili
+    nöqtələrinə məsafə bir vektor əməliyyatı ilə hesablanır.
+    """
+    n = len(xy)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if n < 3 or tolerance <= 0:
+        keep[:] = True
+        return keep
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a = xy[start]
+        seg = xy[end] - a
+        inner = xy[start + 1:end] - a
+        seg_len_sq = float(seg @ seg)
+        if seg_len_sq == 0.0:
+            # Eyni yerdə başlayıb bitən seqment — nöqtəyə olan məsafə
+            dist_sq = np.einsum("ij,ij->i", inner, inner)
+        else:
+            cross = inner[:, 0] * seg[1] - inner[:, 1] * seg[0]
+            dist_sq = cross * cross / seg_len_sq
+        idx = int(np.argmax(dist_sq))
+        if dist_sq[idx] > tolerance * tolerance:
+            split = start + 1 + idx
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def simplify(latlng: np.ndarray, tolerance: float) -> np.ndarray:
+    """(N, 2) [lat, lng] massivini tolerance (metr) ilə sadələşdir"""
+    if len(latlng) < 3:
+        return latlng
+    return latlng[douglas_peucker(project(latlng), tolerance)]
+
+
+def _points_stamp(route) -> str:
+    """
+    Route nöqtələrinin damğası (say + son vaxt, (route, timestamp) indeksi üzrə bir sorğu).
+    Keş açarına daxildir: hər hansı worker-də (və ya drain-də) yazılan nöqtə, gecikmiş
+    nöqtə də daxil, açarı dəyişir — per-process keşdə invalidasiya siqnalı lazım deyil.
+    """
+    from django.db.models import Count, Max
+
+    from . import compact_points
+    from .models import CompactLocationPoint, LocationPoint
+
+    if compact_points.reads_enabled():
+        stamp = CompactLocationPoint.objects.filter(route=route).aggregate(n=Count("id"), last=Max("ts_ms"))
+        last = stamp["last"]
+    else:
+        stamp = LocationPoint.objects.for_route(route).aggregate(n=Count("id"), last=Max("timestamp"))
+        last = stamp["last"].timestamp() if stamp["last"] else None
+    return f"{stamp['n']}-{last}"
+
+
+def get_route_geometry(route, tolerance: Optional[float] = None, zoom: Optional[int] = None) -> dict:
+    """Route-un sadələşdirilmiş xətti; (route, tolerance/zoom, nöqtə damğası) üzrə keşlənir"""
+    from . import compact_points
+    from .models import LocationPoint
+
+    if zoom is not None:
+        variant = f"z{zoom}"
+    else:
+        tolerance = round(min(max(tolerance or 0.0, 0.0), MAX_TOLERANCE_M), 1)
+        variant = f"t{tolerance}"
+
+    key = GEOMETRY_KEY.format(route.id, variant, _points_stamp(route))
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    if compact_points.reads_enabled():
+        latlng = compact_points.route_arrays(route)[0]
+    else:
+        rows = list(
+            LocationPoint.objects.for_route(route)
+            .order_by("timestamp", "id")
+            .values_list("latitude", "longitude")
+        )
+        latlng = np.array(rows, dtype=np.float64).reshape(-1, 2)
+    if zoom is not None:
+        ref_lat = float(latlng[:, 0].mean()) if len(latlng) else 0.0
+        tolerance = tolerance_for_zoom(zoom, ref_lat)
+
+    simplified = simplify(latlng, tolerance)
+    geometry = {
+        "route": route.id,
+        "tolerance": round(tolerance, 3),
+        "point_count": int(len(latlng)),
+        "simplified_count": int(len(simplified)),
+        # GeoJSON sırası: [lng, lat]
+        "coordinates": np.round(simplified[:, ::-1], 6).tolist(),
+    }
+    cache.set(key, geometry, timeout=GEOMETRY_CACHE_TTL)
+    return geometry
+
+
+POLYLINE_PRECISION = 6
+
+# Binary format (little-endian):
+#   header: magic "FLXR", uint32 version, uint32 route_count
+#   hər route: int32 id, int32 n, int64 start_ms, int64 end_ms (-1 = aktiv), int64 t0_ms
+#              sonra n × [int32 dlat, int32 dlng, int32 dt_ms] — əvvəlki nöqtədən fərq,
+#              ilk nöqtə mütləq dəyərdir (lat/lng × 10^6, dt = 0)
+BINARY_MAGIC = b"FLXR"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sII")
+BINARY_ROUTE_HEADER = struct.Struct("<iiqqq")
+
+
+def encode_signed(values) -> str:
+    """Tam ədədləri polyline simvollarına çevir (zigzag + 5 bitlik hissələr)"""
+    chunks = []
+    append = chunks.append
+    for value in values:
+        value = int(value)
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(latlng: np.ndarray, precision: int = POLYLINE_PRECISION) -> str:
+    """(N, 2) [lat, lng] massivi → encoded polyline"""
+    if len(latlng) == 0:
+        return ""
+    scaled = np.round(np.asarray(latlng, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return encode_signed(deltas.ravel().tolist())
+
+
+def timestamps_ms(timestamps) -> np.ndarray:
+    """datetime siyahısı → epoch millisaniyə (int64)"""
+    return np.array([round(ts.timestamp() * 1000) for ts in timestamps], dtype=np.int64)
+
+
+def _epoch_ms(value) -> int:
+    return -1 if value is None else round(value.timestamp() * 1000)
+
+
+def encode_binary_routes(routes) -> bytes:
+    """[(route, latlng (N, 2), ts_ms (N,)), ...] → binary format (yuxarıdakı sxem)"""
+    parts = [BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(routes))]
+    for route, latlng, ts_ms in routes:
+        n = len(latlng)
+        t0 = int(ts_ms[0]) if n else 0
+        parts.append(BINARY_ROUTE_HEADER.pack(
+            route.id, n, _epoch_ms(route.start_time), _epoch_ms(route.end_time), t0,
+        ))
+        if n:
+            columns = np.empty((n, 3), dtype=np.int64)
+            columns[:, :2] = np.round(np.asarray(latlng, dtype=np.float64) * 1e6)
+            columns[:, 2] = ts_ms
+            deltas = np.diff(columns, axis=0, prepend=np.zeros((1, 3), dtype=np.int64))
+            deltas[0, 2] = 0
+            parts.append(deltas.astype("<i4").tobytes())
+    return b"".join(parts)
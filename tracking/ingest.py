@@ -0,0 +1,316 @@
+"""
+Location Ingest
+Offline buferdən gələn toplu nöqtələrin sürətli qəbulu (BatchLocationView).
+
+1. validate_points — batch sütunlara ayrılır və bütöv massiv kimi yoxlanılır
+   (koordinat diapazonu NumPy ilə, timestamp datetime.fromisoformat ilə);
+   model instance-ları yaradılmır.
+2. insert_points — PostgreSQL-də COPY FROM STDIN (müvəqqəti cədvələ, sonra
+   INSERT ... ON CONFLICT DO NOTHING), digər DB-lərdə (SQLite) artıq mövcud
+   vaxtlar çıxılır və hissə-hissə bulk_create.
+
+(route, timestamp) unikaldır — təkrar göndərilən nöqtələr yazılmır və
+"created" sayına düşmür.
+"""
+import io
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+BULK_CREATE_CHUNK = 1000
+BATTERY_RANGE = (0, 100)
+
+
+@dataclass
+class PointBatch:
+    """Yoxlanılmış nöqtələr (sütunlar şəklində); errors — atılan sətirlər"""
+    latitude: np.ndarray
+    longitude: np.ndarray
+    timestamps: List[datetime]
+    accuracy: List[Optional[float]]
+    speed: List[Optional[float]]
+    battery_level: List[Optional[int]]
+    errors: List[Dict] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def newest_index(self) -> int:
+        return max(range(len(self.timestamps)), key=self.timestamps.__getitem__)
+
+    @property
+    def oldest_timestamp(self) -> Optional[datetime]:
+        return min(self.timestamps) if self.timestamps else None
+
+    def subset(self, indices) -> "PointBatch":
+        """Yalnız verilmiş sətirlər (errors saxlanılır)"""
+        indices = list(indices)
+        return PointBatch(
+            latitude=self.latitude[indices],
+            longitude=self.longitude[indices],
+            timestamps=[self.timestamps[i] for i in indices],
+            accuracy=[self.accuracy[i] for i in indices],
+            speed=[self.speed[i] for i in indices],
+            battery_level=[self.battery_level[i] for i in indices],
+            errors=self.errors,
+        )
+
+    def unique_by_timestamp(self, exclude=()) -> "PointBatch":
+        """Batch daxilində eyni vaxtlı təkrarları (və exclude-dakı vaxtları) at; ilk nöqtə qalır"""
+        seen = set(exclude)
+        keep = []
+        for i, ts in enumerate(self.timestamps):
+            if ts not in seen:
+                seen.add(ts)
+                keep.append(i)
+        return self if len(keep) == len(self.timestamps) else self.subset(keep)
+
+    @staticmethod
+    def coordinate(value: float) -> Decimal:
+        """DecimalField(max_digits=9, decimal_places=6) üçün dəyər"""
+        return Decimal(f"{value:.6f}")
+
+
+def max_batch_points() -> int:
+    return getattr(settings, "LOCATION_BATCH_MAX_POINTS", 20000)
+
+
+def _parse_timestamp(raw) -> Optional[datetime]:
+    if isinstance(raw, datetime):
+        ts = raw
+    else:
+        raw = str(raw)
+        try:
+            ts = datetime.fromisoformat(raw)
+        except ValueError:
+            # Python 3.10-da "Z" sonluğu və s. — Django parser-i
+            ts = parse_datetime(raw)
+    if ts is not None and ts.tzinfo is None:
+        ts = timezone.make_aware(ts)
+    return ts
+
+
+def _optional_float(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _optional_int(value) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _to_float_array(values: List) -> np.ndarray:
+    """Sürətli yol bütöv massiv; uğursuz olsa element-element (səhvlər NaN olur)"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def validate_points(points_data: List[Dict]) -> PointBatch:
+    """Batch-i sütunlara ayır və yoxla; səhvli sətirlər errors-a düşür, qalanlar qəbul olunur"""
+    n = len(points_data)
+    errors: List[Dict] = []
+    lat_raw = [None] * n
+    lng_raw = [None] * n
+    ts_raw = [None] * n
+    ok = np.ones(n, dtype=bool)
+
+    for idx, p in enumerate(points_data):
+        if not isinstance(p, dict):
+            ok[idx] = False
+            errors.append({"index": idx, "error": "Nöqtə obyekt olmalıdır."})
+            continue
+        lat_raw[idx] = p.get("latitude")
+        lng_raw[idx] = p.get("longitude")
+        ts_raw[idx] = p.get("timestamp")
+        if lat_raw[idx] is None or lng_raw[idx] is None or ts_raw[idx] is None:
+            ok[idx] = False
+            errors.append({"index": idx, "error": "latitude/longitude/timestamp tələb olunur."})
+
+    lat = _to_float_array([v if ok[i] else np.nan for i, v in enumerate(lat_raw)])
+    lng = _to_float_array([v if ok[i] else np.nan for i, v in enumerate(lng_raw)])
+    in_range = np.isfinite(lat) & np.isfinite(lng) & (np.abs(lat) <= 90) & (np.abs(lng) <= 180)
+    for idx in np.flatnonzero(ok & ~in_range):
+        ok[idx] = False
+        errors.append({"index": int(idx), "error": f"Yanlış koordinat: {lat_raw[idx]}, {lng_raw[idx]}"})
+
+    timestamps, accuracy, speed, battery = [], [], [], []
+    for idx in np.flatnonzero(ok):
+        p = points_data[idx]
+        try:
+            ts = _parse_timestamp(ts_raw[idx])
+        except (ValueError, OverflowError):
+            # Formatı düzgün, amma mövcud olmayan tarix (məs. 2025-02-30)
+            ts = None
+        if ts is None:
+            ok[idx] = False
+            errors.append({"index": int(idx), "error": f"Yanlış timestamp: {ts_raw[idx]}"})
+            continue
+        try:
+            extras = (
+                _optional_float(p.get("accuracy")),
+                _optional_float(p.get("speed")),
+                _optional_int(p.get("battery_level")),
+            )
+        except (TypeError, ValueError) as e:
+            ok[idx] = False
+            errors.append({"index": int(idx), "error": str(e)})
+            continue
+        if extras[2] is not None and not BATTERY_RANGE[0] <= extras[2] <= BATTERY_RANGE[1]:
+            ok[idx] = False
+            errors.append({"index": int(idx), "error": f"Yanlış battery_level: {extras[2]} (0-100)"})
+            continue
+        timestamps.append(ts)
+        accuracy.append(extras[0])
+        speed.append(extras[1])
+        battery.append(extras[2])
+
+    errors.sort(key=lambda e: e["index"])
+    return PointBatch(
+        latitude=lat[ok],
+        longitude=lng[ok],
+        timestamps=timestamps,
+        accuracy=accuracy,
+        speed=speed,
+        battery_level=battery,
+        errors=errors,
+    )
+
+
+def _copy_rows(batch: PointBatch, route_id: int, is_online: bool) -> io.StringIO:
+    """COPY text formatı: tab ilə ayrılmış, NULL = \\N"""
+    def cell(value):
+        return "\\N" if value is None else str(value)
+
+    online = "t" if is_online else "f"
+    buffer = io.StringIO()
+    write = buffer.write
+    for i, ts in enumerate(batch.timestamps):
+        write(
+            f"{route_id}\t{batch.latitude[i]:.6f}\t{batch.longitude[i]:.6f}\t{ts.isoformat()}\t"
+            f"{cell(batch.accuracy[i])}\t{cell(batch.speed[i])}\t{cell(batch.battery_level[i])}\t{online}\n"
+        )
+    buffer.seek(0)
+    return buffer
+
+
+COPY_STAGING_TABLE = "tracking_locationpoint_ingest"
+COPY_COLUMNS = ("route", "latitude", "longitude", "timestamp", "accuracy", "speed", "battery_level", "is_online")
+
+
+def _copy_points(route, batch: PointBatch, is_online: bool) -> List[datetime]:
+    """COPY müvəqqəti cədvələ, sonra ON CONFLICT DO NOTHING ilə əsas cədvələ — yazılan nöqtələrin vaxtları"""
+    from .models import LocationPoint
+
+    meta = LocationPoint._meta
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    staging = quote(COPY_STAGING_TABLE)
+    columns = ", ".join(quote(meta.get_field(name).column) for name in COPY_COLUMNS)
+    conflict = ", ".join(quote(meta.get_field(name).column) for name in ("route", "timestamp"))
+
+    buffer = _copy_rows(batch, route.id, is_online)
+    with connection.cursor() as cursor:
+        # Sessiya üzrə bir dəfə yaranır; constraint-siz, yalnız lazımi sütunlar
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        cursor.execute(f"TRUNCATE {staging}")
+        copy_sql = f"COPY {staging} ({columns}) FROM STDIN"
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(copy_sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+            f"ON CONFLICT ({conflict}) DO NOTHING RETURNING {quote(meta.get_field('timestamp').column)}"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _bulk_create_points(route, batch: PointBatch, is_online: bool) -> List[datetime]:
+    """Yazılan nöqtələrin vaxtları — paralel sorğunun artıq yazdığı nöqtələr daxil deyil"""
+    from .models import LocationPoint
+
+    # Artıq yazılmış vaxtlar (təkrar göndəriş) — batch-in vaxt aralığında bir sorğu
+    existing = LocationPoint.objects.filter(
+        route=route,
+        timestamp__gte=min(batch.timestamps),
+        timestamp__lte=max(batch.timestamps),
+    ).values_list("timestamp", flat=True)
+    batch = batch.unique_by_timestamp(exclude=existing)
+
+    coordinate = PointBatch.coordinate
+    points = [
+        LocationPoint(
+            route=route,
+            latitude=coordinate(batch.latitude[i]),
+            longitude=coordinate(batch.longitude[i]),
+            timestamp=batch.timestamps[i],
+            accuracy=batch.accuracy[i],
+            speed=batch.speed[i],
+            battery_level=batch.battery_level[i],
+            is_online=is_online,
+        )
+        for i in range(len(batch))
+    ]
+    created = []
+    for start in range(0, len(points), BULK_CREATE_CHUNK):
+        chunk = points[start:start + BULK_CREATE_CHUNK]
+        try:
+            with transaction.atomic():
+                LocationPoint.objects.bulk_create(chunk)
+        except IntegrityError:
+            # Paralel sorğu eyni nöqtəni yoxlamadan sonra yazıb (nadir) — sətir-sətir,
+            # konflikt olanlar "created"-ə düşmür (dashboard/aktivlik sayğacları artıq saymasın)
+            for point in chunk:
+                try:
+                    with transaction.atomic():
+                        point.save(force_insert=True)
+                except IntegrityError:
+                    continue
+                created.append(point.timestamp)
+            continue
+        created.extend(point.timestamp for point in chunk)
+    return created
+
+
+def insert_points(route, batch: PointBatch, is_online: bool = False) -> int:
+    """Yoxlanılmış batch-i yaz və yeni yazılan nöqtə sayını qaytar (təkrarlar sayılmır)"""
+    if not len(batch):
+        return 0
+    batch = batch.unique_by_timestamp()
+    if connection.vendor == "postgresql" and getattr(settings, "LOCATION_BATCH_USE_COPY", True):
+        created = _copy_points(route, batch, is_online)
+    else:
+        created = _bulk_create_points(route, batch, is_online)
+
+    from . import compact_points, dashboard_counters, user_activity
+    if compact_points.dual_write_enabled():
+        compact_points.insert_batch(route, batch, is_online)
+    dashboard_counters.record_points(created)
+    user_activity.record_points(route, created)
+    return len(created)
@@ -0,0 +1,269 @@
+"""
+Location Ingest Queue
+POST /api/locations/ üçün write-behind rejimi (settings.LOCATION_INGEST_MODE = "queue").
+
+Sorğu nöqtəni DB-yə yazmır — aktiv route-u (sync rejimdəki kimi) tapır, yerli
+jurnal faylına route id ilə bir JSON sətri əlavə edir və 202 qaytarır.
+drain_location_queue worker-i jurnalları oxuyub nöqtələri multi-row insert ilə
+yazır, hər route üçün bir dəfə Route/LastLocation yeniləyir. Route drain-dən
+əvvəl dayandırılsa da nöqtələr həmin route-a yazılır.
+
+Jurnal:
+- hər process öz faylına yazır: <pid>-<bucket>.jsonl, bucket = time // ROTATE_SECONDS
+  (bucket dəyişəndə yeni fayl açılır — bağlanmış fayllara heç kim yazmır)
+- worker yalnız bir bucket əvvəl bitmiş bucket-ləri (< current - 1) götürür: bucket
+  lock altında hesablanır, amma yazı sərhəddə bir az gecikə bilər — bir bucket
+  (ROTATE_SECONDS) ehtiyat olmasa, artıq götürülüb oxunmuş fayla yazılan sətir itərdi
+- faylı *.draining adına rename edir (atomik — iki worker eyni faylı götürə bilməz),
+  emal edib silir
+- DB yazısı ilə faylın silinməsi arasında çöküş olarsa fayl yenidən emal olunur;
+  (route, timestamp) unikal olduğu üçün təkrar yazı olmur
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".jsonl"
+CLAIMED_SUFFIX = ".draining"
+STALE_CLAIM_SECONDS = 300
+
+
+def enabled() -> bool:
+    return getattr(settings, "LOCATION_INGEST_MODE", "sync") == "queue"
+
+
+def queue_dir() -> Path:
+    path = Path(getattr(settings, "LOCATION_QUEUE_DIR", Path(settings.BASE_DIR) / "var" / "location-queue"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def rotate_seconds() -> float:
+    return float(getattr(settings, "LOCATION_QUEUE_ROTATE_SECONDS", 2))
+
+
+class JournalWriter:
+    """Process daxilində tək writer (thread-safe); fayl bucket dəyişəndə fırlanır"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file = None
+        self._bucket = None
+        self._pid = None
+
+    def append(self, entry: Dict) -> None:
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            # Lock altında — gözləyən thread köhnə bucket-in faylını yenidən açmasın
+            bucket = int(time.time() // rotate_seconds())
+            pid = os.getpid()
+            if self._file is None or bucket != self._bucket or pid != self._pid:
+                # Yeni bucket və ya fork olunmuş worker — yeni fayl
+                self._close()
+                path = queue_dir() / f"{pid}-{bucket}{JOURNAL_SUFFIX}"
+                self._file = open(path, "a", encoding="utf-8")
+                self._bucket = bucket
+                self._pid = pid
+            self._file.write(line)
+            self._file.flush()
+            if getattr(settings, "LOCATION_QUEUE_FSYNC", False):
+                os.fsync(self._file.fileno())
+
+    def _close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+
+_writer = JournalWriter()
+
+
+def enqueue(user_id: int, data: Dict, received_at: float = None) -> None:
+    """Yoxlanılmış nöqtəni (data["route"] — LocationInputSerializer) jurnala əlavə et"""
+    _writer.append({
+        "u": user_id,
+        "r": data["route"].id,
+        "lat": str(data["latitude"]),
+        "lng": str(data["longitude"]),
+        "ts": data["timestamp"].isoformat(),
+        "acc": data.get("accuracy"),
+        "spd": data.get("speed"),
+        "bat": data.get("battery_level"),
+        "on": data.get("is_online", True),
+        "rt": received_at if received_at is not None else time.time(),
+    })
+
+
+def _ready_files(directory: Path) -> List[Path]:
+    """Bitmiş bucket-lərin faylları (bir bucket ehtiyatla) + köhnəlmiş (çökmüş worker-in) claim-ləri"""
+    current = int(time.time() // rotate_seconds())
+    now = time.time()
+    ready = []
+    for path in directory.iterdir():
+        name = path.name
+        if name.endswith(JOURNAL_SUFFIX):
+            try:
+                bucket = int(name[:-len(JOURNAL_SUFFIX)].split("-")[1])
+            except (IndexError, ValueError):
+                continue
+            if bucket < current - 1:
+                ready.append(path)
+        elif name.endswith(CLAIMED_SUFFIX):
+            try:
+                if now - path.stat().st_mtime > STALE_CLAIM_SECONDS:
+                    ready.append(path)
+            except FileNotFoundError:
+                continue
+    return sorted(ready, key=lambda p: p.name)
+
+
+def _claim(path: Path) -> Path:
+    """Faylı bu worker üçün götür; başqası artıq götürübsə None"""
+    base = path.name.split(JOURNAL_SUFFIX)[0]
+    claimed = path.with_name(f"{base}{JOURNAL_SUFFIX}.{os.getpid()}-{time.time_ns()}{CLAIMED_SUFFIX}")
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+
+def _read_entries(path: Path) -> List[Dict]:
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Yarımçıq sətir (yazı zamanı çöküş) — atılır
+                logger.warning(f"[INGEST_QUEUE] Corrupt line {path.name}:{line_no}")
+    return entries
+
+
+def _subset(batch, entries: List[Dict], indices: List[int]):
+    """entries ilə eyni sırada olan batch-dən verilmiş sətirlər"""
+    return batch if len(indices) == len(entries) else batch.subset(indices)
+
+
+def write_entries(entries: List[Dict]) -> Dict[str, int]:
+    """Jurnal qeydlərini DB-yə yaz: hər route üçün bir multi-row insert və bir Route update"""
+    from datetime import datetime, timezone as dt_timezone
+
+    from django.db import transaction
+
+    from .ingest import insert_points, validate_points
+    from .live_feed import publish_location
+    from .models import LastLocation, Route
+    from .route_analytics import safe_update_route_stats
+
+    # Köhnə jurnal sətirlərində route id yoxdur — user-in son başladılan route-u
+    # (BatchLocationView kimi); bir sorğu
+    legacy_users = {entry["u"] for entry in entries if not entry.get("r")}
+    user_routes = {}
+    if legacy_users:
+        for route in Route.objects.filter(user_id__in=legacy_users).order_by("start_time"):
+            user_routes[route.user_id] = route.id
+
+    by_route = defaultdict(list)
+    for entry in entries:
+        by_route[entry.get("r") or user_routes.get(entry["u"])].append(entry)
+    unresolved = by_route.pop(None, [])
+    routes = Route.objects.in_bulk(list(by_route))
+
+    result = {"points": len(entries), "created": 0, "dropped": len(unresolved), "routes": 0}
+    if unresolved:
+        logger.warning(f"[INGEST_QUEUE] Route tapılmadı, {len(unresolved)} nöqtə atıldı")
+    for route_id, user_entries in by_route.items():
+        route = routes.get(route_id)
+        if route is None:
+            result["dropped"] += len(user_entries)
+            logger.warning(f"[INGEST_QUEUE] Route {route_id} silinib, {len(user_entries)} nöqtə atıldı")
+            continue
+
+        batch = validate_points([
+            {
+                "latitude": e["lat"], "longitude": e["lng"], "timestamp": e["ts"],
+                "accuracy": e.get("acc"), "speed": e.get("spd"), "battery_level": e.get("bat"),
+            }
+            for e in user_entries
+        ])
+        if batch.errors:
+            bad = {error["index"] for error in batch.errors}
+            result["dropped"] += len(bad)
+            user_entries = [e for k, e in enumerate(user_entries) if k not in bad]
+        if not len(batch):
+            continue
+
+        last_entry = max(user_entries, key=lambda e: e["rt"])
+        i = batch.newest_index
+        newest_ts = batch.timestamps[i]
+        newest_lat = batch.coordinate(batch.latitude[i])
+        newest_lng = batch.coordinate(batch.longitude[i])
+
+        with transaction.atomic():
+            created = 0
+            for online in (True, False):
+                part = [k for k, e in enumerate(user_entries) if bool(e.get("on", True)) is online]
+                if part:
+                    created += insert_points(route, _subset(batch, user_entries, part), is_online=online)
+            fields = []
+            if route.end_time is None:
+                # Dayandırılmış route-un canlılıq sahələrinə toxunulmur
+                route.last_ping = datetime.fromtimestamp(last_entry["rt"], tz=dt_timezone.utc)
+                route.is_online = bool(last_entry.get("on", True))
+                fields += ["last_ping", "is_online"]
+            if not route.last_location_time or newest_ts > route.last_location_time:
+                route.last_location_time = newest_ts
+                fields.append("last_location_time")
+            if fields:
+                route.save(update_fields=fields)
+            LastLocation.record(route, newest_lat, newest_lng, newest_ts, batch.battery_level[i])
+
+        result["created"] += created
+        result["routes"] += 1
+        if created:
+            safe_update_route_stats(route, oldest=batch.oldest_timestamp)
+        publish_location(route, newest_lat, newest_lng, batch.battery_level[i])
+    return result
+
+
+def drain(max_files: int = None) -> Dict[str, int]:
+    """Hazır jurnalları emal et; fayl yalnız DB yazısı uğurlu olduqdan sonra silinir"""
+    directory = queue_dir()
+    totals = {"files": 0, "points": 0, "created": 0, "dropped": 0, "routes": 0}
+    for path in _ready_files(directory):
+        if max_files is not None and totals["files"] >= max_files:
+            break
+        claimed = _claim(path)
+        if claimed is None:
+            continue
+        try:
+            result = write_entries(_read_entries(claimed))
+        except Exception:
+            # DB xətası — fayl növbəti dövrədə yenidən emal olunsun
+            os.rename(claimed, path.with_name(claimed.name.split(JOURNAL_SUFFIX)[0] + JOURNAL_SUFFIX))
+            raise
+        os.remove(claimed)
+        totals["files"] += 1
+        for key, value in result.items():
+            totals[key] += value
+    return totals
+
+
+def pending_files() -> int:
+    return sum(1 for p in queue_dir().iterdir() if p.name.endswith((JOURNAL_SUFFIX, CLAIMED_SUFFIX)))
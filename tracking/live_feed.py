@@ -0,0 +1,199 @@
+"""
+Live Location Feed
+Konum/heartbeat yeniliklərini dashboard xəritələrinə push edir (Server-Sent Events).
+
+Ingest view-ları (CreateLocationView, BatchLocationView, HeartbeatView) hadisəni
+broker-ə publish edir, hər açıq dashboard isə öz subscription-ından oxuyur.
+Hadisələr yaddaşdakı məlumatdan qurulur — dashboard sayı artdıqca DB işi artmır.
+
+Broker settings.LIVE_FEED_BROKER ilə seçilir:
+- LocalBroker: process daxili (tək worker, test/benchmark üçün)
+- CacheBroker: Django cache üzərindən (bir neçə gunicorn worker-i üçün, shared cache lazımdır)
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBroker:
+    """Process daxili broker — hər subscriber üçün ayrıca queue"""
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._queues: List[queue.Queue] = []
+
+    def publish(self, event: Dict) -> None:
+        with self._lock:
+            queues = list(self._queues)
+        for q in queues:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Yavaş dashboard — ən köhnə hadisəni at, yenisini saxla
+                try:
+                    q.get_nowait()
+                    q.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def subscribe(self) -> "LocalSubscription":
+        q = queue.Queue(maxsize=self.max_pending)
+        with self._lock:
+            self._queues.append(q)
+        return LocalSubscription(self, q)
+
+    def _unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            if q in self._queues:
+                self._queues.remove(q)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._queues)
+
+
+class LocalSubscription:
+    def __init__(self, broker: LocalBroker, q: queue.Queue):
+        self._broker = broker
+        self._queue = q
+
+    def get(self, timeout: float) -> List[Dict]:
+        """Gözləyən hadisələri qaytar; yoxdursa timeout qədər gözlə"""
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self) -> None:
+        self._broker._unsubscribe(self._queue)
+
+
+class CacheBroker:
+    """Django cache üzərindən broker — hadisələr ardıcıl nömrə ilə saxlanılır,
+    subscriber-lər yeni nömrələri poll edir. Bütün worker-lər eyni cache-i
+    (Redis/Memcached) görməlidir."""
+
+    SEQ_KEY = "live-feed:seq"
+    EVENT_KEY = "live-feed:event:{}"
+
+    def __init__(self, event_ttl: int = 60, poll_interval: float = 0.5):
+        self.event_ttl = event_ttl
+        self.poll_interval = poll_interval
+
+    def publish(self, event: Dict) -> None:
+        cache.add(self.SEQ_KEY, 0, timeout=None)
+        seq = cache.incr(self.SEQ_KEY)
+        cache.set(self.EVENT_KEY.format(seq), event, timeout=self.event_ttl)
+
+    def subscribe(self) -> "CacheSubscription":
+        return CacheSubscription(self, cache.get(self.SEQ_KEY, 0))
+
+
+class CacheSubscription:
+    def __init__(self, broker: CacheBroker, last_seq: int):
+        self._broker = broker
+        self._last_seq = last_seq
+
+    def get(self, timeout: float) -> List[Dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            seq = cache.get(self._broker.SEQ_KEY, 0)
+            if seq > self._last_seq:
+                keys = [self._broker.EVENT_KEY.format(n) for n in range(self._last_seq + 1, seq + 1)]
+                found = cache.get_many(keys)
+                self._last_seq = seq
+                return [found[k] for k in keys if k in found]
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(self._broker.poll_interval)
+
+    def close(self) -> None:
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Konfiqurasiya olunmuş broker instance-ını al"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "LIVE_FEED_BROKER", "tracking.live_feed.LocalBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def set_broker(broker) -> None:
+    """Broker-i dəyiş (testlər və benchmark üçün in-process stand-in)"""
+    global _broker
+    _broker = broker
+
+
+def _publish(event: Dict) -> None:
+    try:
+        get_broker().publish(event)
+    except Exception as e:
+        # Push kanalı ingest-i heç vaxt sındırmamalıdır
+        logger.warning(f"[LIVE_FEED] Publish error: {e}")
+
+
+def publish_location(route, latitude, longitude, battery_level=None, status="online") -> None:
+    """Yeni konum hadisəsi — LastLocationsView feature formatında (username-siz)"""
+    _publish({
+        "type": "location",
+        "id": route.user_id,
+        "lat": float(latitude),
+        "lng": float(longitude),
+        "status": status,
+        "is_paused": route.is_paused,
+        "battery_level": battery_level if battery_level is not None else route.last_battery_level,
+    })
+
+
+def publish_heartbeat(route) -> None:
+    """Heartbeat hadisəsi — yalnız status/batareya dəyişir, konum yox"""
+    _publish({
+        "type": "heartbeat",
+        "id": route.user_id,
+        "status": "online",
+        "is_paused": route.is_paused,
+        "battery_level": route.last_battery_level,
+    })
+
+
+def event_stream(subscription, max_seconds: float, keepalive: float):
+    """SSE formatında hadisə axını; max_seconds sonra bağlanır (EventSource yenidən qoşulur)"""
+    try:
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + max_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events = subscription.get(timeout=min(keepalive, remaining))
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
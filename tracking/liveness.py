@@ -0,0 +1,149 @@
+"""
+Liveness Tracker
+Heartbeat-lər (hər telefondan ~30 saniyədə bir) tracking_route cədvəlinə hər dəfə
+UPDATE yazmır — son ping vaxtı və batareya cache-də saxlanılır və
+HEARTBEAT_FLUSH_SECONDS-da bir bütün aktiv route-lar üçün bir bulk UPDATE ilə
+DB-yə yazılır (flush).
+
+Oxuyanlar (LastLocationsView, batch publish) Route.connection_status-dan əvvəl
+attach() ilə cache-dəki təzə dəyəri route instance-larına köçürür (siyahı üzrə bir
+get_many) — DB-dəki last_ping flush intervalı qədər geri qala bilər, cavablar isə qalmır.
+
+- HEARTBEAT_FLUSH_SECONDS = 0 — köhnə davranış (hər heartbeat DB-yə yazılır)
+- flush heartbeat sorğularından (interval keçibsə, cache lock ilə bir worker) və
+  ya flush_heartbeats əmrindən çağırılır
+- yalnız shared cache-də (Redis/Memcached) işləyir: process daxili cache
+  (LocMemCache, DummyCache) ilə söndürülür — flush olunmamış ping-lər digər
+  worker-lərə və flush_heartbeats prosesinə görünməzdi
+"""
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .active_routes import LOCAL_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "liveness:{}"
+FLUSH_LOCK_KEY = "liveness:flush-lock"
+# Flush-u gecikmiş entry-lər də offline həddini keçənə qədər yaşasın
+ENTRY_TTL = 3600
+
+
+def flush_seconds() -> float:
+    return float(getattr(settings, "HEARTBEAT_FLUSH_SECONDS", 60))
+
+
+def enabled() -> bool:
+    """Yalnız shared backend-də (worker-lər arası) — bax active_routes.enabled()"""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    return flush_seconds() > 0 and not backend.endswith(LOCAL_BACKENDS)
+
+
+def _to_datetime(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def record(route, battery_level: Optional[int] = None) -> None:
+    """Heartbeat-i cache-ə yaz; route instance-ı da yenilənir (cavab/publish üçün)"""
+    key = CACHE_KEY.format(route.id)
+    previous = cache.get(key) or {}
+    if battery_level is None:
+        battery_level = previous.get("b")
+    cache.set(key, {"p": route.last_ping.timestamp(), "b": battery_level}, timeout=ENTRY_TTL)
+    if battery_level is not None:
+        route.last_battery_level = battery_level
+    route._liveness_attached = True
+    maybe_flush()
+
+
+def attach(routes: Iterable) -> None:
+    """Cache-dəki (DB-dən təzə) ping/batareyanı route instance-larına köçür — bir get_many"""
+    routes = [r for r in routes if r is not None and not getattr(r, "_liveness_attached", False)]
+    if not routes or not enabled():
+        return
+    entries = cache.get_many([CACHE_KEY.format(r.id) for r in routes])
+    for route in routes:
+        route._liveness_attached = True
+        entry = entries.get(CACHE_KEY.format(route.id))
+        if not entry:
+            continue
+        ping = _to_datetime(entry["p"])
+        if route.last_ping is None or ping > route.last_ping:
+            route.last_ping = ping
+            if entry.get("b") is not None:
+                route.last_battery_level = entry["b"]
+
+
+def pings_for(route_ids: Iterable[int]) -> dict:
+    """route_id → cache-dəki son ping (datetime)"""
+    route_ids = list(route_ids)
+    if not route_ids or not enabled():
+        return {}
+    entries = cache.get_many([CACHE_KEY.format(i) for i in route_ids])
+    return {
+        route_id: _to_datetime(entries[CACHE_KEY.format(route_id)]["p"])
+        for route_id in route_ids
+        if CACHE_KEY.format(route_id) in entries
+    }
+
+
+def flush() -> int:
+    """Aktiv route-ların cache-dəki heartbeat-lərini bir UPDATE ilə DB-yə yaz.
+    Yenilənən route sayını qaytarır."""
+    from django.db.models import Case, F, Q, Value, When
+
+    from .models import Route
+
+    rows = list(
+        Route.objects.filter(end_time__isnull=True)
+        .values_list("id", "last_ping", "last_battery_level")
+    )
+    if not rows:
+        return 0
+    entries = cache.get_many([CACHE_KEY.format(route_id) for route_id, _, _ in rows])
+
+    ping_whens, battery_whens, ids = [], [], []
+    for route_id, last_ping, battery in rows:
+        entry = entries.get(CACHE_KEY.format(route_id))
+        if not entry:
+            continue
+        ping = _to_datetime(entry["p"])
+        newer = last_ping is None or ping > last_ping
+        battery_changed = entry.get("b") is not None and entry["b"] != battery
+        if not (newer or battery_changed):
+            continue
+        ids.append(route_id)
+        if newer:
+            # Arada DB-yə daha təzə ping yazılıbsa (konum sorğusu) üzərinə yazılmır
+            ping_whens.append(When(
+                Q(pk=route_id) & (Q(last_ping__isnull=True) | Q(last_ping__lt=ping)),
+                then=Value(ping),
+            ))
+        if battery_changed:
+            battery_whens.append(When(pk=route_id, then=Value(entry["b"])))
+
+    if not ids:
+        return 0
+    updates = {}
+    if ping_whens:
+        updates["last_ping"] = Case(*ping_whens, default=F("last_ping"))
+    if battery_whens:
+        updates["last_battery_level"] = Case(*battery_whens, default=F("last_battery_level"))
+    updated = Route.objects.filter(pk__in=ids).update(**updates)
+    logger.info(f"[LIVENESS] Flushed {updated} route heartbeat(s)")
+    return updated
+
+
+def maybe_flush() -> None:
+    """Son flush-dan HEARTBEAT_FLUSH_SECONDS keçibsə flush et (yalnız lock-u alan worker)"""
+    if not cache.add(FLUSH_LOCK_KEY, time.time(), timeout=flush_seconds()):
+        return
+    try:
+        flush()
+    except Exception as e:
+        logger.error(f"[LIVENESS] Flush failed: {e}")
@@ -0,0 +1,111 @@
+"""
+POST /api/locations/batch/ üçün ingest benchmark-ı (nöqtə/saniyə).
+Köhnə yol (hər nöqtə üçün parse + model instance + bulk_create) ilə yeni yolu
+(sütunlu yoxlama + COPY/bulk_create) eyni batch üzərində müqayisə edir,
+sonra endpoint-i bütöv ölçür.
+
+İstifadə: python manage.py benchmark_batch_ingest --sizes 500 5000 20000
+Bütün məlumatlar transaction daxilində yaradılır və geri alınır.
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+
+from tracking import active_routes
+from tracking.ingest import insert_points, validate_points
+from tracking.models import LocationPoint, Route
+
+
+def legacy_insert(route, points_data):
+    """Əvvəlki BatchLocationView məntiqi (müqayisə üçün)"""
+    created_points = []
+    for p in points_data:
+        ts = parse_datetime(str(p.get('timestamp')))
+        if ts.tzinfo is None:
+            ts = timezone.make_aware(ts)
+        created_points.append(LocationPoint(
+            route=route,
+            latitude=p.get('latitude'),
+            longitude=p.get('longitude'),
+            timestamp=ts,
+            accuracy=p.get('accuracy'),
+            speed=p.get('speed'),
+            is_online=False,
+        ))
+    LocationPoint.objects.bulk_create(created_points, ignore_conflicts=True)
+    return len(created_points)
+
+
+class Command(BaseCommand):
+    help = "Batch konum ingest-i üçün nöqtə/saniyə benchmark-ı (köhnə və yeni yol)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[500, 5000, 20000])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"DB: {connection.vendor}")
+        self.stdout.write(f"{'points':>8} {'legacy/s':>12} {'fast/s':>12} {'speedup':>8} {'endpoint/s':>12}")
+        for size in options["sizes"]:
+            legacy_rate, fast_rate, endpoint_rate = self._run(size)
+            self.stdout.write(
+                f"{size:>8} {legacy_rate:>12,.0f} {fast_rate:>12,.0f} "
+                f"{fast_rate / legacy_rate:>7.1f}x {endpoint_rate:>12,.0f}"
+            )
+
+    def _points(self, size):
+        start = timezone.now() - timedelta(hours=12)
+        return [
+            {
+                "latitude": round(40.4 + i * 1e-5, 6),
+                "longitude": round(49.8 + i * 1e-5, 6),
+                "timestamp": (start + timedelta(seconds=i)).isoformat(),
+                "accuracy": 5.0,
+                "speed": 1.2,
+            }
+            for i in range(size)
+        ]
+
+    def _timed(self, fn):
+        with transaction.atomic():
+            started = time.perf_counter()
+            created = fn()
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return created, elapsed
+
+    def _run(self, size):
+        points = self._points(size)
+        with transaction.atomic():
+            user = User.objects.create(username="__bench_ingest__")
+            route = Route.objects.create(user=user, start_time=timezone.now() - timedelta(days=1))
+            active_routes.remember(route)
+
+            created, legacy_s = self._timed(lambda: legacy_insert(route, points))
+            if created != size:
+                raise CommandError(f"Köhnə yol: {created} != {size}")
+
+            created, fast_s = self._timed(lambda: insert_points(route, validate_points(points)))
+            if created != size:
+                raise CommandError(f"Yeni yol: {created} != {size}")
+
+            client = APIClient(SERVER_NAME="localhost")
+            client.force_authenticate(user=user)
+            with override_settings(LOCATION_BATCH_MAX_POINTS=max(size, 1)):
+                def post():
+                    response = client.post("/api/locations/batch/", {"points": points}, format="json")
+                    if response.status_code != 201:
+                        raise CommandError(f"Endpoint statusu: {response.status_code}")
+                    return response.data["created"]
+                created, endpoint_s = self._timed(post)
+            if created != size:
+                raise CommandError(f"Endpoint: {created} != {size}")
+
+            transaction.set_rollback(True)
+        return size / legacy_s, size / fast_s, size / endpoint_s
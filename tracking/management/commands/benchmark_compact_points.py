@@ -0,0 +1,132 @@
+"""
+LocationPoint (Decimal) vs CompactLocationPoint (int) müqayisəsi:
+sətir ölçüsü, insert sürəti və oxu + JSON serializasiya sürəti.
+
+İstifadə: python manage.py benchmark_compact_points --points 1000000 --routes 100
+Məlumatlar transaction daxilində yaradılır və geri alınır.
+"""
+import json
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from tracking import compact_points
+from tracking.ingest import PointBatch, insert_points
+from tracking.models import CompactLocationPoint, LocationPoint, Route
+
+
+class Command(BaseCommand):
+    help = "Decimal və kompakt nöqtə saxlanmasının ölçü/sürət müqayisəsi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=1_000_000)
+        parser.add_argument("--routes", type=int, default=100)
+
+    def handle(self, *args, **options):
+        n, route_count = options["points"], options["routes"]
+        per_route = max(n // route_count, 1)
+
+        with transaction.atomic(), override_settings(LOCATION_COMPACT_DUAL_WRITE=False):
+            user = User.objects.create(username="__bench_compact__")
+            start = timezone.now() - timedelta(days=2)
+            routes = [Route.objects.create(user=user, start_time=start) for _ in range(route_count)]
+            batches = [self._batch(per_route, start, seed=i) for i in range(route_count)]
+            total = per_route * route_count
+
+            started = time.perf_counter()
+            for route, batch in zip(routes, batches):
+                insert_points(route, batch, is_online=True)
+            decimal_insert = total / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for route, batch in zip(routes, batches):
+                compact_points.insert_batch(route, batch, is_online=True)
+            compact_insert = total / (time.perf_counter() - started)
+
+            decimal_read = total / self._timed(lambda: [self._serialize_decimal(r) for r in routes])
+            compact_read = total / self._timed(lambda: [self._serialize_compact(r) for r in routes])
+
+            decimal_size = self._row_bytes(LocationPoint)
+            compact_size = self._row_bytes(CompactLocationPoint)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{total:,} nöqtə, {route_count} route ({connection.vendor})")
+        self.stdout.write(f"{'':>10} {'bytes/row':>10} {'insert/s':>12} {'read+json/s':>12}")
+        for label, size, insert, read in (
+            ("decimal", decimal_size, decimal_insert, decimal_read),
+            ("compact", compact_size, compact_insert, compact_read),
+        ):
+            size_text = f"{size:.1f}" if size is not None else "-"
+            self.stdout.write(f"{label:>10} {size_text:>10} {insert:>12,.0f} {read:>12,.0f}")
+
+    @staticmethod
+    def _batch(size, start, seed):
+        rng = np.random.default_rng(seed)
+        lat = 40.4 + np.cumsum(rng.normal(0, 5e-5, size))
+        lng = 49.85 + np.cumsum(rng.normal(0, 5e-5, size))
+        # DecimalField ilə eyni dəqiqlik — hər iki cədvəl eyni dəyərləri saxlasın
+        lat, lng = np.round(lat, 6), np.round(lng, 6)
+        return PointBatch(
+            latitude=lat,
+            longitude=lng,
+            timestamps=[start + timedelta(seconds=5 * i) for i in range(size)],
+            accuracy=rng.uniform(3, 30, size).tolist(),
+            speed=rng.uniform(0, 15, size).tolist(),
+            battery_level=rng.integers(10, 100, size).tolist(),
+        )
+
+    @staticmethod
+    def _timed(fn):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _serialize_decimal(route):
+        rows = (
+            LocationPoint.objects.for_route(route)
+            .order_by("timestamp")
+            .values_list("latitude", "longitude", "timestamp")
+        )
+        return json.dumps([[float(lat), float(lng), round(ts.timestamp() * 1000)] for lat, lng, ts in rows])
+
+    @staticmethod
+    def _serialize_compact(route):
+        rows = (
+            CompactLocationPoint.objects.filter(route=route)
+            .order_by("ts_ms")
+            .values_list("lat_e6", "lng_e6", "ts_ms")
+        )
+        data = np.array(list(rows), dtype=np.int64).reshape(-1, 3)
+        scale = CompactLocationPoint.SCALE
+        return json.dumps(list(zip((data[:, 0] / scale).tolist(), (data[:, 1] / scale).tolist(), data[:, 2].tolist())))
+
+    @staticmethod
+    def _row_bytes(model):
+        """Cədvəl + indekslər / sətir sayı (PostgreSQL: pg_total_relation_size, SQLite: dbstat)"""
+        table = model._meta.db_table
+        rows = model.objects.count()
+        if not rows:
+            return None
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            elif connection.vendor == "sqlite":
+                try:
+                    cursor.execute(
+                        "SELECT sum(pgsize) FROM dbstat WHERE name = %s "
+                        "OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                        [table, table],
+                    )
+                except Exception:
+                    return None
+            else:
+                return None
+            size = cursor.fetchone()[0]
+        return size / rows if size else None
@@ -0,0 +1,94 @@
+"""
+/api/movqe-son-json/ (LastLocationsView) benchmark-ı.
+Müxtəlif istifadəçi sayları üçün sorğu sayını və cavab vaxtını ölçür —
+sorğu sayı istifadəçi sayından asılı olmamalıdır.
+
+İstifadə: python manage.py benchmark_last_locations --sizes 10 100 1000 10000
+Bütün test məlumatları transaction daxilində yaradılır və sonda geri alınır.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tracking.models import Route, LocationPoint, LastLocation
+
+
+class Command(BaseCommand):
+    help = "LastLocationsView üçün sorğu sayı/vaxt benchmark-ı (10 → 10 000 istifadəçi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10, 100, 1000, 10000],
+            help="Yoxlanılacaq istifadəçi sayları",
+        )
+
+    def handle(self, *args, **options):
+        results = []
+        for size in options["sizes"]:
+            results.append(self._run(size))
+
+        self.stdout.write("")
+        self.stdout.write(f"{'users':>8} {'queries':>8} {'ms':>10}")
+        for size, queries, elapsed_ms in results:
+            self.stdout.write(f"{size:>8} {queries:>8} {elapsed_ms:>10.1f}")
+
+        query_counts = {queries for _, queries, _ in results}
+        if len(query_counts) != 1:
+            raise CommandError(f"Sorğu sayı sabit deyil: {sorted(query_counts)}")
+        self.stdout.write(self.style.SUCCESS("Sorğu sayı istifadəçi sayından asılı deyil"))
+
+    def _run(self, size):
+        with transaction.atomic():
+            admin = User.objects.create(username="__bench_admin__", is_staff=True)
+            self._seed(size)
+
+            client = APIClient(SERVER_NAME="localhost")
+            client.force_authenticate(user=admin)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.get("/api/movqe-son-json/")
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+            if response.status_code != 200:
+                raise CommandError(f"Gözlənilməz status: {response.status_code}")
+            transaction.set_rollback(True)
+
+        # Auth/session sorğuları da daxil olmaqla view-un bütün sorğuları
+        return size, len(ctx.captured_queries), elapsed_ms
+
+    def _seed(self, size):
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            [User(username=f"__bench_user_{i}__") for i in range(size)],
+            batch_size=1000,
+        )
+        routes = Route.objects.bulk_create(
+            [Route(user=u, start_time=now - timedelta(hours=1), last_ping=now) for u in users],
+            batch_size=1000,
+        )
+        points = []
+        last_locations = []
+        for i, route in enumerate(routes):
+            lat = Decimal("40.400000") + Decimal(i % 1000) / 100000
+            lng = Decimal("49.860000") + Decimal(i // 1000) / 100000
+            for minute in (10, 5, 0):
+                points.append(LocationPoint(
+                    route=route, latitude=lat, longitude=lng,
+                    timestamp=now - timedelta(minutes=minute),
+                ))
+            last_locations.append(LastLocation(
+                user_id=route.user_id, route=route,
+                latitude=lat, longitude=lng, timestamp=now,
+            ))
+        LocationPoint.objects.bulk_create(points, batch_size=2000)
+        LastLocation.objects.bulk_create(last_locations, batch_size=1000)
@@ -0,0 +1,132 @@
+"""
+Canlı xəritə axını (SSE) üçün load test.
+N dashboard açıq olanda U konum/heartbeat yeniliyinin DB xərcini ölçür:
+ingest O(U) sorğu edir, dashboard-lara paylama isə heç bir sorğu etməməlidir
+(10 saniyəlik polling isə hər dashboard üçün hər dəfə bütün istifadəçiləri oxuyur).
+
+İstifadə: python manage.py benchmark_live_feed --dashboards 50 --reps 100 --updates 500
+In-process LocalBroker istifadə olunur; məlumatlar transaction daxilində yaradılıb geri alınır.
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tracking import live_feed
+from tracking.models import Route
+
+
+class Command(BaseCommand):
+    help = "Canlı axın load testi: N dashboard üçün DB işi O(yeniliklər) olmalıdır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dashboards", type=int, default=50)
+        parser.add_argument("--reps", type=int, default=100)
+        parser.add_argument("--updates", type=int, default=500)
+
+    def handle(self, *args, **options):
+        dashboards = options["dashboards"]
+        reps = options["reps"]
+        updates = options["updates"]
+
+        previous_broker = live_feed._broker
+        live_feed.set_broker(live_feed.LocalBroker(max_pending=updates + 10))
+        try:
+            with override_settings(
+                LIVE_FEED_ENABLED=True,
+                LIVE_FEED_STREAM_SECONDS=3600,
+                LIVE_FEED_KEEPALIVE_SECONDS=0.01,
+            ):
+                with transaction.atomic():
+                    result = self._run(dashboards, reps, updates)
+                    transaction.set_rollback(True)
+        finally:
+            live_feed.set_broker(previous_broker)
+
+        ingest_queries, fanout_queries, delivered, ingest_s, fanout_s = result
+        self.stdout.write(f"Dashboards: {dashboards}, reps: {reps}, updates: {updates}")
+        self.stdout.write(
+            f"Ingest:  {ingest_queries} sorğu ({ingest_queries / updates:.1f}/yenilik), {ingest_s:.2f}s"
+        )
+        self.stdout.write(
+            f"Fan-out: {fanout_queries} sorğu, {delivered} hadisə çatdırıldı, {fanout_s:.2f}s"
+        )
+        # Müqayisə: hər dashboard 10 saniyədən bir bütün istifadəçiləri oxuyur
+        self.stdout.write(
+            f"Polling (müqayisə): hər 10s-də {dashboards} sorğu × {reps + 1} sətir = "
+            f"{dashboards * (reps + 1)} sətir"
+        )
+
+        if fanout_queries:
+            raise CommandError("Dashboard-lara paylama DB sorğusu etməməlidir")
+        if delivered != dashboards * updates:
+            raise CommandError(f"Gözlənilən {dashboards * updates} hadisə, çatdırılan {delivered}")
+        self.stdout.write(self.style.SUCCESS("DB işi dashboard sayından asılı deyil"))
+
+    def _run(self, dashboards, reps, updates):
+        now = timezone.now()
+        admin = User.objects.create(username="__bench_admin__", is_staff=True)
+        users = User.objects.bulk_create(
+            [User(username=f"__bench_rep_{i}__") for i in range(reps)]
+        )
+        Route.objects.bulk_create(
+            [Route(user=u, start_time=now - timedelta(hours=1)) for u in users]
+        )
+
+        streams = []
+        for _ in range(dashboards):
+            client = Client(SERVER_NAME="localhost")
+            client.force_login(admin)
+            response = client.get("/api/movqe-son-stream/")
+            if response.status_code != 200:
+                raise CommandError(f"Stream statusu: {response.status_code}")
+            stream = iter(response.streaming_content)
+            next(stream)  # retry: sətri
+            streams.append(stream)
+
+        rep_clients = []
+        for user in users:
+            client = APIClient(SERVER_NAME="localhost")
+            client.force_authenticate(user=user)
+            rep_clients.append(client)
+
+        with CaptureQueriesContext(connection) as ingest_ctx:
+            started = time.perf_counter()
+            for i in range(updates):
+                client = rep_clients[i % reps]
+                if i % 2:
+                    client.post("/api/routes/heartbeat/", {"battery_level": 80}, format="json")
+                else:
+                    client.post("/api/locations/", {
+                        "latitude": "40.400000",
+                        "longitude": f"{49.800000 + i / 100000:.6f}",
+                        "timestamp": (now + timedelta(seconds=i)).isoformat(),
+                    }, format="json")
+            ingest_s = time.perf_counter() - started
+
+        delivered = 0
+        with CaptureQueriesContext(connection) as fanout_ctx:
+            started = time.perf_counter()
+            for stream in streams:
+                received = 0
+                while received < updates:
+                    chunk = next(stream)
+                    chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+                    if chunk.startswith("event:"):
+                        received += 1
+                delivered += received
+            fanout_s = time.perf_counter() - started
+
+        return (
+            len(ingest_ctx.captured_queries),
+            len(fanout_ctx.captured_queries),
+            delivered,
+            ingest_s,
+            fanout_s,
+        )
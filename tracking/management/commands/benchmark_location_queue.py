@@ -0,0 +1,93 @@
+"""
+POST /api/locations/ gecikməsi: sync rejim vs queue (write-behind) rejimi.
+Hər rejimdə N sorğu göndərilir, p50/p95/p99 ölçülür; queue rejimində sonra
+növbə drain olunur və bütün nöqtələrin DB-yə çatdığı yoxlanılır.
+
+İstifadə: python manage.py benchmark_location_queue --requests 1000 --reps 20
+Məlumatlar transaction daxilində yaradılır və geri alınır; jurnal müvəqqəti qovluqdadır.
+"""
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tracking import active_routes, ingest_queue
+from tracking.models import LocationPoint, Route
+
+
+class Command(BaseCommand):
+    help = "Tək nöqtə ingest-i: sync və queue rejimlərinin gecikmə müqayisəsi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--reps", type=int, default=20)
+
+    def handle(self, *args, **options):
+        n, reps = options["requests"], options["reps"]
+        with tempfile.TemporaryDirectory() as queue_dir:
+            with override_settings(LOCATION_QUEUE_DIR=queue_dir, LOCATION_QUEUE_ROTATE_SECONDS=0.5):
+                with transaction.atomic():
+                    sync_ms = self._run("sync", n, reps)
+                    transaction.set_rollback(True)
+                with transaction.atomic():
+                    queue_ms, drain_s, stored = self._run_queue(n, reps)
+                    transaction.set_rollback(True)
+
+        self.stdout.write(f"{'mode':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for mode, latencies in (("sync", sync_ms), ("queue", queue_ms)):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            self.stdout.write(f"{mode:>6} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+        self.stdout.write(f"Drain: {stored} nöqtə {drain_s:.2f}s-də ({stored / drain_s:,.0f} nöqtə/s)")
+        if stored != n:
+            raise CommandError(f"Növbədən {stored}/{n} nöqtə yazıldı")
+
+    def _clients(self, reps):
+        clients = []
+        start = timezone.now() - timedelta(hours=1)
+        for i in range(reps):
+            user = User.objects.create(username=f"__bench_queue_{i}__")
+            active_routes.remember(Route.objects.create(user=user, start_time=start))
+            client = APIClient(SERVER_NAME="localhost")
+            client.force_authenticate(user=user)
+            clients.append(client)
+        return clients
+
+    def _post_all(self, clients, n):
+        base = timezone.now() - timedelta(minutes=30)
+        latencies = []
+        for i in range(n):
+            payload = {
+                "latitude": f"{40.4 + i * 1e-5:.6f}",
+                "longitude": "49.850000",
+                "timestamp": (base + timedelta(seconds=i)).isoformat(),
+                "battery_level": 80,
+            }
+            started = time.perf_counter()
+            response = clients[i % len(clients)].post("/api/locations/", payload, format="json")
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code not in (201, 202):
+                raise CommandError(f"Status: {response.status_code} {response.content[:200]}")
+        return latencies
+
+    def _run(self, mode, n, reps):
+        with override_settings(LOCATION_INGEST_MODE=mode):
+            return self._post_all(self._clients(reps), n)
+
+    def _run_queue(self, n, reps):
+        with override_settings(LOCATION_INGEST_MODE="queue"):
+            clients = self._clients(reps)
+            latencies = self._post_all(clients, n)
+            # Son bucket-in bağlanmasını gözlə (drain bir bucket ehtiyatla götürür)
+            time.sleep(ingest_queue.rotate_seconds() * 3)
+            started = time.perf_counter()
+            ingest_queue.drain()
+            drain_s = time.perf_counter() - started
+            stored = LocationPoint.objects.filter(route__user__username__startswith="__bench_queue_").count()
+        return latencies, drain_s, stored
@@ -0,0 +1,119 @@
+"""
+/api/solvey/doctors/ benchmark-ı: köhnə yol (count() + həkim başına SolveyHospital
+sorğusu) ilə tracking.solvey_directory (bir sorğu + keş) müqayisəsi.
+
+Məlumat default DB-dəki lokal güzgü cədvəllərinə (solvey_mirror_*) transaction
+daxilində yazılır və sonda geri alınır — external DB lazım deyil.
+
+İstifadə: python manage.py benchmark_solvey_doctors --doctors 5000 --hospitals 300
+"""
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from tracking import solvey_directory
+from tracking.models_solvey import SolveyDoctorMirror, SolveyHospitalMirror, SolveyRegionMirror
+
+REGION_ID = 1
+DEGREES = ("VIP", "VIP I", "I", "II", "III", None)
+
+
+def legacy_doctors(region_id, using):
+    """Əvvəlki get_solvey_doctors məntiqi (müqayisə üçün)"""
+    doctors = SolveyDoctorMirror.objects.using(using).all()
+    doctors.count()
+    doctors_before = doctors.count()
+    doctors = doctors.filter(bolge_id=region_id)
+    doctors.count()
+    doctors = doctors.order_by('ad')
+    doctors.count()
+    data = []
+    for d in doctors:
+        hospital_name = ''
+        if d.klinika_id:
+            hospital = SolveyHospitalMirror.objects.using(using).filter(id=d.klinika_id).first()
+            if hospital:
+                hospital_name = hospital.hospital_name or ''
+        vip, degree = solvey_directory.split_degree(d.derece)
+        data.append({'id': d.id, 'name': d.ad or '', 'hospital': hospital_name, 'vip': vip, 'degree': degree})
+    return data, doctors_before
+
+
+class Command(BaseCommand):
+    help = "Solvey həkim kataloqu: köhnə (N+1) və yeni (bir sorğu + keş) yolun müqayisəsi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=5000, help="Bölgədəki həkim sayı")
+        parser.add_argument("--hospitals", type=int, default=300)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Mövcud güzgü məlumatı transaction daxilində silinir və sonda geri qaytarılır
+            for model in (SolveyDoctorMirror, SolveyHospitalMirror, SolveyRegionMirror):
+                model.objects.all().delete()
+            self._seed(options["doctors"], options["hospitals"])
+
+            with CaptureQueriesContext(connection) as legacy_ctx:
+                started = time.perf_counter()
+                legacy, _ = legacy_doctors(REGION_ID, "default")
+                legacy_ms = (time.perf_counter() - started) * 1000
+
+            with override_settings(SOLVEY_DIRECTORY_CACHE_TTL=600):
+                cache.delete(solvey_directory.VERSION_KEY)
+                with CaptureQueriesContext(connection) as cold_ctx:
+                    started = time.perf_counter()
+                    fresh = solvey_directory.get_doctors(region_id=REGION_ID, using="default")
+                    cold_ms = (time.perf_counter() - started) * 1000
+                with CaptureQueriesContext(connection) as warm_ctx:
+                    started = time.perf_counter()
+                    solvey_directory.get_doctors(region_id=REGION_ID, using="default")
+                    warm_ms = (time.perf_counter() - started) * 1000
+                solvey_directory.invalidate()
+            transaction.set_rollback(True)
+
+        mismatched = [
+            old["id"] for old, new in zip(legacy, fresh)
+            if (old["id"], old["hospital"], old["vip"], old["degree"]) != (new["id"], new["hospital"], new["vip"], new["degree"])
+        ]
+        if len(legacy) != len(fresh) or mismatched:
+            raise CommandError(f"Nəticələr fərqlidir: {len(legacy)} / {len(fresh)} həkim, fərqli id-lər: {mismatched[:10]}")
+
+        self.stdout.write(f"{len(fresh)} həkim, {options['hospitals']} klinika ({connection.vendor})")
+        self.stdout.write(f"{'':>10} {'queries':>8} {'ms':>10}")
+        for label, ctx, elapsed in (
+            ("legacy", legacy_ctx, legacy_ms),
+            ("cold", cold_ctx, cold_ms),
+            ("cached", warm_ctx, warm_ms),
+        ):
+            self.stdout.write(f"{label:>10} {len(ctx.captured_queries):>8} {elapsed:>10.1f}")
+        if len(cold_ctx.captured_queries) != 1 or len(warm_ctx.captured_queries):
+            raise CommandError("Kataloq bir sorğu ilə (keşdən — sorğusuz) oxunmalıdır")
+        self.stdout.write(self.style.SUCCESS("Bölgə bir sorğu ilə oxunur, təkrar sorğu keşdən gəlir"))
+
+    @staticmethod
+    def _seed(doctor_count, hospital_count):
+        now = timezone.now()
+        SolveyRegionMirror.objects.bulk_create([
+            SolveyRegionMirror(id=REGION_ID, region_name="Bakı", synced_at=now),
+            SolveyRegionMirror(id=REGION_ID + 1, region_name="Gəncə", synced_at=now),
+        ])
+        SolveyHospitalMirror.objects.bulk_create([
+            SolveyHospitalMirror(id=i, hospital_name=f"Klinika {i}", city_id=i % 10, synced_at=now)
+            for i in range(1, hospital_count + 1)
+        ], batch_size=1000)
+        SolveyDoctorMirror.objects.bulk_create([
+            SolveyDoctorMirror(
+                id=i, ad=f"Həkim {i:05d}", ixtisas="Terapevt", derece=DEGREES[i % len(DEGREES)],
+                number=f" +99450{i:07d} ", bolge_id=REGION_ID if i <= doctor_count else REGION_ID + 1,
+                city_id=i % 10,
+                # Hər 7-ci həkimin klinikası yoxdur, hər 11-cinin klinikası cədvəldə tapılmır
+                klinika_id=None if i % 7 == 0 else (hospital_count + i if i % 11 == 0 else i % hospital_count + 1),
+                previous_debt=i % 50 or None,
+                synced_at=now,
+            )
+            for i in range(1, doctor_count + doctor_count // 5 + 1)
+        ], batch_size=1000)
@@ -0,0 +1,109 @@
+"""
+Dayanacaq aşkarlanması və xəstəxana uyğunlaşdırması üçün benchmark.
+Bütün filo üçün bir günlük sintetik konum axını yaradır (dayanacaqlar məlum
+xəstəxanalarda, aralarında hərəkət, GPS titrəməsi ilə), sonra vaxtı və
+tapılan dayanacaqların dəqiqliyini ölçür.
+
+İstifadə: python manage.py benchmark_stop_detection --reps 200 --hours 10 --max-seconds 5
+DB istifadə olunmur — yalnız alqoritm ölçülür (DB-dən yükləmə bir values_list sorğusudur).
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.stop_detection import (
+    DWELL_MIN_SECONDS,
+    Hospital,
+    HospitalIndex,
+    METERS_PER_DEGREE_LAT,
+    detect_stops_grouped,
+    match_stops,
+)
+
+
+class Command(BaseCommand):
+    help = "Filo miqyasında (bir gün) dayanacaq aşkarlanması + xəstəxana uyğunlaşdırması benchmark-ı"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reps", type=int, default=200)
+        parser.add_argument("--hours", type=float, default=10)
+        parser.add_argument("--interval", type=float, default=10, help="Nöqtələr arası saniyə")
+        parser.add_argument("--hospitals", type=int, default=1000)
+        parser.add_argument("--stops", type=int, default=8, help="Hər nümayəndə üçün dayanacaq")
+        parser.add_argument("--max-seconds", type=float, default=5.0)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        hospitals = self._hospitals(rng, options["hospitals"])
+        route_ids, lat, lng, ts, planted = self._fleet(rng, hospitals, options)
+        self.stdout.write(f"Nöqtələr: {len(ts):,} ({options['reps']} nümayəndə), xəstəxanalar: {len(hospitals)}")
+
+        started = time.perf_counter()
+        stops = detect_stops_grouped(route_ids, lat, lng, ts)
+        detect_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matches = match_stops(stops, HospitalIndex(hospitals))
+        match_s = time.perf_counter() - started
+
+        found = {(stop.route_id, hospital.name) for stop, hospital, _ in matches}
+        hits = len(planted & found)
+        recall = hits / len(planted) if planted else 1.0
+        self.stdout.write(f"Aşkarlama:      {detect_s:.2f}s, {len(stops)} dayanacaq")
+        self.stdout.write(f"Uyğunlaşdırma:  {match_s:.3f}s, {len(matches)} uyğunluq")
+        self.stdout.write(f"Recall: {recall:.1%} ({hits}/{len(planted)}), artıq: {len(found - planted)}")
+
+        total = detect_s + match_s
+        if total > options["max_seconds"]:
+            raise CommandError(f"{total:.2f}s > {options['max_seconds']}s")
+        if recall < 0.95:
+            raise CommandError(f"Recall aşağıdır: {recall:.1%}")
+        self.stdout.write(self.style.SUCCESS(f"Bir günlük filo {total:.2f}s-də emal olundu"))
+
+    def _hospitals(self, rng, count):
+        # Bakı ətrafında ~30×30 km sahə
+        lats = 40.25 + rng.random(count) * 0.27
+        lngs = 49.70 + rng.random(count) * 0.35
+        return [
+            Hospital(name=f"Hospital {i}", latitude=float(lats[i]), longitude=float(lngs[i]), source="schedule")
+            for i in range(count)
+        ]
+
+    def _fleet(self, rng, hospitals, options):
+        interval = options["interval"]
+        n = int(options["hours"] * 3600 / interval)
+        jitter_deg = 10.0 / METERS_PER_DEGREE_LAT
+        dwell_points = int(DWELL_MIN_SECONDS * 2 / interval)  # 10 dəqiqəlik ziyarət
+
+        route_ids, lats, lngs, times, planted = [], [], [], [], set()
+        for rep in range(options["reps"]):
+            picks = rng.choice(len(hospitals), size=options["stops"], replace=False)
+            travel_points = max((n - dwell_points * len(picks)) // (len(picks) + 1), 2)
+            waypoints = [(hospitals[i].latitude, hospitals[i].longitude) for i in picks]
+            lat_parts, lng_parts = [], []
+            position = (40.40, 49.85)
+            for i, target in zip(picks, waypoints):
+                # Hərəkət: əvvəlki nöqtədən xəstəxanaya düz xətt
+                steps = np.linspace(0, 1, travel_points, endpoint=False)
+                lat_parts.append(position[0] + (target[0] - position[0]) * steps)
+                lng_parts.append(position[1] + (target[1] - position[1]) * steps)
+                # Dayanma: xəstəxana ətrafında titrəmə
+                lat_parts.append(target[0] + rng.normal(0, jitter_deg, dwell_points))
+                lng_parts.append(target[1] + rng.normal(0, jitter_deg, dwell_points))
+                planted.add((rep, hospitals[i].name))
+                position = target
+            rep_lat = np.concatenate(lat_parts)
+            rep_lng = np.concatenate(lng_parts)
+            route_ids.append(np.full(len(rep_lat), rep, dtype=np.int64))
+            lats.append(rep_lat)
+            lngs.append(rep_lng)
+            times.append(1_700_000_000 + np.arange(len(rep_lat)) * interval)
+        return (
+            np.concatenate(route_ids),
+            np.concatenate(lats),
+            np.concatenate(lngs),
+            np.concatenate(times).astype(np.float64),
+            planted,
+        )
@@ -0,0 +1,102 @@
+"""
+Admin dashboard-un aktiv route panelləri üçün reqressiya yoxlaması
+(/api/dashboard/ və /api/dashboard/routes/).
+Hər route-da nöqtə sayı artdıqca sorğu sayı və pik yaddaş dəyişməməlidir —
+panel nöqtələri yükləmir, RouteStats.point_count-u oxuyur.
+
+İstifadə: python manage.py check_dashboard_panels --routes 5 --points 0 1000 50000
+Bütün test məlumatları transaction daxilində yaradılır və sonda geri alınır.
+"""
+import time
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tracking.ingest import PointBatch, insert_points
+from tracking.models import Route
+from tracking.route_analytics import update_route_stats
+
+PAGES = ("/api/dashboard/", "/api/dashboard/routes/")
+# Pik yaddaşın kiçik ölçüdən bu qədər çox olmasına icazə var (şablon keşi və s.)
+MEMORY_TOLERANCE_BYTES = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = "Aktiv route panelləri: sorğu sayı və pik yaddaş nöqtə sayından asılı olmamalıdır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routes", type=int, default=5, help="Aktiv route sayı")
+        parser.add_argument(
+            "--points", nargs="+", type=int, default=[0, 1000, 50000],
+            help="Hər route-da nöqtə sayları",
+        )
+
+    def handle(self, *args, **options):
+        results = [self._run(options["routes"], size) for size in options["points"]]
+
+        self.stdout.write("")
+        self.stdout.write(f"{'points/route':>12} {'page':>24} {'queries':>8} {'peak KB':>9} {'ms':>8}")
+        for size, pages in results:
+            for page, queries, peak, elapsed_ms in pages:
+                self.stdout.write(f"{size:>12} {page:>24} {queries:>8} {peak / 1024:>9.0f} {elapsed_ms:>8.1f}")
+
+        baseline = results[0][1]
+        for size, pages in results[1:]:
+            for (page, queries, peak, _), (_, base_queries, base_peak, _) in zip(pages, baseline):
+                if queries != base_queries:
+                    raise CommandError(f"{page}: sorğu sayı {base_queries} → {queries} ({size} nöqtə)")
+                if peak > base_peak + MEMORY_TOLERANCE_BYTES:
+                    raise CommandError(
+                        f"{page}: pik yaddaş {base_peak / 1024:.0f} KB → {peak / 1024:.0f} KB ({size} nöqtə)"
+                    )
+        self.stdout.write(self.style.SUCCESS("Sorğu sayı və yaddaş nöqtə sayından asılı deyil"))
+
+    def _run(self, route_count, size):
+        with transaction.atomic():
+            admin = User.objects.create(username="__bench_dashboard_admin__", is_staff=True)
+            self._seed(route_count, size)
+            client = Client(SERVER_NAME="localhost")
+            client.force_login(admin)
+            # İlk sorğu şablonları və sessiyanı yükləsin — ölçməyə düşməsin
+            for page in PAGES:
+                client.get(page)
+
+            pages = []
+            for page in PAGES:
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(page)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                if response.status_code != 200:
+                    raise CommandError(f"{page}: status {response.status_code}")
+                pages.append((page, len(ctx.captured_queries), peak, elapsed_ms))
+            transaction.set_rollback(True)
+        return size, pages
+
+    @staticmethod
+    def _seed(route_count, size):
+        start = timezone.now() - timedelta(days=1)
+        for i in range(route_count):
+            user = User.objects.create(username=f"__bench_dashboard_{i}__")
+            route = Route.objects.create(user=user, start_time=start)
+            if not size:
+                continue
+            insert_points(route, PointBatch(
+                latitude=40.4 + np.arange(size) * 1e-6,
+                longitude=np.full(size, 49.85),
+                timestamps=[start + timedelta(seconds=s) for s in range(size)],
+                accuracy=[None] * size,
+                speed=[None] * size,
+                battery_level=[None] * size,
+            ))
+            update_route_stats(route, full=True)
@@ -0,0 +1,148 @@
+"""
+Endpoint-lərin SQL sorğu sayı yoxlaması (tracking.query_metrics, QUERY_BUDGETS).
+Hər endpoint iki (və ya daha çox) məlumat ölçüsündə çağırılır:
+- sorğu sayı QUERY_BUDGETS limitindən çox olmamalıdır
+- sorğu sayı məlumat ölçüsü ilə artmamalıdır (N+1)
+External DB (Solvey) endpoint-ləri yalnız DATABASES["external"] konfiqurasiya olunduqda
+və ya SOLVEY_READ_MODE=mirror olduqda yoxlanılır.
+
+İstifadə: python manage.py check_query_budgets --sizes 2 20 [--endpoint last-locations]
+Bütün test məlumatları transaction daxilində yaradılır və sonda geri alınır.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from tracking import query_metrics
+from tracking.db_router import solvey_read_db
+from tracking.ingest import PointBatch, insert_points
+from tracking.models import Medicine, Notification, Route, VisitedDoctor, VisitedPharmacy, VisitedPharmacyItem
+from tracking.route_analytics import update_route_stats
+
+POINTS_PER_ROUTE = 50
+
+# (url adı, kwargs, staff sessiyası ilə, external DB lazımdır)
+ENDPOINTS = (
+    ("last-locations", None, True, False),
+    ("routes-list", None, False, False),
+    ("routes-summary", None, False, False),
+    ("route-points", "route", False, False),
+    ("user-dashboard", None, False, False),
+    ("get-visited-doctors", None, False, False),
+    ("get-visited-pharmacies", None, False, False),
+    ("notification-list", None, False, False),
+    ("dashboard_home", None, True, False),
+    ("dashboard_users", None, True, False),
+    ("dashboard_routes", None, True, False),
+    ("solvey-doctors", None, False, True),
+    ("get-medicines", None, False, True),
+)
+
+
+class Command(BaseCommand):
+    help = "Endpoint-lərin SQL sorğu sayı QUERY_BUDGETS daxilində və məlumat ölçüsündən asılı olmamalıdır"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[2, 20],
+            help="İstifadəçi / route / ziyarət sayları",
+        )
+        parser.add_argument("--endpoint", action="append", default=None, help="Yalnız bu url adı (təkrarlana bilər)")
+
+    def handle(self, *args, **options):
+        endpoints = [e for e in ENDPOINTS if not options["endpoint"] or e[0] in options["endpoint"]]
+        has_external = "external" in settings.DATABASES or solvey_read_db() == "default"
+        skipped = [name for name, _, _, external in endpoints if external and not has_external]
+        endpoints = [e for e in endpoints if e[0] not in skipped]
+
+        sizes = sorted(options["sizes"])
+        results = {size: self._run(size, endpoints) for size in sizes}
+
+        self.stdout.write("")
+        self.stdout.write(f"{'endpoint':>24} {'size':>6} {'status':>6} {'queries':>8} {'budget':>7} {'db ms':>8} {'ms':>8} {'bytes':>9}")
+        failures = []
+        for name, *_ in endpoints:
+            budget = settings.QUERY_BUDGETS.get(name)
+            for size in sizes:
+                status_code, queries, db_ms, total_ms, size_bytes = results[size][name]
+                budget_text = budget if budget is not None else "-"
+                self.stdout.write(
+                    f"{name:>24} {size:>6} {status_code:>6} {queries:>8} {budget_text:>7} "
+                    f"{db_ms:>8.1f} {total_ms:>8.1f} {size_bytes:>9}"
+                )
+                if not (200 <= status_code < 300 or status_code == 304):
+                    # Xəta cavabının sorğu sayı endpoint haqqında heç nə demir
+                    failures.append(f"{name}: status {status_code} (ölçü {size})")
+                if budget is not None and queries > budget:
+                    failures.append(f"{name}: {queries} sorğu, limit {budget} (ölçü {size})")
+            smallest, largest = results[sizes[0]][name][1], results[sizes[-1]][name][1]
+            if largest > smallest:
+                failures.append(f"{name}: sorğu sayı ölçü ilə artır {smallest} → {largest} (N+1)")
+
+        for name in skipped:
+            self.stdout.write(self.style.WARNING(f"{name}: external DB konfiqurasiya olunmayıb — atlandı"))
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Bütün endpoint-lər sorğu limiti daxilindədir"))
+
+    def _run(self, size, endpoints):
+        results = {}
+        with transaction.atomic():
+            rep, admin, route = self._seed(size)
+            rep_client, admin_client = Client(SERVER_NAME="localhost"), Client(SERVER_NAME="localhost")
+            rep_client.force_login(rep)
+            admin_client.force_login(admin)
+
+            for name, kwargs, as_staff, _ in endpoints:
+                path = reverse(name, kwargs={"pk": route.id} if kwargs == "route" else None)
+                client = admin_client if as_staff else rep_client
+                # İlk çağırış sessiya/şablon keşlərini doldursun — ölçməyə düşməsin
+                client.get(path)
+                with query_metrics.capture() as collector:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    total_ms = (time.perf_counter() - started) * 1000
+                size_bytes = 0 if response.streaming else len(response.content)
+                results[resolve(path).url_name] = (
+                    response.status_code, collector.count, collector.seconds * 1000, total_ms, size_bytes,
+                )
+            transaction.set_rollback(True)
+        return results
+
+    @staticmethod
+    def _seed(size):
+        now = timezone.now()
+        rep = User.objects.create(username="__bench_budget_rep__")
+        admin = User.objects.create(username="__bench_budget_admin__", is_staff=True)
+        medicine = Medicine.objects.create(name="__bench_budget_medicine__", annotation="-")
+
+        rep_route = None
+        for i in range(size):
+            other = User.objects.create(username=f"__bench_budget_{i}__")
+            for owner in (rep, other):
+                start = now - timedelta(hours=i + 1)
+                route = Route.objects.create(user=owner, start_time=start, is_online=True, last_ping=now)
+                insert_points(route, PointBatch(
+                    latitude=40.4 + np.arange(POINTS_PER_ROUTE) * 1e-5,
+                    longitude=np.full(POINTS_PER_ROUTE, 49.85),
+                    timestamps=[start + timedelta(seconds=10 * s) for s in range(POINTS_PER_ROUTE)],
+                    accuracy=[None] * POINTS_PER_ROUTE,
+                    speed=[None] * POINTS_PER_ROUTE,
+                    battery_level=[None] * POINTS_PER_ROUTE,
+                ))
+                update_route_stats(route, full=True)
+                if owner is rep:
+                    rep_route = route
+            VisitedDoctor.objects.create(user=rep, doctor_id=i, doctor_name=f"Doctor {i}")
+            Notification.objects.create(user=rep, title=f"Notification {i}", message="-")
+            pharmacy = VisitedPharmacy.objects.create(user=rep, pharmacy_name=f"Aptek {i}", visit_type="sale")
+            VisitedPharmacyItem.objects.create(visited_pharmacy=pharmacy, medicine=medicine, quantity=i + 1)
+        return rep, admin, rep_route
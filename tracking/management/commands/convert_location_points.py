@@ -0,0 +1,48 @@
+"""
+LocationPoint → CompactLocationPoint köçürməsi (tracking.compact_points).
+id üzrə keyset ilə hissə-hissə oxunur; artıq köçürülmüş nöqtələr (route, ts_ms) atlanır —
+əmr istənilən vaxt yenidən işlədilə bilər.
+
+İstifadə: python manage.py convert_location_points [--route 12] [--batch-size 20000]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracking import compact_points
+from tracking.models import CompactLocationPoint, LocationPoint
+
+
+class Command(BaseCommand):
+    help = "Mövcud LocationPoint-ləri kompakt cədvələ köçürür"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--route", type=int, default=None, help="Yalnız bu route")
+        parser.add_argument("--batch-size", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        queryset = LocationPoint.objects.order_by("id")
+        if options["route"]:
+            queryset = queryset.filter(route_id=options["route"])
+
+        started = time.perf_counter()
+        last_id, total = 0, 0
+        while True:
+            rows = list(
+                queryset.filter(id__gt=last_id)
+                .values_list("id", *compact_points.CONVERT_FIELDS)[:options["batch_size"]]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            compact_points.bulk_insert(compact_points.convert_rows(row[1:] for row in rows))
+            total += len(rows)
+            self.stdout.write(f"{total} nöqtə oxundu (id ≤ {last_id})")
+
+        compact = CompactLocationPoint.objects.all()
+        if options["route"]:
+            compact = compact.filter(route_id=options["route"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} nöqtə {elapsed:.1f}s-də yoxlanıldı; kompakt cədvəldə {compact.count()} nöqtə"
+        ))
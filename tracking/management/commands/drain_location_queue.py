@@ -0,0 +1,40 @@
+"""
+Konum növbəsini (LOCATION_INGEST_MODE=queue) DB-yə yaz.
+Worker kimi daimi işləyir: python manage.py drain_location_queue --loop
+Bir dəfəlik (cron/deploy zamanı qalıqları yazmaq üçün): python manage.py drain_location_queue
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tracking import ingest_queue
+
+
+class Command(BaseCommand):
+    help = "Jurnal fayllarındakı konum nöqtələrini batch-lərlə DB-yə yazır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Dayanmadan işlə")
+        parser.add_argument("--interval", type=float, default=1.0, help="Dövrlər arası saniyə")
+        parser.add_argument("--max-files", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                totals = ingest_queue.drain(max_files=options["max_files"])
+            except Exception as e:
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"[INGEST_QUEUE] Drain error: {e}")
+                totals = None
+
+            if totals and totals["files"]:
+                self.stdout.write(
+                    f"{totals['files']} fayl, {totals['points']} nöqtə: "
+                    f"{totals['created']} yazıldı, {totals['dropped']} atıldı, {totals['routes']} route"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
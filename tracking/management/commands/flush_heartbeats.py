@@ -0,0 +1,43 @@
+"""
+Cache-dəki heartbeat-ləri (tracking.liveness) tracking_route-a yaz.
+Heartbeat sorğuları özləri də HEARTBEAT_FLUSH_SECONDS-da bir flush edir; bu əmr
+heartbeat gəlməyən dövrlər və deploy/restart öncəsi üçündür (shared cache ilə).
+
+Worker kimi: python manage.py flush_heartbeats --loop
+Bir dəfəlik: python manage.py flush_heartbeats
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tracking import liveness
+
+
+class Command(BaseCommand):
+    help = "Flush olunmamış heartbeat-ləri bir bulk UPDATE ilə Route-a yazır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Dayanmadan işlə")
+        parser.add_argument(
+            "--interval", type=float, default=None,
+            help="Dövrlər arası saniyə (default: HEARTBEAT_FLUSH_SECONDS)",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or liveness.flush_seconds() or 60
+        while True:
+            close_old_connections()
+            try:
+                updated = liveness.flush()
+            except Exception as e:
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"[LIVENESS] Flush error: {e}")
+                updated = 0
+
+            if updated or not options["loop"]:
+                self.stdout.write(f"{updated} route yeniləndi")
+            if not options["loop"]:
+                break
+            time.sleep(interval)
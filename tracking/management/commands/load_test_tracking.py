@@ -0,0 +1,341 @@
+"""
+Mobil tracking API-si üçün yük testi.
+N təmsilçi (rep) route başladır, heartbeat, tək və batch konum göndərir, sonda
+route-u bağlayır; M dashboard xəritəni (/api/movqe-son-json/, delta rejimi ilə) və
+route siyahısını sorğulayır. Hər endpoint üçün throughput və p50/p95/p99 çıxarılır.
+
+- default — proses daxilində (django.test.Client, hər worker ayrı thread və DB
+  bağlantısı) konfiqurasiya olunmuş DB-yə qarşı (SQLite və ya lokal PostgreSQL)
+- --url http://127.0.0.1:8000 — işləyən serverə HTTP ilə (eyni DB və SECRET_KEY)
+- --seed-users / --seed-routes / --seed-points — fon məlumatı (tarixi route-lar,
+  nöqtələr, son konumlar) ki, sorğular boş cədvəllərə getməsin
+- --output report.json — nəticəni yaz; --baseline report.json — p95 baseline-dan
+  --max-regression faizindən çox pisləşərsə əmr xəta ilə bitir (deploy-dan əvvəl)
+
+Bütün test istifadəçiləri "__load_" prefiksi ilə yaradılır və sonda silinir (--keep-data istisna).
+SQLite-da proses daxilində sorğular bir lock ilə növbəyə düzülür (tək yazıcı —
+"database is locked" olmasın); gecikmə lock gözləməsiz, yalnız sorğunun öz vaxtıdır.
+
+İstifadə: python manage.py load_test_tracking --reps 20 --dashboards 3 --duration 30
+"""
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tracking.ingest import PointBatch, insert_points
+from tracking.models import LastLocation, Route
+from tracking.route_analytics import update_route_stats
+
+PREFIX = "__load_"
+# Rep iterasiyasında əməliyyatların çəkisi (mobil tətbiqin real nisbətinə yaxın)
+REP_ACTIONS = (("heartbeat", 3), ("location", 6), ("batch", 1))
+
+
+class InProcessTransport:
+    """django.test.Client — şəbəkəsiz, middleware və view-lar tam işləyir"""
+
+    def __init__(self, token, lock=None):
+        from django.test import Client
+        self.client = Client(
+            SERVER_NAME="localhost", HTTP_AUTHORIZATION=f"Bearer {token}", raise_request_exception=False
+        )
+        self.lock = lock
+
+    def request(self, method, path, payload=None):
+        """(status, response, ms) — ms lock gözləməsini daxil etmir"""
+        if self.lock is None:
+            return self._send(method, path, payload)
+        with self.lock:
+            return self._send(method, path, payload)
+
+    def _send(self, method, path, payload):
+        started = time.perf_counter()
+        if method == "GET":
+            response = self.client.get(path, payload or {})
+        else:
+            response = self.client.post(path, json.dumps(payload or {}), content_type="application/json")
+        return response.status_code, response, (time.perf_counter() - started) * 1000
+
+    def close(self):
+        connection.close()
+
+
+class HttpTransport:
+    def __init__(self, token, base_url):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def request(self, method, path, payload=None):
+        url = self.base_url + path
+        started = time.perf_counter()
+        if method == "GET":
+            response = self.session.get(url, params=payload, timeout=30)
+        else:
+            response = self.session.post(url, json=payload or {}, timeout=30)
+        return response.status_code, response, (time.perf_counter() - started) * 1000
+
+    def close(self):
+        self.session.close()
+
+
+class Recorder:
+    """endpoint → [ms, ...] və status sayları (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def call(self, transport, name, method, path, payload=None):
+        started = time.perf_counter()
+        try:
+            status_code, response, elapsed_ms = transport.request(method, path, payload)
+        except Exception:
+            # Şəbəkə xətası / timeout — status 0
+            status_code, response = 0, None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latencies[name].append(elapsed_ms)
+            self.statuses[name][status_code] += 1
+            if not 200 <= status_code < 300:
+                self.errors[name] += 1
+        return status_code, response
+
+    def summary(self, elapsed):
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            data = np.array(values)
+            p50, p95, p99 = np.percentile(data, [50, 95, 99])
+            result[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": len(values) / elapsed,
+                "mean_ms": float(data.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "statuses": {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+        return result
+
+
+class Command(BaseCommand):
+    help = "Tracking API yük testi: N rep + M dashboard, endpoint başına throughput və p50/p95/p99"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reps", type=int, default=20, help="Eyni vaxtda işləyən təmsilçi sayı")
+        parser.add_argument("--dashboards", type=int, default=3, help="Xəritəni sorğulayan dashboard sayı")
+        parser.add_argument("--duration", type=float, default=30, help="Yük müddəti (saniyə)")
+        parser.add_argument("--think-ms", type=float, default=50, help="Rep əməliyyatları arası gözləmə")
+        parser.add_argument("--poll-ms", type=float, default=1000, help="Dashboard sorğuları arası gözləmə")
+        parser.add_argument("--batch-size", type=int, default=200, help="Offline batch-də nöqtə sayı")
+        parser.add_argument("--seed-users", type=int, default=100)
+        parser.add_argument("--seed-routes", type=int, default=3, help="Fon istifadəçisi başına route")
+        parser.add_argument("--seed-points", type=int, default=300, help="Fon route-u başına nöqtə")
+        parser.add_argument("--url", default=None, help="İşləyən server (default — proses daxilində)")
+        parser.add_argument("--seed", type=int, default=1, help="Təsadüfi ədəd generatoru")
+        parser.add_argument("--output", default=None, help="Nəticəni JSON faylına yaz")
+        parser.add_argument("--baseline", default=None, help="Müqayisə üçün əvvəlki JSON nəticə")
+        parser.add_argument("--max-regression", type=float, default=20.0, help="p95 üçün icazə verilən pisləşmə (%%)")
+        parser.add_argument("--keep-data", action="store_true", help="Test istifadəçilərini silmə")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"{PREFIX}* istifadəçiləri artıq var — əvvəlki yük testinin məlumatını silin")
+        self.options = options
+        random.seed(options["seed"])
+        self.db_lock = threading.Lock() if connection.vendor == "sqlite" and not options["url"] else None
+
+        try:
+            started = time.perf_counter()
+            reps, dashboards = self._seed()
+            self.stdout.write(
+                f"Seed: {time.perf_counter() - started:.1f}s "
+                f"({options['seed_users']}×{options['seed_routes']}×{options['seed_points']} fon nöqtəsi, "
+                f"DB: {connection.vendor}, {'HTTP ' + options['url'] if options['url'] else 'proses daxilində'})"
+            )
+            recorder = Recorder()
+            elapsed = self._load(recorder, reps, dashboards)
+        finally:
+            if not options["keep_data"]:
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+        summary = recorder.summary(elapsed)
+        self._print(summary, elapsed)
+        report = {
+            "vendor": connection.vendor,
+            "options": {k: options[k] for k in ("reps", "dashboards", "duration", "think_ms", "batch_size", "url")},
+            "elapsed": elapsed,
+            "endpoints": summary,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+        if options["baseline"]:
+            self._compare(summary, options["baseline"], options["max_regression"])
+
+    def _seed(self):
+        opts = self.options
+        now = timezone.now()
+        rng = np.random.default_rng(opts["seed"])
+        background = User.objects.bulk_create(
+            [User(username=f"{PREFIX}bg_{i}") for i in range(opts["seed_users"])], batch_size=1000
+        )
+        for user in background:
+            lat, lng = 40.35 + rng.uniform(0, 0.1), 49.8 + rng.uniform(0, 0.1)
+            for r in range(opts["seed_routes"]):
+                start = now - timedelta(days=r + 1)
+                route = Route.objects.create(
+                    user=user, start_time=start, end_time=start + timedelta(hours=8), last_ping=start
+                )
+                n = opts["seed_points"]
+                if not n:
+                    continue
+                lats = lat + np.cumsum(rng.normal(0, 5e-5, n))
+                lngs = lng + np.cumsum(rng.normal(0, 5e-5, n))
+                timestamps = [start + timedelta(seconds=10 * s) for s in range(n)]
+                insert_points(route, PointBatch(
+                    latitude=np.round(lats, 6),
+                    longitude=np.round(lngs, 6),
+                    timestamps=timestamps,
+                    accuracy=rng.uniform(3, 30, n).tolist(),
+                    speed=rng.uniform(0, 15, n).tolist(),
+                    battery_level=rng.integers(10, 100, n).tolist(),
+                ))
+                update_route_stats(route, full=True)
+                Route.objects.filter(id=route.id).update(last_location_time=timestamps[-1])
+                if r == 0:
+                    LastLocation.record(route, round(lats[-1], 6), round(lngs[-1], 6), timestamps[-1], 50)
+
+        reps = [User.objects.create(username=f"{PREFIX}rep_{i}") for i in range(opts["reps"])]
+        dashboards = [
+            User.objects.create(username=f"{PREFIX}dashboard_{i}", is_staff=True)
+            for i in range(opts["dashboards"])
+        ]
+        return reps, dashboards
+
+    def _transport(self, user):
+        token = str(RefreshToken.for_user(user).access_token)
+        if self.options["url"]:
+            return HttpTransport(token, self.options["url"])
+        return InProcessTransport(token, self.db_lock)
+
+    def _load(self, recorder, reps, dashboards):
+        deadline = time.perf_counter() + self.options["duration"]
+        threads = [
+            threading.Thread(target=self._rep_worker, args=(recorder, user, deadline, i), daemon=True)
+            for i, user in enumerate(reps)
+        ] + [
+            threading.Thread(target=self._dashboard_worker, args=(recorder, user, deadline), daemon=True)
+            for user in dashboards
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def _rep_worker(self, recorder, user, deadline, index):
+        opts = self.options
+        rng = random.Random(opts["seed"] * 1000 + index)
+        transport = self._transport(user)
+        actions, weights = zip(*REP_ACTIONS)
+        lat, lng = 40.35 + rng.uniform(0, 0.1), 49.8 + rng.uniform(0, 0.1)
+        clock = timezone.now()
+        try:
+            recorder.call(transport, "route-start", "POST", "/api/routes/start/")
+            while time.perf_counter() < deadline:
+                action = rng.choices(actions, weights)[0]
+                if action == "heartbeat":
+                    recorder.call(transport, "route-heartbeat", "POST", "/api/routes/heartbeat/",
+                                  {"battery_level": rng.randint(10, 100)})
+                elif action == "location":
+                    clock += timedelta(seconds=5)
+                    lat, lng = lat + rng.gauss(0, 5e-5), lng + rng.gauss(0, 5e-5)
+                    recorder.call(transport, "location-create", "POST", "/api/locations/", {
+                        "latitude": f"{lat:.6f}", "longitude": f"{lng:.6f}",
+                        "timestamp": clock.isoformat(), "accuracy": rng.uniform(3, 30),
+                        "speed": rng.uniform(0, 15), "battery_level": rng.randint(10, 100),
+                    })
+                else:
+                    points = []
+                    for _ in range(opts["batch_size"]):
+                        clock += timedelta(seconds=5)
+                        lat, lng = lat + rng.gauss(0, 5e-5), lng + rng.gauss(0, 5e-5)
+                        points.append({
+                            "latitude": round(lat, 6), "longitude": round(lng, 6),
+                            "timestamp": clock.isoformat(), "accuracy": rng.uniform(3, 30),
+                            "speed": rng.uniform(0, 15),
+                        })
+                    recorder.call(transport, "location-batch", "POST", "/api/locations/batch/", {"points": points})
+                time.sleep(opts["think_ms"] / 1000)
+            recorder.call(transport, "route-stop", "POST", "/api/routes/stop/")
+        finally:
+            transport.close()
+
+    def _dashboard_worker(self, recorder, user, deadline):
+        transport = self._transport(user)
+        cursor = None
+        polls = 0
+        try:
+            while time.perf_counter() < deadline:
+                # Xəritə: ilk sorğu tam, sonrakılar delta (?since=)
+                status_code, response = recorder.call(
+                    transport, "last-locations" if cursor is None else "last-locations-delta",
+                    "GET", "/api/movqe-son-json/", {"since": cursor} if cursor else None,
+                )
+                if status_code == 200:
+                    cursor = response.headers.get("X-Feed-Cursor") or cursor
+                polls += 1
+                if polls % 5 == 0:
+                    recorder.call(transport, "routes-summary", "GET", "/api/routes/summary/")
+                time.sleep(self.options["poll_ms"] / 1000)
+        finally:
+            transport.close()
+
+    def _print(self, summary, elapsed):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'endpoint':>22} {'requests':>9} {'errors':>7} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        total = 0
+        for name, row in summary.items():
+            total += row["requests"]
+            self.stdout.write(
+                f"{name:>22} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+            )
+            if row["errors"]:
+                self.stdout.write(self.style.WARNING(f"{'':>22} status: {row['statuses']}"))
+        self.stdout.write(f"Cəmi: {total} sorğu, {elapsed:.1f}s, {total / elapsed:.1f} req/s")
+
+    def _compare(self, summary, baseline_path, max_regression):
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)["endpoints"]
+        failures = []
+        for name, row in summary.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]["p95_ms"], row["p95_ms"]
+            change = (after - before) / before * 100 if before else 0
+            self.stdout.write(f"{name:>22} p95 {before:>8.1f} → {after:>8.1f} ms ({change:+.0f}%)")
+            if change > max_regression:
+                failures.append(f"{name}: p95 {before:.1f} → {after:.1f} ms ({change:+.0f}%)")
+        if failures:
+            raise CommandError("p95 reqressiyası:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"p95 baseline-dan {max_regression:.0f}%-dən çox pisləşməyib"))
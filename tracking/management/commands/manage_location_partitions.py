@@ -0,0 +1,56 @@
+"""
+LocationPoint partition-ları və retention (tracking.partitions).
+
+Bir dəfəlik köçürmə (PostgreSQL, texniki fasilədə — cədvəl kilidlənir):
+    python manage.py manage_location_partitions --convert
+Gündəlik cron — növbəti dövrlərin partition-ları + köhnələrin arxivi:
+    python manage.py manage_location_partitions --archive
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking import partitions
+
+
+class Command(BaseCommand):
+    help = "LocationPoint partition-larını yaradır, köhnələrini CSV.gz-yə arxivləyib ayırır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true", help="Cədvəli partition-lı cədvələ köçür")
+        parser.add_argument("--ahead", type=int, default=None, help="Əvvəlcədən yaradılacaq dövr sayı")
+        parser.add_argument("--archive", action="store_true", help="Retention-dan köhnə dövrləri arxivlə")
+        parser.add_argument(
+            "--retention-days", type=int, default=None,
+            help="Default: settings.LOCATION_RETENTION_DAYS (0 — arxiv yoxdur)",
+        )
+        parser.add_argument(
+            "--keep-detached", action="store_true",
+            help="Arxivlənmiş partition-u DROP etmə, yalnız ayır",
+        )
+
+    def handle(self, *args, **options):
+        if partitions.is_supported():
+            if options["convert"]:
+                if partitions.is_partitioned():
+                    self.stdout.write("Cədvəl artıq partition-lıdır")
+                else:
+                    moved = partitions.convert_to_partitioned()
+                    self.stdout.write(self.style.SUCCESS(f"Köçürüldü: {moved} nöqtə"))
+            if partitions.is_partitioned():
+                for name in partitions.ensure_partitions(ahead=options["ahead"]):
+                    self.stdout.write(f"Yaradıldı: {name}")
+            else:
+                self.stdout.write(self.style.WARNING("Cədvəl partition-lı deyil — əvvəlcə --convert işlədin"))
+        elif options["convert"]:
+            raise CommandError("Partition yalnız PostgreSQL-də dəstəklənir")
+
+        if not options["archive"]:
+            return
+        days = options["retention_days"]
+        if (partitions.retention_days() if days is None else days) <= 0:
+            raise CommandError("Retention təyin edilməyib (LOCATION_RETENTION_DAYS və ya --retention-days)")
+        archived = partitions.archive_old_partitions(days=days, keep_detached=options["keep_detached"])
+        for item in archived:
+            self.stdout.write(f"Arxivləndi: {item['name']} ({item['rows']} nöqtə)")
+        if not archived:
+            self.stdout.write("Arxivlənəcək dövr yoxdur")
+        self.stdout.write(f"Arxiv qovluğu: {partitions.archive_dir()}")
@@ -0,0 +1,20 @@
+"""
+Admin ana səhifəsinin sayğaclarını (DashboardCounter) mənbə cədvəllərdən yenidən hesabla.
+Gecədə bir dəfə cron-da işlədilə bilər — siqnalsız dəyişikliklərdən yaranan fərqi düzəldir.
+
+İstifadə: python manage.py rebuild_dashboard_counters [--metric locations --metric routes]
+"""
+from django.core.management.base import BaseCommand
+
+from tracking.dashboard_counters import METRICS, rebuild
+
+
+class Command(BaseCommand):
+    help = "DashboardCounter saatlıq sayğaclarını yenidən hesablayır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--metric", action="append", choices=sorted(METRICS), help="Yalnız bu metrik(lər)")
+
+    def handle(self, *args, **options):
+        for metric, total in rebuild(options["metric"]).items():
+            self.stdout.write(f"{metric}: {total}")
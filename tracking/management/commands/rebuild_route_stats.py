@@ -0,0 +1,55 @@
+"""
+RouteStats-ı sıfırdan hesabla.
+Yeni quraşdırmadan sonra köhnə route-lar üçün bir dəfə, və ya statistika
+parametrləri (route_analytics) dəyişəndə çalışdırılır. Sonda həmin route-ların
+istifadəçiləri üçün UserActivity (point_count RouteStats-dan) yenidən hesablanır.
+
+İstifadə: python manage.py rebuild_route_stats [--route 12 --route 15] [--missing-only]
+"""
+from django.core.management.base import BaseCommand
+
+from tracking.models import Route
+from tracking.route_analytics import update_route_stats
+from tracking.user_activity import rebuild_users
+
+
+class Command(BaseCommand):
+    help = "Route statistikasını (məsafə, hərəkət vaxtı, dayanacaqlar) yenidən hesablayır"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--route",
+            type=int,
+            action="append",
+            dest="route_ids",
+            help="Yalnız bu route(lar)",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Yalnız statistikası olmayan route-lar",
+        )
+
+    def handle(self, *args, **options):
+        routes = Route.objects.order_by("id")
+        if options["route_ids"]:
+            routes = routes.filter(id__in=options["route_ids"])
+        if options["missing_only"]:
+            routes = routes.filter(stats__isnull=True)
+
+        done = 0
+        user_ids = set()
+        for route in routes.iterator():
+            stats = update_route_stats(route, full=True)
+            user_ids.add(route.user_id)
+            done += 1
+            if done % 100 == 0:
+                self.stdout.write(f"{done} route hesablandı...")
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    f"Route {route.id}: {stats.distance_km} km, {stats.stop_count} dayanacaq"
+                )
+        activity = rebuild_users(user_ids) if user_ids else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistika yeniləndi: {done} route, {activity} istifadəçi aktivliyi"
+        ))
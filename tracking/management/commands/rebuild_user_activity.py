@@ -0,0 +1,18 @@
+"""
+UserActivity xülasəsini Route + RouteStats-dan yenidən hesabla.
+İstifadə: python manage.py rebuild_user_activity [--user 12 --user 15]
+"""
+from django.core.management.base import BaseCommand
+
+from tracking.user_activity import rebuild_users
+
+
+class Command(BaseCommand):
+    help = "admin_dashboard_users üçün istifadəçi xülasələrini yenidən hesablayır"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", help="Yalnız bu istifadəçi(lər)")
+
+    def handle(self, *args, **options):
+        count = rebuild_users(options["user"])
+        self.stdout.write(self.style.SUCCESS(f"{count} istifadəçi yeniləndi"))
@@ -0,0 +1,71 @@
+"""
+Solvey arayış cədvəllərini lokal güzgüyə köçür (tracking.solvey_mirror).
+Hər cədvəl üçün full (heç olmayıbsa və ya SOLVEY_MIRROR_FULL_EVERY keçibsə) və ya
+incremental (yeni id-lər) sync avtomatik seçilir — cron-dan tez-tez çağırmaq olar.
+Eyni vaxtda iki sync işləməsin deyə cache lock istifadə olunur.
+
+Cron: */5 * * * * python manage.py sync_solvey_mirror
+Worker kimi: python manage.py sync_solvey_mirror --loop
+Məcburi tam yeniləmə: python manage.py sync_solvey_mirror --full [--table doctors]
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tracking import solvey_mirror
+
+LOCK_KEY = "solvey-mirror:lock"
+LOCK_TTL = 1800
+
+
+class Command(BaseCommand):
+    help = "Solvey bölgə/şəhər/xəstəxana/həkim/dərman cədvəllərini default DB-dəki güzgüyə köçürür"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table", action="append", choices=solvey_mirror.TABLE_NAMES, default=None,
+            help="Yalnız bu cədvəl (təkrarlana bilər)",
+        )
+        parser.add_argument("--full", action="store_true", help="Vəziyyətdən asılı olmayaraq full sync")
+        parser.add_argument("--loop", action="store_true", help="Dayanmadan işlə")
+        parser.add_argument(
+            "--interval", type=float, default=None,
+            help="Dövrlər arası saniyə (default: SOLVEY_MIRROR_INTERVAL)",
+        )
+
+    def handle(self, *args, **options):
+        if "external" not in settings.DATABASES:
+            raise CommandError("External DB konfiqurasiya olunmayıb (USE_EXTERNAL_DB=true)")
+        interval = options["interval"] or float(getattr(settings, "SOLVEY_MIRROR_INTERVAL", 300))
+
+        while True:
+            close_old_connections()
+            if cache.add(LOCK_KEY, 1, LOCK_TTL):
+                try:
+                    results = solvey_mirror.sync(options["table"], full=True if options["full"] else None)
+                finally:
+                    cache.delete(LOCK_KEY)
+                self._report(results, options["loop"])
+            else:
+                self.stderr.write("[SOLVEY_MIRROR] Başqa sync işləyir — atlandı")
+
+            if not options["loop"]:
+                break
+            time.sleep(interval)
+
+    def _report(self, results, loop):
+        failed = []
+        for name, result in results.items():
+            if "error" in result:
+                failed.append(name)
+                self.stderr.write(f"{name}: {result['error']}")
+                continue
+            self.stdout.write(
+                f"{name}: {'full' if result['full'] else 'incremental'}, {result['rows']} sətir, "
+                f"{result['deleted']} silindi ({result['seconds']:.1f}s)"
+            )
+        if failed and not loop:
+            raise CommandError(f"Sync alınmadı: {', '.join(failed)}")
@@ -0,0 +1,188 @@
+"""
+Medicine Catalog
+/api/medicines/ üçün dərman kataloqu (mobil tətbiq hər açılışda yükləyir).
+
+- Solvey dərmanları bir sorğu ilə, lokal Medicine annotasiyaları bir
+  solvey_id__in sorğusu ilə çəkilir (dərman başına Medicine sorğusu yoxdur)
+- hazır cavab JSON bytes və gzip ilə sıxılmış nüsxə kimi Django cache-də
+  MEDICINE_CATALOG_CACHE_TTL saniyə saxlanılır (0 — keş yoxdur); cavab hər
+  sorğuda yenidən serializasiya/sıxılma olunmur
+- keş açarında lokal Medicine cədvəlinin damğası var (Max(updated_at), Count —
+  bir ucuz aggregate sorğusu): hər hansı worker-də saxlanılan/silinən annotasiya
+  bütün worker-lərdə dərhal görünür (LocMemCache per-process olsa belə).
+  QuerySet.update() auto_now-u yeniləmir — bulk dəyişiklikdə updated_at=now()
+  ötürün və ya invalidate() çağırın
+- dərman güzgüsü sync olunanda (ayrıca proses) və Medicine signal-larında
+  invalidate() keş generasiyasını artırır — worker-lərə yalnız shared
+  CACHE_BACKEND (Redis/Memcached) ilə çatır; LocMemCache ilə Solvey tərəfindəki
+  dəyişiklik MEDICINE_CATALOG_CACHE_TTL saniyəyə qədər gecikə bilər
+- cavabdakı "version" məzmun hash-idir (tracking.catalog_versions — ETag/304
+  və ?since_version= delta)
+"""
+import gzip
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "medicine-catalog:g{}:{}:{}"
+GENERATION_KEY = "medicine-catalog:generation"
+SOLVEY_FIELDS = ("id", "med_name", "med_full_name", "med_price", "komissiya", "status")
+ANNOTATION_FIELDS = (
+    "annotation", "active_ingredient", "dosage", "indications", "contraindications",
+    "side_effects", "storage_conditions", "manufacturer", "barcode",
+)
+
+
+def _cache_ttl() -> int:
+    return int(getattr(settings, "MEDICINE_CATALOG_CACHE_TTL", 600))
+
+
+def _generation() -> int:
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def _local_stamp() -> str:
+    """Lokal annotasiyaların damğası — worker-lər arası keş açarı üçün (bir sorğu)"""
+    from django.db.models import Count, Max
+
+    from .models import Medicine
+
+    stamp = Medicine.objects.aggregate(updated=Max("updated_at"), count=Count("id"))
+    updated = stamp["updated"].timestamp() if stamp["updated"] else 0
+    return f"{updated:.6f}-{stamp['count']}"
+
+
+def invalidate() -> None:
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def annotation_data(local_medicine) -> Dict:
+    """Lokal Medicine-dən annotasiya sahələri (yoxdursa boş)"""
+    data = {field: (getattr(local_medicine, field) or "") if local_medicine else "" for field in ANNOTATION_FIELDS}
+    data["image"] = local_medicine.image.url if local_medicine and local_medicine.image else None
+    return data
+
+
+def annotations_by_solvey_id(solvey_ids: Iterable[int]) -> Dict[int, Dict]:
+    """solvey_id → annotasiya — bir sorğu"""
+    from .models import Medicine
+
+    return {
+        medicine.solvey_id: annotation_data(medicine)
+        for medicine in Medicine.objects.filter(solvey_id__in=list(solvey_ids))
+    }
+
+
+def medicine_data(med: Dict, annotation: Optional[Dict] = None) -> Dict:
+    """Solvey sətri + lokal annotasiya → API formatı"""
+    annotation = annotation or annotation_data(None)
+    return {
+        "id": med["id"],
+        "name": med.get("med_name") or "",
+        "name_az": med.get("med_full_name") or med.get("med_name") or "",
+        "price": float(med["med_price"]) if med.get("med_price") else None,
+        "komissiya": float(med["komissiya"]) if med.get("komissiya") else None,
+        "description": med.get("med_full_name") or med.get("med_name") or "",
+        **annotation,
+        "is_active": med.get("status", True),
+    }
+
+
+def load_solvey_medicines(medicine_id: Optional[int] = None) -> Optional[List[Dict]]:
+    """Aktiv Solvey dərmanları (med_name sırası); cədvəl tapılmadıqda None"""
+    from django.db import connections
+
+    from .db_router import solvey_objects, solvey_read_db
+    from .external_service import get_external_schema
+    from .models_solvey import SolveyMedicine
+
+    if solvey_read_db() != "external":
+        # Lokal güzgü (SOLVEY_READ_MODE=mirror, sync_solvey_mirror)
+        medicines = solvey_objects(SolveyMedicine).filter(status=True)
+        if medicine_id is not None:
+            medicines = medicines.filter(id=medicine_id)
+        return list(medicines.order_by("med_name").values(*SOLVEY_FIELDS))
+
+    table = get_external_schema().table("medicines")
+    if not table:
+        return None
+    where, params = "status = true", []
+    if medicine_id is not None:
+        where, params = "id = %s AND status = true", [medicine_id]
+    with connections["external"].cursor() as cursor:
+        cursor.execute(
+            f'SELECT {", ".join(SOLVEY_FIELDS)} FROM "{table}" WHERE {where} ORDER BY med_name',
+            params,
+        )
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def build_catalog(medicines: List[Dict]) -> List[Dict]:
+    annotations = annotations_by_solvey_id(med["id"] for med in medicines)
+    return [medicine_data(med, annotations.get(med["id"])) for med in medicines]
+
+
+def _entry(data: List[Dict], **extra) -> Dict:
+    from .catalog_versions import snapshot
+
+    versions = snapshot("medicines", data)
+    version = versions["version"]
+    body = JSONRenderer().render({"success": True, "version": version, "count": len(data), "data": data, **extra})
+    return {
+        "version": version,
+        "hashes": versions["hashes"],
+        "count": len(data),
+        "data": data,
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+    }
+
+
+def get_catalog() -> Dict:
+    """
+    Hazır kataloq: {"version", "hashes", "count", "data", "body", "gzip"}.
+    Cədvəl tapılmadıqda cavab keşlənmir (schema qısa müddətdən sonra yenidən yoxlanılır).
+    """
+    from .db_router import solvey_read_db
+
+    ttl = _cache_ttl()
+    if ttl > 0:
+        key = CACHE_KEY.format(_generation(), _local_stamp(), solvey_read_db())
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+
+    medicines = load_solvey_medicines()
+    if medicines is None:
+        logger.warning("[SOLVEY_MEDICINES] Medicine table not found")
+        return _entry([], message="Dərmanlar cədvəli tapılmadı")
+
+    entry = _entry(build_catalog(medicines))
+    if ttl > 0:
+        cache.set(key, entry, ttl)
+    logger.info(
+        f"[SOLVEY_MEDICINES] Built catalog {entry['version']}: {entry['count']} medicines, "
+        f"{len(entry['body'])} bytes ({len(entry['gzip'])} gzip)"
+    )
+    return entry
+
+
+def _on_medicine_change(sender, **kwargs):
+    invalidate()
+
+
+def connect_signals() -> None:
+    from .models import Medicine
+
+    post_save.connect(_on_medicine_change, sender=Medicine, dispatch_uid="medicine_catalog_save")
+    post_delete.connect(_on_medicine_change, sender=Medicine, dispatch_uid="medicine_catalog_delete")
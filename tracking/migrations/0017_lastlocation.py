@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_last_locations(apps, schema_editor):
+    Route = apps.get_model('tracking', 'Route')
+    LocationPoint = apps.get_model('tracking', 'LocationPoint')
+    LastLocation = apps.get_model('tracking', 'LastLocation')
+    user_ids = Route.objects.values_list('user_id', flat=True).distinct()
+    rows = []
+    for user_id in user_ids:
+        point = (
+            LocationPoint.objects.filter(route__user_id=user_id)
+            .order_by('-timestamp')
+            .first()
+        )
+        if point:
+            rows.append(LastLocation(
+                user_id=user_id,
+                route_id=point.route_id,
+                latitude=point.latitude,
+                longitude=point.longitude,
+                timestamp=point.timestamp,
+                battery_level=point.battery_level,
+            ))
+    LastLocation.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0016_visitedpharmacyitem_and_alter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LastLocation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='last_location', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('timestamp', models.DateTimeField()),
+                ('battery_level', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('route', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tracking.route')),
+            ],
+            options={
+                'verbose_name': 'Last Location',
+                'verbose_name_plural': 'Last Locations',
+            },
+        ),
+        migrations.RunPython(backfill_last_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_point_counts(apps, schema_editor):
+    """
+    Mövcud route-lar üçün point_count (oxuyanlar stats__point_count istifadə edir).
+    Təkrar (route, timestamp) nöqtələri sayılmır — 0019 onları silir. tail_timestamp
+    boş qalır: məsafə/vaxt növbəti ingest-də və ya rebuild_route_stats ilə tam hesablanır.
+    """
+    LocationPoint = apps.get_model('tracking', 'LocationPoint')
+    RouteStats = apps.get_model('tracking', 'RouteStats')
+    rows = (
+        LocationPoint.objects.values('route_id')
+        .annotate(n=Count('timestamp', distinct=True))
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator():
+        batch.append(RouteStats(route_id=row['route_id'], point_count=row['n']))
+        if len(batch) >= 1000:
+            RouteStats.objects.bulk_create(batch)
+            batch = []
+    RouteStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0017_lastlocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteStats',
+            fields=[
+                ('route', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='tracking.route')),
+                ('point_count', models.IntegerField(default=0)),
+                ('distance_m', models.FloatField(default=0)),
+                ('moving_seconds', models.FloatField(default=0)),
+                ('idle_seconds', models.FloatField(default=0)),
+                ('stop_count', models.IntegerField(default=0)),
+                ('max_speed_kmh', models.FloatField(default=0)),
+                ('speed_histogram', models.JSONField(blank=True, default=list)),
+                ('tail_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('tail_latitude', models.FloatField(blank=True, null=True)),
+                ('tail_longitude', models.FloatField(blank=True, null=True)),
+                ('open_idle_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Route Stats',
+                'verbose_name_plural': 'Route Stats',
+            },
+        ),
+        migrations.RunPython(backfill_point_counts, migrations.RunPython.noop),
+    ]
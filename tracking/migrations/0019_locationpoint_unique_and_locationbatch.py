@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_points(apps, schema_editor):
+    """Eyni (route, timestamp) üçün ən köhnə (ən kiçik id) nöqtə saxlanılır"""
+    LocationPoint = apps.get_model('tracking', 'LocationPoint')
+    duplicates = (
+        LocationPoint.objects.values('route_id', 'timestamp')
+        .annotate(n=Count('id'), keep_id=Min('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    for row in duplicates.iterator():
+        LocationPoint.objects.filter(
+            route_id=row['route_id'], timestamp=row['timestamp']
+        ).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0018_routestats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=64)),
+                ('received', models.IntegerField(default=0)),
+                ('created', models.IntegerField(default=0)),
+                ('duplicates', models.IntegerField(default=0)),
+                ('errors', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Location Batch',
+                'verbose_name_plural': 'Location Batches',
+            },
+        ),
+        migrations.RunPython(remove_duplicate_points, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='locationpoint',
+            constraint=models.UniqueConstraint(fields=('route', 'timestamp'), name='uniq_locationpoint_route_timestamp'),
+        ),
+        migrations.RemoveIndex(
+            model_name='locationpoint',
+            name='tracking_lo_route_i_1939d1_idx',
+        ),
+        migrations.AddField(
+            model_name='locationbatch',
+            name='route',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tracking.route'),
+        ),
+        migrations.AddField(
+            model_name='locationbatch',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_batches', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='locationbatch',
+            constraint=models.UniqueConstraint(fields=('user', 'batch_id'), name='uniq_locationbatch_user_batch'),
+        ),
+    ]
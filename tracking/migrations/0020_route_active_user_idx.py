@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0019_locationpoint_unique_and_locationbatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['user', '-start_time'], name='route_active_user_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0020_route_active_user_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompactLocationPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lat_e6', models.IntegerField()),
+                ('lng_e6', models.IntegerField()),
+                ('ts_ms', models.BigIntegerField()),
+                ('accuracy_m', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('speed_cms', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('battery_level', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_online', models.BooleanField(default=True)),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compact_points', to='tracking.route')),
+            ],
+            options={
+                'verbose_name': 'Compact Location Point',
+                'verbose_name_plural': 'Compact Location Points',
+                'constraints': [models.UniqueConstraint(fields=('route', 'ts_ms'), name='uniq_compactpoint_route_ts')],
+            },
+        ),
+    ]
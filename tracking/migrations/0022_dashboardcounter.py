@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    """Mövcud məlumatlardan ilkin sayğaclar (bir dəfə GROUP BY hər mənbə cədvələ)"""
+    from tracking.dashboard_counters import rebuild
+    rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0021_compactlocationpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('users', 'İstifadəçilər'), ('routes', 'Route-lar'), ('locations', 'Konum nöqtələri'), ('hospital_visits', 'Xəstəxana ziyarətləri'), ('visited_doctors', 'Görülən həkimlər'), ('schedules', 'Ziyarət planları'), ('location_reports', 'Konum hesabatları')], max_length=32)),
+                ('hour', models.DateTimeField()),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Counter',
+                'verbose_name_plural': 'Dashboard Counters',
+                'constraints': [models.UniqueConstraint(fields=('metric', 'hour'), name='uniq_dashboardcounter_metric_hour')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
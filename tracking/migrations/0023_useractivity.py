@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_activity(apps, schema_editor):
+    # point_count RouteStats-dan gəlir — 0018 mövcud route-lar üçün onu doldurur
+    from tracking.user_activity import rebuild_users
+    rebuild_users(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tracking', '0022_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivity',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('route_count', models.IntegerField(default=0)),
+                ('point_count', models.BigIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+                ('has_active_route', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'User Activity',
+                'verbose_name_plural': 'User Activity',
+            },
+        ),
+        migrations.RunPython(populate_activity, migrations.RunPython.noop),
+    ]
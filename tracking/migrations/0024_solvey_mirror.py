@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0023_useractivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolveyMedicineMirror',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('med_name', models.CharField(max_length=250)),
+                ('med_full_name', models.CharField(blank=True, max_length=250, null=True)),
+                ('med_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('komissiya', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.BooleanField(default=True)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'solvey_mirror_medicines',
+            },
+        ),
+        migrations.CreateModel(
+            name='SolveyMirrorState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, unique=True)),
+                ('last_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('row_count', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SolveyRegionMirror',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('region_name', models.CharField(max_length=255)),
+                ('region_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'solvey_mirror_regions',
+            },
+        ),
+        migrations.CreateModel(
+            name='SolveyCityMirror',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('city_name', models.CharField(max_length=255)),
+                ('region_id', models.IntegerField()),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'solvey_mirror_cities',
+                'indexes': [models.Index(fields=['region_id', 'city_name'], name='solvey_city_region_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SolveyDoctorMirror',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('ad', models.CharField(max_length=255)),
+                ('ixtisas', models.CharField(blank=True, max_length=255, null=True)),
+                ('kategoriya', models.CharField(blank=True, max_length=10, null=True)),
+                ('derece', models.CharField(blank=True, max_length=10, null=True)),
+                ('cinsiyyet', models.CharField(blank=True, max_length=10, null=True)),
+                ('number', models.CharField(blank=True, max_length=50, null=True)),
+                ('bolge_id', models.IntegerField(blank=True, null=True)),
+                ('city_id', models.IntegerField(blank=True, null=True)),
+                ('klinika_id', models.IntegerField(blank=True, null=True)),
+                ('previous_debt', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'solvey_mirror_doctors',
+                'indexes': [models.Index(fields=['bolge_id', 'ad'], name='solvey_doctor_region_idx'), models.Index(fields=['city_id'], name='solvey_doctor_city_idx'), models.Index(fields=['klinika_id'], name='solvey_doctor_hospital_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SolveyHospitalMirror',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('hospital_name', models.CharField(max_length=255)),
+                ('city_id', models.IntegerField(blank=True, null=True)),
+                ('region_net_id', models.IntegerField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'solvey_mirror_hospitals',
+                'indexes': [models.Index(fields=['city_id'], name='solvey_hospital_city_idx')],
+            },
+        ),
+    ]
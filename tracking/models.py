@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
@@ -25,6 +27,9 @@ class UserProfile(models.Model):
 
 
 class Route(models.Model):
+    # Bu müddətdə heartbeat gəlməsə route offline sayılır
+    OFFLINE_AFTER = timedelta(seconds=420)
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="routes"
     )
@@ -40,6 +45,16 @@ class Route(models.Model):
     last_ping = models.DateTimeField(null=True, blank=True)    # Son sinyal zamanı
     last_battery_level = models.IntegerField(null=True, blank=True)  # Son pil faizi (0-100)
 
+    class Meta:
+        indexes = [
+            # Aktiv route axtarışı (user, end_time IS NULL) — yalnız açıq route-lar indekslənir
+            models.Index(
+                fields=['user', '-start_time'],
+                condition=models.Q(end_time__isnull=True),
+                name='route_active_user_idx',
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"Route {self.id} for {self.user} ({self.start_time} - {self.end_time})"
     
@@ -52,17 +67,44 @@ class Route(models.Model):
     def connection_status(self):
         """Bağlantı durumu — son 7 dəqiqədə heartbeat var mı?
         (Heartbeat hər 5 dəq göndərilir, batareyaya dostu rejim)
+        Flush olunmamış heartbeat-lər üçün oxuyan əvvəlcə liveness.attach(routes)
+        çağırır — siyahı üzrə bir get_many (burada route başına cache sorğusu yoxdur).
         """
         if not self.last_ping:
             return 'unknown'
         from django.utils import timezone
-        from datetime import timedelta
-        if timezone.now() - self.last_ping > timedelta(seconds=420):
+        if timezone.now() - self.last_ping > self.OFFLINE_AFTER:
             return 'offline'
         return 'online'
 
 
+class LocationPointQuerySet(models.QuerySet):
+    """PostgreSQL-də cədvəl timestamp üzrə partition-lıdır (tracking.partitions) —
+    timestamp şərti olmayan sorğu bütün partition-ları oxuyur. Route nöqtələri
+    route-un başlama vaxtı ilə aşağıdan məhdudlaşdırılır ki, köhnə partition-lar oxunmasın.
+    Yuxarı sərhəd yoxdur: BatchLocationView gec gələn offline nöqtələri bitmiş route-a
+    yazır və onların vaxtı end_time-dan çox sonra ola bilər."""
+
+    def for_route(self, route):
+        return self.for_routes([route])
+
+    def for_routes(self, routes):
+        routes = list(routes)
+        if not routes:
+            return self.none()
+        return self.filter(
+            route__in=routes,
+            timestamp__gte=min(r.start_time for r in routes) - LocationPoint.ROUTE_TIME_SLACK,
+        )
+
+    def between(self, start, end):
+        return self.filter(timestamp__gte=start, timestamp__lt=end)
+
+
 class LocationPoint(models.Model):
+    # Telefon saatı route başlama vaxtından bir az fərqli ola bilər — for_route bu qədər geniş götürür
+    ROUTE_TIME_SLACK = timedelta(days=1)
+
     route = models.ForeignKey(
         Route, on_delete=models.CASCADE, related_name="points"
     )
@@ -74,17 +116,203 @@ class LocationPoint(models.Model):
     battery_level = models.IntegerField(null=True, blank=True)  # Batarya seviyesi (%)
     is_online = models.BooleanField(default=True)  # İnternet bağlantısı var mı?
 
+    objects = LocationPointQuerySet.as_manager()
+
     class Meta:
         ordering = ["timestamp"]
         indexes = [
-            models.Index(fields=['route', 'timestamp']),
             models.Index(fields=['timestamp']),
         ]
+        constraints = [
+            # Təkrar göndərilən offline bufer eyni nöqtəni ikinci dəfə yazmasın
+            # (route, timestamp) indeksi də bu constraint-in özüdür
+            models.UniqueConstraint(fields=['route', 'timestamp'], name='uniq_locationpoint_route_timestamp'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.latitude},{self.longitude} @ {self.timestamp}"
 
 
+class CompactLocationPoint(models.Model):
+    """
+    LocationPoint-in kompakt forması (tracking.compact_points):
+    koordinatlar mikrodərəcə int32 (1e-6° ≈ 11 sm — DecimalField(9,6) ilə eyni dəqiqlik),
+    vaxt epoch millisaniyə int64, dəqiqlik/sürət/batareya smallint.
+    Oxuyanda Decimal yaradılmır — NumPy massivinə birbaşa çevrilir.
+    """
+    SCALE = 1_000_000
+
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="compact_points"
+    )
+    lat_e6 = models.IntegerField()
+    lng_e6 = models.IntegerField()
+    ts_ms = models.BigIntegerField()
+    accuracy_m = models.PositiveSmallIntegerField(null=True, blank=True)  # metre
+    speed_cms = models.PositiveSmallIntegerField(null=True, blank=True)  # sm/s
+    battery_level = models.PositiveSmallIntegerField(null=True, blank=True)
+    is_online = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = "Compact Location Point"
+        verbose_name_plural = "Compact Location Points"
+        constraints = [
+            models.UniqueConstraint(fields=['route', 'ts_ms'], name='uniq_compactpoint_route_ts'),
+        ]
+
+    @property
+    def latitude(self) -> float:
+        return self.lat_e6 / self.SCALE
+
+    @property
+    def longitude(self) -> float:
+        return self.lng_e6 / self.SCALE
+
+    @property
+    def timestamp(self):
+        from datetime import datetime, timezone as dt_timezone
+        return datetime.fromtimestamp(self.ts_ms / 1000, tz=dt_timezone.utc)
+
+    def __str__(self) -> str:
+        return f"{self.latitude:.6f},{self.longitude:.6f} @ {self.timestamp}"
+
+
+class LocationBatch(models.Model):
+    """Qəbul olunmuş offline batch-lər (client batch_id üzrə) — təkrar göndəriş no-op olur"""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="location_batches"
+    )
+    batch_id = models.CharField(max_length=64)
+    route = models.ForeignKey(Route, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    received = models.IntegerField(default=0)
+    created = models.IntegerField(default=0)
+    duplicates = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Location Batch"
+        verbose_name_plural = "Location Batches"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'batch_id'], name='uniq_locationbatch_user_batch'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id}:{self.batch_id} ({self.created}/{self.received})"
+
+
+class RouteStats(models.Model):
+    """Route üzrə əvvəlcədən hesablanmış statistika (tracking.route_analytics).
+
+    Hər ingest-dən sonra yalnız yeni nöqtələr (tail_timestamp-dan sonrakılar)
+    emal olunur; tail_* və open_idle_seconds növbəti batch üçün vəziyyətdir.
+    """
+
+    route = models.OneToOneField(
+        Route, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    point_count = models.IntegerField(default=0)
+    distance_m = models.FloatField(default=0)
+    moving_seconds = models.FloatField(default=0)
+    idle_seconds = models.FloatField(default=0)
+    stop_count = models.IntegerField(default=0)
+    max_speed_kmh = models.FloatField(default=0)
+    # Hərəkət vaxtının sürət üzrə paylanması: i-ci element [i, i+1) km/saat-da keçən saniyələr
+    speed_histogram = models.JSONField(default=list, blank=True)
+
+    # İnkremental hesablama vəziyyəti
+    tail_timestamp = models.DateTimeField(null=True, blank=True)
+    tail_latitude = models.FloatField(null=True, blank=True)
+    tail_longitude = models.FloatField(null=True, blank=True)
+    open_idle_seconds = models.FloatField(default=0)  # Sonda davam edən dayanma müddəti
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Route Stats"
+        verbose_name_plural = "Route Stats"
+
+    def __str__(self) -> str:
+        return f"Route {self.route_id}: {self.distance_m / 1000:.2f} km"
+
+    @property
+    def distance_km(self):
+        return round(self.distance_m / 1000, 2)
+
+    def speed_percentile(self, q):
+        """Hərəkət vaxtına görə çəkili sürət persentili (km/saat)"""
+        from .route_analytics import histogram_percentile
+        return histogram_percentile(self.speed_histogram, q)
+
+
+class LastLocation(models.Model):
+    """Hər istifadəçinin son məlum konumu (xəritə feed-i üçün, hər user üçün 1 sətir).
+
+    LocationPoint cədvəlindən hesablanmır — hər ingest-də (tək nöqtə və batch)
+    yenilənir ki, /api/movqe-son-json/ bir sorğu ilə cavab versin.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="last_location",
+    )
+    route = models.ForeignKey(
+        Route, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    timestamp = models.DateTimeField()
+    battery_level = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Last Location"
+        verbose_name_plural = "Last Locations"
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.latitude},{self.longitude} @ {self.timestamp}"
+
+    @classmethod
+    def record(cls, route, latitude, longitude, timestamp, battery_level=None):
+        """Nöqtə mövcud son konumdan yenidirsə, user-in sətrini yenilə (yoxdursa yarat).
+
+        Köhnə offline nöqtələr (daha gec gələn, amma vaxtı əvvəl olan) son konumu
+        geri çəkmir. battery_level None olduqda mövcud batareya dəyəri saxlanılır.
+        """
+        from django.db import IntegrityError, transaction
+        from django.utils import timezone
+
+        values = {
+            "route": route,
+            "latitude": latitude,
+            "longitude": longitude,
+            "timestamp": timestamp,
+            "updated_at": timezone.now(),
+        }
+        if battery_level is not None:
+            values["battery_level"] = battery_level
+        updated = cls.objects.filter(
+            user_id=route.user_id, timestamp__lte=timestamp
+        ).update(**values)
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=route.user_id, **{**values, "battery_level": battery_level})
+        except IntegrityError:
+            # Sətir var, amma daha yeni nöqtəyə aiddir — toxunma
+            pass
+
+    @classmethod
+    def touch(cls, user_id):
+        """Konum dəyişmədən feed-də görünən vəziyyət dəyişəndə (pauza/davam) delta üçün işarələ"""
+        from django.utils import timezone
+        cls.objects.filter(user_id=user_id).update(updated_at=timezone.now())
+
+
 class VisitSchedule(models.Model):
     """Haftalık hastane ziyaret planlaması"""
     
@@ -303,7 +531,10 @@ class VisitedPharmacy(models.Model):
     @property
     def effective_medicine_name(self):
         """Display summary for backward compat / list view"""
-        items = list(self.items.select_related('medicine').all())
+        items = self.items.all()
+        if "items" not in getattr(self, "_prefetched_objects_cache", {}):
+            items = items.select_related('medicine')
+        items = list(items)
         if not items:
             return "—"
         parts = [f"{i.medicine.name or i.medicine.name_az} x{i.quantity}" for i in items if i.medicine]
@@ -362,4 +593,57 @@ class LocationPermissionReport(models.Model):
         verbose_name_plural = "Location Permission Reports"
     
     def __str__(self) -> str:
-        return f"{self.user.username} - {self.get_reason_display()} ({self.timestamp})"
\ No newline at end of file
+        return f"{self.user.username} - {self.get_reason_display()} ({self.timestamp})"
+
+class DashboardCounter(models.Model):
+    """
+    Admin ana səhifəsi üçün saatlıq sayğaclar (tracking.dashboard_counters).
+    Cəmi = metrikin bütün sətirlərinin cəmi, "son 24 saat" = son 24 saatlıq sətrin cəmi —
+    mənbə cədvəllər (xüsusilə LocationPoint) hər səhifə açılışında sayılmır.
+    """
+    METRIC_CHOICES = [
+        ('users', 'İstifadəçilər'),
+        ('routes', 'Route-lar'),
+        ('locations', 'Konum nöqtələri'),
+        ('hospital_visits', 'Xəstəxana ziyarətləri'),
+        ('visited_doctors', 'Görülən həkimlər'),
+        ('schedules', 'Ziyarət planları'),
+        ('location_reports', 'Konum hesabatları'),
+    ]
+
+    metric = models.CharField(max_length=32, choices=METRIC_CHOICES)
+    hour = models.DateTimeField()  # Saatın başlanğıcı (UTC)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Dashboard Counter"
+        verbose_name_plural = "Dashboard Counters"
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'hour'], name='uniq_dashboardcounter_metric_hour'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.metric} @ {self.hour}: {self.value}"
+
+
+class UserActivity(models.Model):
+    """
+    İstifadəçi üzrə xülasə (admin_dashboard_users) — tracking.user_activity ilə
+    ingest və route dəyişikliklərində yenilənir, users × routes × points JOIN-i lazım deyil.
+    last_activity — son route başlanğıcı və ya son nöqtə vaxtı (hansı sonradırsa).
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="activity"
+    )
+    route_count = models.IntegerField(default=0)
+    point_count = models.BigIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    has_active_route = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "User Activity"
+        verbose_name_plural = "User Activity"
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.route_count} routes, {self.point_count} points"
@@ -1,58 +1,79 @@
 """
 Solvey Database Models
 Bu modellər external (Solvey) database-dən məlumat çəkir
+
+*Mirror modelləri default DB-də solvey_mirror_* cədvəllərində lokal güzgü yaradır
+(sync_solvey_mirror əmri doldurur). SOLVEY_READ_MODE=mirror olduqda oxular
+db_router.solvey_objects() vasitəsilə bu modellərə gedir.
 """
 from django.db import models
 
 
-class SolveyRegion(models.Model):
-    """Solvey regions_region cədvəli"""
+class SolveyRegionBase(models.Model):
     id = models.IntegerField(primary_key=True)
     region_name = models.CharField(max_length=255)
     region_type = models.CharField(max_length=100, blank=True, null=True)
-    
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.region_name
+
+
+class SolveyRegion(SolveyRegionBase):
+    """Solvey regions_region cədvəli"""
+
     class Meta:
         db_table = 'regions_region'
         managed = False  # Django migration etməsin
         app_label = 'tracking'
-    
-    def __str__(self):
-        return self.region_name
 
 
-class SolveyCity(models.Model):
-    """Solvey regions_city cədvəli"""
+class SolveyCityBase(models.Model):
     id = models.IntegerField(primary_key=True)
     city_name = models.CharField(max_length=255)
     region_id = models.IntegerField()
-    
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.city_name
+
+
+class SolveyCity(SolveyCityBase):
+    """Solvey regions_city cədvəli"""
+
     class Meta:
         db_table = 'regions_city'
         managed = False
         app_label = 'tracking'
-    
-    def __str__(self):
-        return self.city_name
 
 
-class SolveyHospital(models.Model):
-    """Solvey regions_hospital cədvəli"""
+class SolveyHospitalBase(models.Model):
     id = models.IntegerField(primary_key=True)
     hospital_name = models.CharField(max_length=255)
     city_id = models.IntegerField(null=True, blank=True)
     region_net_id = models.IntegerField(null=True, blank=True)
-    
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.hospital_name
+
+
+class SolveyHospital(SolveyHospitalBase):
+    """Solvey regions_hospital cədvəli"""
+
     class Meta:
         db_table = 'regions_hospital'
         managed = False
         app_label = 'tracking'
-    
-    def __str__(self):
-        return self.hospital_name
 
 
-class SolveyDoctor(models.Model):
-    """Solvey doctors_doctors cədvəli"""
+class SolveyDoctorBase(models.Model):
     id = models.IntegerField(primary_key=True)
     ad = models.CharField(max_length=255)
     ixtisas = models.CharField(max_length=255, blank=True, null=True)
@@ -65,31 +86,119 @@ class SolveyDoctor(models.Model):
     city_id = models.IntegerField(null=True, blank=True)
     klinika_id = models.IntegerField(null=True, blank=True)
     previous_debt = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # Əvvəlki borc
-    
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.ad
+
+
+class SolveyDoctor(SolveyDoctorBase):
+    """Solvey doctors_doctors cədvəli"""
+
     class Meta:
         db_table = 'doctors_doctors'
         managed = False
         app_label = 'tracking'
-    
-    def __str__(self):
-        return self.ad
 
 
-class SolveyMedicine(models.Model):
-    """Solvey Medical cədvəli"""
+class SolveyMedicineBase(models.Model):
     id = models.IntegerField(primary_key=True)
     med_name = models.CharField(max_length=250)
     med_full_name = models.CharField(max_length=250, null=True, blank=True)
     med_price = models.DecimalField(max_digits=10, decimal_places=2)
     komissiya = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.BooleanField(default=True)
-    
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.med_name or self.med_full_name or f"Medicine {self.id}"
+
+
+class SolveyMedicine(SolveyMedicineBase):
+    """Solvey Medical cədvəli"""
+
     class Meta:
         # Cədvəl adı: medicine_medical
         db_table = 'medicine_medical'
         managed = False
         app_label = 'tracking'
-    
+
+
+# ============================================================================
+# Lokal güzgü (default DB) — sahələr eyni, üstəlik synced_at
+# ============================================================================
+
+class SolveyRegionMirror(SolveyRegionBase):
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'solvey_mirror_regions'
+        app_label = 'tracking'
+
+
+class SolveyCityMirror(SolveyCityBase):
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'solvey_mirror_cities'
+        app_label = 'tracking'
+        indexes = [models.Index(fields=["region_id", "city_name"], name="solvey_city_region_idx")]
+
+
+class SolveyHospitalMirror(SolveyHospitalBase):
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'solvey_mirror_hospitals'
+        app_label = 'tracking'
+        indexes = [models.Index(fields=["city_id"], name="solvey_hospital_city_idx")]
+
+
+class SolveyDoctorMirror(SolveyDoctorBase):
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'solvey_mirror_doctors'
+        app_label = 'tracking'
+        indexes = [
+            models.Index(fields=["bolge_id", "ad"], name="solvey_doctor_region_idx"),
+            models.Index(fields=["city_id"], name="solvey_doctor_city_idx"),
+            models.Index(fields=["klinika_id"], name="solvey_doctor_hospital_idx"),
+        ]
+
+
+class SolveyMedicineMirror(SolveyMedicineBase):
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'solvey_mirror_medicines'
+        app_label = 'tracking'
+
+
+class SolveyMirrorState(models.Model):
+    """Hər güzgü cədvəlinin son sync vəziyyəti"""
+    table = models.CharField(max_length=100, unique=True)
+    last_sync_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    row_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        app_label = 'tracking'
+
     def __str__(self):
-        return self.med_name or self.med_full_name or f"Medicine {self.id}"
+        return f"{self.table} ({self.row_count})"
+
 
+# Solvey modeli → lokal güzgü modeli (db_router.solvey_objects)
+MIRRORS = {
+    SolveyRegion: SolveyRegionMirror,
+    SolveyCity: SolveyCityMirror,
+    SolveyHospital: SolveyHospitalMirror,
+    SolveyDoctor: SolveyDoctorMirror,
+    SolveyMedicine: SolveyMedicineMirror,
+}
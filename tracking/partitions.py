@@ -0,0 +1,318 @@
+"""
+LocationPoint Partitions
+tracking_locationpoint cədvəlinin PostgreSQL-də timestamp üzrə RANGE partition-ları
+(aylıq və ya həftəlik, settings.LOCATION_PARTITION_INTERVAL) və retention.
+
+- convert_to_partitioned — bir dəfəlik: mövcud cədvəl partition-lı cədvələ köçürülür
+  (PRIMARY KEY (id, timestamp) olur — partition açarı hər unikal constraint-də olmalıdır)
+- ensure_partitions — cari və növbəti LOCATION_PARTITION_AHEAD dövr üçün partition-lar;
+  aralığa düşməyən nöqtələr default partition-a yazılır, yeni partition yarananda
+  onun aralığındakı sətirlər default-dan köçürülür
+- archive_old_partitions — LOCATION_RETENTION_DAYS-dən köhnə partition-lar
+  CSV.gz faylına (LOCATION_ARCHIVE_DIR) yazılır, sonra DETACH + DROP olunur
+
+SQLite və digər DB-lərdə partition yoxdur; retention həmin dövrlərin sətirlərini
+eyni formatda arxivləyib silir. RouteStats və LastLocation silinmir — köhnə
+route-ların xülasəsi qalır, nöqtələri arxiv faylındadır.
+"""
+import csv
+import gzip
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUFFIX = "_default"
+LEGACY_SUFFIX = "_legacy"
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    start: datetime
+    end: datetime
+
+
+def interval() -> str:
+    value = getattr(settings, "LOCATION_PARTITION_INTERVAL", "month")
+    if value not in ("month", "week"):
+        raise ValueError(f"LOCATION_PARTITION_INTERVAL 'month' və ya 'week' olmalıdır, '{value}' deyil")
+    return value
+
+
+def retention_days() -> int:
+    return int(getattr(settings, "LOCATION_RETENTION_DAYS", 0))
+
+
+def archive_dir() -> Path:
+    path = Path(getattr(settings, "LOCATION_ARCHIVE_DIR", Path(settings.BASE_DIR) / "var" / "location-archive"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _table() -> str:
+    from .models import LocationPoint
+
+    return LocationPoint._meta.db_table
+
+
+def period_start(moment: datetime) -> datetime:
+    """moment-in düşdüyü dövrün başlanğıcı (UTC)"""
+    moment = moment.astimezone(dt_timezone.utc)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval() == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_period(start: datetime) -> datetime:
+    if interval() == "week":
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{_table()}_p{start:%Y%m%d}"
+
+
+def is_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned() -> bool:
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [_table()])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions() -> List[Partition]:
+    """Range partition-lar (default xaric), başlanğıca görə sıralı"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [_table()],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound or "")
+        if not match:
+            continue
+        partitions.append(Partition(name, parse_datetime(match.group(1)), parse_datetime(match.group(2))))
+    return sorted(partitions, key=lambda p: p.start)
+
+
+def _literal(moment: datetime) -> str:
+    return moment.astimezone(dt_timezone.utc).strftime("%Y-%m-%d %H:%M:%S+00")
+
+
+def create_partition(start: datetime) -> Optional[str]:
+    """[start, next_period) partition-u; default partition-dakı uyğun sətirlər ona köçürülür"""
+    end = next_period(start)
+    name = partition_name(start)
+    quote = connection.ops.quote_name
+    table, default = quote(_table()), quote(_table() + DEFAULT_SUFFIX)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0]:
+            return None
+        cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute("SELECT to_regclass(%s)", [_table() + DEFAULT_SUFFIX])
+        if cursor.fetchone()[0]:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {default} WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+                f"INSERT INTO {quote(name)} SELECT * FROM moved",
+                [start, end],
+            )
+            if cursor.rowcount:
+                logger.info(f"[PARTITIONS] {cursor.rowcount} rows moved from default to {name}")
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM ('{_literal(start)}') TO ('{_literal(end)}')"
+        )
+    logger.info(f"[PARTITIONS] Created {name}")
+    return name
+
+
+def ensure_partitions(ahead: Optional[int] = None, now: Optional[datetime] = None) -> List[str]:
+    """Cari dövr və növbəti `ahead` dövr üçün partition-lar — yaradılanların adları"""
+    if ahead is None:
+        ahead = int(getattr(settings, "LOCATION_PARTITION_AHEAD", 3))
+    start = period_start(now or timezone.now())
+    created = []
+    for _ in range(ahead + 1):
+        name = create_partition(start)
+        if name:
+            created.append(name)
+        start = next_period(start)
+    return created
+
+
+def convert_to_partitioned() -> int:
+    """Mövcud tracking_locationpoint-i partition-lı cədvələ köçür (bir dəfəlik, cədvəl kilidlənir).
+    Köçürülən sətir sayını qaytarır."""
+    quote = connection.ops.quote_name
+    name = _table()
+    legacy = name + LEGACY_SUFFIX
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {quote(name)} IN ACCESS EXCLUSIVE MODE")
+        # Constraint və indekslərin tərifləri — köçürmədən sonra eyni adlarla yaradılır
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'f')",
+            [name],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))",
+            [name, name],
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {quote(name)} RENAME TO {quote(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f"CREATE TABLE {quote(name + DEFAULT_SUFFIX)} PARTITION OF {quote(name)} DEFAULT")
+
+        cursor.execute(f'SELECT min("timestamp"), max("timestamp"), max(id) FROM {quote(legacy)}')
+        oldest, newest, max_id = cursor.fetchone()
+        if oldest is not None:
+            start = period_start(oldest)
+            while start <= newest:
+                cursor.execute(
+                    f"CREATE TABLE {quote(partition_name(start))} PARTITION OF {quote(name)} "
+                    f"FOR VALUES FROM ('{_literal(start)}') TO ('{_literal(next_period(start))}')"
+                )
+                start = next_period(start)
+        cursor.execute(f"INSERT INTO {quote(name)} OVERRIDING SYSTEM VALUE SELECT * FROM {quote(legacy)}")
+        moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {quote(legacy)}")
+        if max_id:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [name, max_id])
+
+        cursor.execute(f'ALTER TABLE {quote(name)} ADD CONSTRAINT {quote(name + "_pkey")} PRIMARY KEY (id, "timestamp")')
+        for conname, definition in constraints:
+            cursor.execute(f"ALTER TABLE {quote(name)} ADD CONSTRAINT {quote(conname)} {definition}")
+        # Təriflər rename-dən əvvəl oxunub — artıq yeni cədvələ işarə edir
+        for _, definition in indexes:
+            cursor.execute(definition)
+    logger.info(f"[PARTITIONS] Converted {name} to partitioned table ({moved} rows)")
+    return moved
+
+
+def _write_archive(path: Path, write_rows) -> int:
+    """CSV.gz-ni müvəqqəti fayla yaz, fsync et, sonra adını dəyiş — yarımçıq arxiv qalmır"""
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+        count = write_rows(f)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def _archive_partition(partition: Partition, keep_detached: bool) -> int:
+    quote = connection.ops.quote_name
+    path = archive_dir() / f"{partition.name}.csv.gz"
+
+    def write_rows(f):
+        with connection.cursor() as cursor:
+            copy_sql = (
+                f'COPY (SELECT * FROM {quote(partition.name)} ORDER BY route_id, "timestamp") '
+                f"TO STDOUT WITH (FORMAT csv, HEADER true)"
+            )
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(copy_sql, f)
+            else:  # psycopg 3
+                with raw.copy(copy_sql) as copy:
+                    for chunk in copy:
+                        f.write(bytes(chunk).decode("utf-8"))
+            cursor.execute(f"SELECT count(*) FROM {quote(partition.name)}")
+            return cursor.fetchone()[0]
+
+    count = _write_archive(path, write_rows)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(_table())} DETACH PARTITION {quote(partition.name)}")
+        if not keep_detached:
+            cursor.execute(f"DROP TABLE {quote(partition.name)}")
+    logger.info(f"[PARTITIONS] Archived {partition.name} ({count} rows) to {path}")
+    return count
+
+
+def _archive_rows(start: datetime, end: datetime) -> int:
+    """Partition olmayan DB-lər üçün: [start, end) nöqtələrini arxivlə və sil"""
+    from .models import LocationPoint
+
+    fields = [f.attname for f in LocationPoint._meta.concrete_fields]
+    queryset = LocationPoint.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    path = archive_dir() / f"{partition_name(start)}.csv.gz"
+
+    def write_rows(f):
+        writer = csv.writer(f)
+        writer.writerow([LocationPoint._meta.get_field(name).column for name in fields])
+        count = 0
+        for row in queryset.order_by("route_id", "timestamp").values_list(*fields).iterator(chunk_size=5000):
+            writer.writerow(row)
+            count += 1
+        return count
+
+    count = _write_archive(path, write_rows)
+    with transaction.atomic():
+        queryset.delete()
+    logger.info(f"[PARTITIONS] Archived {count} rows ({start:%Y-%m-%d}) to {path}")
+    return count
+
+
+def archive_old_partitions(days: Optional[int] = None, keep_detached: bool = False,
+                           now: Optional[datetime] = None) -> List[dict]:
+    """Bütövlükdə retention həddindən köhnə dövrləri arxivlə; nəticə: [{name, rows}]"""
+    from .models import LocationPoint
+
+    days = retention_days() if days is None else days
+    if days <= 0:
+        return []
+    cutoff = period_start((now or timezone.now()) - timedelta(days=days))
+
+    archived = []
+    if is_partitioned():
+        for partition in list_partitions():
+            if partition.end <= cutoff:
+                rows = _archive_partition(partition, keep_detached)
+                archived.append({"name": partition.name, "rows": rows})
+        return archived
+
+    oldest = (
+        LocationPoint.objects.filter(timestamp__lt=cutoff)
+        .order_by("timestamp").values_list("timestamp", flat=True).first()
+    )
+    if oldest is None:
+        return archived
+    start = period_start(oldest)
+    while start < cutoff:
+        end = next_period(start)
+        if LocationPoint.objects.filter(timestamp__gte=start, timestamp__lt=end).exists():
+            archived.append({"name": partition_name(start), "rows": _archive_rows(start, end)})
+        start = end
+    return archived
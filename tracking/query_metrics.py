@@ -0,0 +1,306 @@
+"""
+Query Metrics
+Hər endpoint üçün SQL sorğu sayı, DB vaxtı, ümumi cavab vaxtı və cavab ölçüsü.
+
+- QueryMetricsMiddleware hər HTTP sorğusu boyu bütün DB bağlantılarına
+  (default, external) execute_wrapper qoyur; nəticə URL pattern-i (route) üzrə yığılır
+- GET /api/metrics/ — Prometheus text formatı (staff sessiyası və ya QUERY_METRICS_TOKEN)
+- QUERY_BUDGETS — {url adı və ya pattern: maksimum sorğu sayı}. Aşılanda
+  [QUERY_BUDGET] xəbərdarlığı yazılır və sayğac artır; QUERY_BUDGET_STRICT=True
+  olduqda QueryBudgetExceeded (AssertionError) qaldırılır — testlər üçün.
+  check_query_budgets əmri endpoint-ləri iki ölçüdə yoxlayır
+- hər process öz sayğaclarını yaddaşda yığır və QUERY_METRICS_PUBLISH_SECONDS-da
+  bir cache-ə yazır; /api/metrics/ bütün process-lərin son snapshot-larını cəmləyir
+  (LocMemCache ilə yalnız cavab verən worker görünür — shared cache lazımdır)
+"""
+import copy
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "flux"
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+UNMATCHED = "<unmatched>"
+
+CACHE_KEY = "query_metrics:{}"
+INDEX_KEY = "query_metrics:processes"
+# Dayanmış worker-in snapshot-u bu qədər sonra cəmdən çıxır
+PUBLISH_TTL = 3600
+
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_lock = threading.Lock()
+_stats: Dict[tuple, dict] = {}
+_last_publish = 0.0
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCollector:
+    """Bir HTTP sorğusu daxilindəki SQL-lər: DB alias → [say, saniyə]"""
+
+    def __init__(self):
+        self.queries: Dict[str, list] = {}
+
+    def wrapper(self, alias):
+        def wrap(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                entry = self.queries.setdefault(alias, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - started
+        return wrap
+
+    @property
+    def count(self) -> int:
+        return sum(count for count, _ in self.queries.values())
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.queries.values())
+
+
+@contextmanager
+def capture():
+    """Blok daxilində bu thread-in bütün DB bağlantılarındakı sorğuları say"""
+    collector = QueryCollector()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(collector.wrapper(alias)))
+        yield collector
+
+
+def budget_for(match) -> Optional[int]:
+    """resolver_match → QUERY_BUDGETS-dəki limit (əvvəl url adı, sonra pattern)"""
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    if match is None or not budgets:
+        return None
+    if match.view_name in budgets:
+        return budgets[match.view_name]
+    return budgets.get(match.route)
+
+
+def _new_entry() -> dict:
+    return {
+        "requests": {},
+        "duration_sum": 0.0,
+        "duration_buckets": [0] * len(DURATION_BUCKETS),
+        "queries_sum": 0,
+        "queries_buckets": [0] * len(QUERY_BUCKETS),
+        "db": {},
+        "bytes": 0,
+        "budget_exceeded": 0,
+    }
+
+
+def _observe(buckets, bounds, value) -> None:
+    """Bucket-lər kumulyativ deyil saxlanılır; render zamanı toplanır"""
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            buckets[i] += 1
+            return
+
+
+def record(endpoint, method, status_code, seconds, collector, size=None, exceeded=False) -> None:
+    with _lock:
+        entry = _stats.setdefault((endpoint, method), _new_entry())
+        status_key = str(status_code)
+        entry["requests"][status_key] = entry["requests"].get(status_key, 0) + 1
+        entry["duration_sum"] += seconds
+        _observe(entry["duration_buckets"], DURATION_BUCKETS, seconds)
+        entry["queries_sum"] += collector.count
+        _observe(entry["queries_buckets"], QUERY_BUCKETS, collector.count)
+        for alias, (count, db_seconds) in collector.queries.items():
+            db = entry["db"].setdefault(alias, [0, 0.0])
+            db[0] += count
+            db[1] += db_seconds
+        if size:
+            entry["bytes"] += size
+        if exceeded:
+            entry["budget_exceeded"] += 1
+    _maybe_publish()
+
+
+def local_snapshot() -> Dict[tuple, dict]:
+    with _lock:
+        return copy.deepcopy(_stats)
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def publish() -> None:
+    """Bu process-in cari sayğaclarını cache-ə yaz (kumulyativ, delta deyil)"""
+    global _last_publish
+    _last_publish = time.monotonic()
+    try:
+        cache.set(CACHE_KEY.format(PROCESS_ID), local_snapshot(), PUBLISH_TTL)
+        processes = cache.get(INDEX_KEY) or []
+        if PROCESS_ID not in processes:
+            # Yarış halında itən yazı növbəti publish-də bərpa olunur
+            cache.set(INDEX_KEY, processes + [PROCESS_ID], None)
+    except Exception as e:
+        logger.warning(f"[QUERY_METRICS] Publish failed: {e}")
+
+
+def _maybe_publish() -> None:
+    interval = float(getattr(settings, "QUERY_METRICS_PUBLISH_SECONDS", 15))
+    if time.monotonic() - _last_publish >= interval:
+        publish()
+
+
+def collect() -> Dict[tuple, dict]:
+    """Bütün process-lərin snapshot-larının cəmi (bu process — canlı dəyər)"""
+    merged = local_snapshot()
+    try:
+        processes = [p for p in (cache.get(INDEX_KEY) or []) if p != PROCESS_ID]
+        snapshots = cache.get_many([CACHE_KEY.format(p) for p in processes])
+        alive = [p for p in processes if CACHE_KEY.format(p) in snapshots]
+        if len(alive) != len(processes):
+            cache.set(INDEX_KEY, alive + [PROCESS_ID], None)
+    except Exception as e:
+        logger.warning(f"[QUERY_METRICS] Collect failed: {e}")
+        return merged
+
+    for snapshot in snapshots.values():
+        for key, other in snapshot.items():
+            entry = merged.setdefault(key, _new_entry())
+            for status_key, n in other["requests"].items():
+                entry["requests"][status_key] = entry["requests"].get(status_key, 0) + n
+            for field in ("duration_sum", "queries_sum", "bytes", "budget_exceeded"):
+                entry[field] += other[field]
+            for field in ("duration_buckets", "queries_buckets"):
+                entry[field] = [a + b for a, b in zip(entry[field], other[field])]
+            for alias, (count, db_seconds) in other["db"].items():
+                db = entry["db"].setdefault(alias, [0, 0.0])
+                db[0] += count
+                db[1] += db_seconds
+    return merged
+
+
+def _metric(name) -> str:
+    return f"{PREFIX}_{name}"
+
+
+def _labels(**labels) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram(lines, name, labels, bounds, buckets, total, count) -> None:
+    cumulative = 0
+    for bound, n in zip(bounds, buckets):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {count}")
+
+
+def render(stats: Optional[Dict[tuple, dict]] = None) -> str:
+    """Prometheus text exposition format (0.0.4)"""
+    stats = collect() if stats is None else stats
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    families = {
+        "http_requests_total": ("counter", "HTTP sorğuları (endpoint, metod, status)"),
+        "http_request_duration_seconds": ("histogram", "Middleware-dən keçən ümumi cavab vaxtı"),
+        "http_response_bytes_total": ("counter", "Cavab gövdəsinin ölçüsü (streaming cavablar xaric)"),
+        "db_queries_per_request": ("histogram", "Bir HTTP sorğusundakı SQL sorğu sayı"),
+        "db_queries_total": ("counter", "SQL sorğuları (DB alias üzrə)"),
+        "db_query_duration_seconds_total": ("counter", "SQL sorğularında keçən vaxt"),
+        "query_budget_exceeded_total": ("counter", "QUERY_BUDGETS limitini aşan sorğular"),
+        "query_budget": ("gauge", "Elan olunmuş sorğu limiti (url adı və ya pattern)"),
+    }
+    lines_by_family = {name: [] for name in families}
+
+    for (endpoint, method), entry in sorted(stats.items()):
+        labels = {"endpoint": endpoint, "method": method}
+        count = sum(entry["requests"].values())
+        for status_key, n in sorted(entry["requests"].items()):
+            lines_by_family["http_requests_total"].append(
+                f"{_metric('http_requests_total')}{_labels(**labels, status=status_key)} {n}"
+            )
+        _histogram(
+            lines_by_family["http_request_duration_seconds"], _metric("http_request_duration_seconds"),
+            labels, DURATION_BUCKETS, entry["duration_buckets"], round(entry["duration_sum"], 6), count,
+        )
+        lines_by_family["http_response_bytes_total"].append(
+            f"{_metric('http_response_bytes_total')}{_labels(**labels)} {entry['bytes']}"
+        )
+        _histogram(
+            lines_by_family["db_queries_per_request"], _metric("db_queries_per_request"),
+            labels, QUERY_BUCKETS, entry["queries_buckets"], entry["queries_sum"], count,
+        )
+        for alias, (db_count, db_seconds) in sorted(entry["db"].items()):
+            lines_by_family["db_queries_total"].append(
+                f"{_metric('db_queries_total')}{_labels(**labels, db=alias)} {db_count}"
+            )
+            lines_by_family["db_query_duration_seconds_total"].append(
+                f"{_metric('db_query_duration_seconds_total')}{_labels(**labels, db=alias)} {round(db_seconds, 6)}"
+            )
+        lines_by_family["query_budget_exceeded_total"].append(
+            f"{_metric('query_budget_exceeded_total')}{_labels(**labels)} {entry['budget_exceeded']}"
+        )
+    for name, limit in sorted(budgets.items()):
+        lines_by_family["query_budget"].append(f"{_metric('query_budget')}{_labels(endpoint=name)} {limit}")
+
+    output = []
+    for name, (kind, help_text) in families.items():
+        output.append(f"# HELP {_metric(name)} {help_text}")
+        output.append(f"# TYPE {_metric(name)} {kind}")
+        output.extend(lines_by_family[name])
+    return "\n".join(output) + "\n"
+
+
+class QueryMetricsMiddleware:
+    """Sorğu sayı / DB vaxtı / cavab vaxtı / ölçü — bax modul docstring-i"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "QUERY_METRICS_ENABLED", True):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with capture() as collector:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = match.route if match else UNMATCHED
+        size = None if response.streaming else len(response.content)
+        budget = budget_for(match)
+        exceeded = budget is not None and collector.count > budget
+        try:
+            record(endpoint, request.method, response.status_code, elapsed, collector, size, exceeded)
+        except Exception as e:
+            logger.error(f"[QUERY_METRICS] Record failed: {e}")
+
+        if exceeded:
+            message = (
+                f"{request.method} {request.path} ({match.view_name or endpoint}): "
+                f"{collector.count} sorğu, limit {budget}"
+            )
+            logger.warning(f"[QUERY_BUDGET] {message}")
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+        return response
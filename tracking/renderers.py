@@ -0,0 +1,30 @@
+"""
+Route nöqtələri üçün kompakt renderer-lər.
+Accept header və ya ?format= ilə seçilir:
+- ?format=polyline → encoded polyline (JSON)
+- ?format=bin      → delta-kodlaşdırılmış int32 massivi (application/octet-stream)
+Kompakt məlumatı view özü qurur (tracking.geometry encoder-ləri); renderer yalnız yazır.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class PolylineRenderer(JSONRenderer):
+    media_type = "application/vnd.flux.polyline+json"
+    format = "polyline"
+
+
+class RouteBinaryRenderer(BaseRenderer):
+    media_type = "application/octet-stream"
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return bytes(data)
+        # Xəta cavabları (404, 400) binary formatda da JSON kimi qaytarılır
+        if renderer_context and renderer_context.get("response") is not None:
+            renderer_context["response"]["Content-Type"] = "application/json"
+        return json.dumps(data).encode("utf-8")
@@ -0,0 +1,206 @@
+"""
+Route Analytics
+Route nöqtələri üzrə məsafə, hərəkət/dayanma vaxtı, dayanacaqlar və sürət
+paylanması (NumPy ilə vektorlaşdırılmış).
+
+Hesablama seqmentlər üzərində aparılır (ardıcıl iki nöqtə arası):
+- hərəkət:  sürət >= MOVING_SPEED_KMH
+- dayanma:  sürət <  MOVING_SPEED_KMH (GPS titrəməsi məsafəyə yazılmır)
+- boşluq:   MAX_GAP_SECONDS-dan uzun fasilə (offline) — məsafə sayılır, vaxt yox
+- xəta:     MAX_SPEED_KMH-dan sürətli sıçrayış — nəzərə alınmır
+Ardıcıl dayanma seqmentləri STOP_MIN_SECONDS-dan uzun olanda dayanacaq sayılır.
+
+Nəticə RouteStats-da saxlanılır; hər batch-dən sonra yalnız yeni quyruq emal
+olunur (update_route_stats). Tək nöqtə yolu hər nöqtədə stats sətrini kilidləmir —
+throttled_update_route_stats route başına ROUTE_STATS_POINT_INTERVAL saniyədə bir.
+"""
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .geometry import EARTH_RADIUS_M, timestamps_ms
+
+logger = logging.getLogger(__name__)
+
+MOVING_SPEED_KMH = 3.0
+MAX_SPEED_KMH = 250.0
+MAX_GAP_SECONDS = 600.0
+STOP_MIN_SECONDS = 300.0
+SPEED_HISTOGRAM_BINS = 201  # 0..199 km/saat + sonuncu: 200+
+THROTTLE_KEY = "route-stats-throttle:{}"
+
+
+def haversine(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """İki nöqtə massivi arasındakı məsafə (metr)"""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def histogram_percentile(histogram, q: float) -> Optional[float]:
+    """Sürət histoqramından q-cu persentil (0-100), km/saat"""
+    weights = np.asarray(histogram or [], dtype=np.float64)
+    total = weights.sum() if len(weights) else 0.0
+    if total <= 0:
+        return None
+    cumulative = np.cumsum(weights)
+    return float(np.searchsorted(cumulative, total * q / 100.0))
+
+
+def analyze(lat: np.ndarray, lng: np.ndarray, ts: np.ndarray, open_idle_seconds: float = 0.0) -> Dict:
+    """
+    Nöqtə massivləri (lat, lng dərəcə; ts epoch saniyə, artan sıra ilə) üzrə statistika.
+    open_idle_seconds — əvvəlki hissənin sonunda davam edən dayanma (inkremental rejim).
+    """
+    result = {
+        "distance_m": 0.0,
+        "moving_seconds": 0.0,
+        "idle_seconds": 0.0,
+        "stop_count": 0,
+        "max_speed_kmh": 0.0,
+        "speed_histogram": np.zeros(SPEED_HISTOGRAM_BINS),
+        "open_idle_seconds": open_idle_seconds,
+    }
+    # Eyni vaxtlı təkrar nöqtələri at
+    if len(ts) > 1:
+        keep = np.concatenate(([True], np.diff(ts) > 0))
+        lat, lng, ts = lat[keep], lng[keep], ts[keep]
+    if len(ts) < 2:
+        return result
+
+    dist = haversine(lat[:-1], lng[:-1], lat[1:], lng[1:])
+    dt = np.diff(ts)
+    speed = dist / dt * 3.6
+
+    valid = speed <= MAX_SPEED_KMH
+    gap = valid & (dt > MAX_GAP_SECONDS)
+    moving = valid & ~gap & (speed >= MOVING_SPEED_KMH)
+    idle = valid & ~gap & ~moving
+
+    result["distance_m"] = float(dist[moving | gap].sum())
+    result["moving_seconds"] = float(dt[moving].sum())
+    result["idle_seconds"] = float(dt[idle].sum())
+    if moving.any():
+        result["max_speed_kmh"] = float(speed[moving].max())
+        bins = np.minimum(speed[moving].astype(np.int64), SPEED_HISTOGRAM_BINS - 1)
+        result["speed_histogram"] = np.bincount(
+            bins, weights=dt[moving], minlength=SPEED_HISTOGRAM_BINS
+        )
+
+    # Dayanma seriyaları: hər qeyri-idle seqment yeni seriya başladır
+    run_ids = np.cumsum(~idle)
+    durations = np.bincount(run_ids[idle], weights=dt[idle], minlength=run_ids[-1] + 1)
+    carry = open_idle_seconds if idle[0] else 0.0
+    durations[run_ids[0]] += carry
+    stop_count = int((durations >= STOP_MIN_SECONDS).sum())
+    if carry >= STOP_MIN_SECONDS:
+        # Əvvəlki hissədə artıq sayılıb
+        stop_count -= 1
+    result["stop_count"] = stop_count
+    result["open_idle_seconds"] = float(durations[run_ids[-1]]) if idle[-1] else 0.0
+    return result
+
+
+def _load_points(route, after=None):
+    from . import compact_points
+    from .models import LocationPoint
+
+    if compact_points.reads_enabled():
+        return compact_points.route_arrays(route, after)
+
+    queryset = LocationPoint.objects.for_route(route)
+    if after is not None:
+        queryset = queryset.filter(timestamp__gt=after)
+    rows = list(
+        queryset.order_by("timestamp", "id").values_list("latitude", "longitude", "timestamp")
+    )
+    latlng = np.array([(lat, lng) for lat, lng, _ in rows], dtype=np.float64).reshape(-1, 2)
+    ts = timestamps_ms([t for _, _, t in rows]) / 1000.0
+    return latlng, ts, rows[-1][2] if rows else None
+
+
+def update_route_stats(route, oldest=None, full=False):
+    """
+    Route-un RouteStats sətrini yenilə.
+    oldest — yeni əlavə olunan nöqtələrin ən köhnə vaxtı; əvvəl emal olunmuş quyruqdan
+    köhnədirsə (offline gecikmiş nöqtələr) statistika sıfırdan hesablanır.
+    """
+    from .models import RouteStats
+
+    with transaction.atomic():
+        stats = RouteStats.objects.select_for_update().filter(route=route).first()
+        if stats is None:
+            stats = RouteStats(route=route)
+            full = True
+        elif stats.tail_timestamp is None or (oldest is not None and oldest <= stats.tail_timestamp):
+            full = True
+
+        if full:
+            latlng, ts, last_timestamp = _load_points(route)
+            new_count = len(ts)
+            histogram = np.zeros(SPEED_HISTOGRAM_BINS)
+            open_idle = 0.0
+            base = {"distance_m": 0.0, "moving_seconds": 0.0, "idle_seconds": 0.0,
+                    "stop_count": 0, "max_speed_kmh": 0.0}
+        else:
+            latlng, ts, last_timestamp = _load_points(route, after=stats.tail_timestamp)
+            new_count = len(ts)
+            if not new_count:
+                return stats
+            # Əvvəlki son nöqtə ilə birləşdir ki, aradakı seqment itməsin
+            latlng = np.vstack(([[stats.tail_latitude, stats.tail_longitude]], latlng))
+            ts = np.concatenate(([stats.tail_timestamp.timestamp()], ts))
+            histogram = np.zeros(SPEED_HISTOGRAM_BINS)
+            histogram[:len(stats.speed_histogram)] = stats.speed_histogram[:SPEED_HISTOGRAM_BINS]
+            open_idle = stats.open_idle_seconds
+            base = {"distance_m": stats.distance_m, "moving_seconds": stats.moving_seconds,
+                    "idle_seconds": stats.idle_seconds, "stop_count": stats.stop_count,
+                    "max_speed_kmh": stats.max_speed_kmh}
+
+        part = analyze(latlng[:, 0], latlng[:, 1], ts, open_idle_seconds=open_idle)
+
+        stats.point_count = new_count if full else stats.point_count + new_count
+        stats.distance_m = base["distance_m"] + part["distance_m"]
+        stats.moving_seconds = base["moving_seconds"] + part["moving_seconds"]
+        stats.idle_seconds = base["idle_seconds"] + part["idle_seconds"]
+        stats.stop_count = base["stop_count"] + part["stop_count"]
+        stats.max_speed_kmh = max(base["max_speed_kmh"], part["max_speed_kmh"])
+        stats.speed_histogram = np.trim_zeros(np.round(histogram + part["speed_histogram"], 1), "b").tolist()
+        stats.open_idle_seconds = part["open_idle_seconds"]
+        if new_count:
+            stats.tail_timestamp = last_timestamp
+            stats.tail_latitude = float(latlng[-1, 0])
+            stats.tail_longitude = float(latlng[-1, 1])
+        stats.save()
+        return stats
+
+
+def safe_update_route_stats(route, oldest=None):
+    """Ingest-dən çağırılır — statistika xətası nöqtə qəbulunu sındırmamalıdır"""
+    try:
+        update_route_stats(route, oldest=oldest)
+    except Exception as e:
+        logger.warning(f"[ROUTE_STATS] Route {route.id} update error: {e}")
+
+
+def throttled_update_route_stats(route, timestamp):
+    """
+    Tək nöqtə ingest-i üçün: route başına ən çox ROUTE_STATS_POINT_INTERVAL saniyədə bir
+    yeniləmə (cache.add), stats sətri hər nöqtədə kilidlənmir. Arada yazılan nöqtələr
+    növbəti yeniləmədə tail_timestamp-dan sonrakı quyruq kimi emal olunur.
+    Artıq emal olunmuş quyruqdan köhnə (gecikmiş) nöqtə üçün şərtli UPDATE
+    tail_timestamp-ı silir — növbəti yeniləmə tam hesablayır (adətən 0 sətir dəyişir).
+    """
+    from .models import RouteStats
+
+    RouteStats.objects.filter(route=route, tail_timestamp__gte=timestamp).update(tail_timestamp=None)
+    interval = float(getattr(settings, "ROUTE_STATS_POINT_INTERVAL", 60))
+    if interval <= 0 or cache.add(THROTTLE_KEY.format(route.id), 1, interval):
+        safe_update_route_stats(route)
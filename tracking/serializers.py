@@ -3,7 +3,10 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 
-from .models import Route, LocationPoint, VisitSchedule, HospitalVisit, UserProfile, Notification, Medicine, VisitedPharmacy, VisitedPharmacyItem
+from . import compact_points, dashboard_counters, liveness, user_activity
+from .active_routes import get_active_route, remember as remember_active_route
+from .route_analytics import safe_update_route_stats, throttled_update_route_stats
+from .models import Route, LocationPoint, LastLocation, VisitSchedule, HospitalVisit, UserProfile, Notification, Medicine, VisitedPharmacy, VisitedPharmacyItem
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -110,15 +113,25 @@ class RouteSerializer(serializers.ModelSerializer):
         fields = ["id", "start_time", "end_time", "points"]
 
 
+class RouteSummarySerializer(serializers.ModelSerializer):
+    """Nöqtəsiz route siyahısı — nöqtələr /routes/<id>/points/ ilə ayrıca çəkilir"""
+    point_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Route
+        fields = ["id", "start_time", "end_time", "is_paused", "last_location_time", "point_count"]
+
+
 class StartRouteSerializer(serializers.Serializer):
     def create(self, validated_data):
         from .models import LocationPermissionReport
         user = self.context["request"].user
         # Only allow one active (no end_time) route
-        active = Route.objects.filter(user=user, end_time__isnull=True).first()
+        active = get_active_route(user.id, fresh=True)
         if active:
             return active
         route = Route.objects.create(user=user, start_time=timezone.now())
+        remember_active_route(route)
         LocationPermissionReport.objects.create(user=user, reason="location_started")
         return route
 
@@ -126,34 +139,33 @@ class StartRouteSerializer(serializers.Serializer):
 class StopRouteSerializer(serializers.Serializer):
     def save(self, **kwargs):
         user = self.context["request"].user
-        route = (
-            Route.objects.filter(user=user, end_time__isnull=True)
-            .order_by("-start_time")
-            .first()
-        )
+        route = get_active_route(user.id, fresh=True)
         if not route:
             raise serializers.ValidationError("No active route to stop.")
+        # Flush olunmamış son heartbeat route bağlanmadan yazılsın
+        liveness.attach([route])
         route.end_time = timezone.now()
-        route.save(update_fields=["end_time"])
+        route.save(update_fields=["end_time", "last_ping", "last_battery_level"])
+        remember_active_route(route)
+        # Tək nöqtə yolunda throttle səbəbindən emal olunmamış son nöqtələr
+        safe_update_route_stats(route)
         return route
 
 
-class CreateLocationSerializer(serializers.Serializer):
+class LocationInputSerializer(serializers.Serializer):
+    """Tək nöqtənin sahələri və aktiv route (yoxdursa 400). Queue rejimində save()
+    çağırılmır — validated_data (route daxil) ingest_queue.enqueue-ya verilir"""
     latitude = serializers.DecimalField(max_digits=9, decimal_places=6)
     longitude = serializers.DecimalField(max_digits=9, decimal_places=6)
     timestamp = serializers.DateTimeField()
     accuracy = serializers.FloatField(required=False)
     speed = serializers.FloatField(required=False)
-    battery_level = serializers.IntegerField(required=False)
+    battery_level = serializers.IntegerField(required=False, min_value=0, max_value=100)
     is_online = serializers.BooleanField(required=False, default=True)
 
     def validate(self, attrs):
         user = self.context["request"].user
-        route = (
-            Route.objects.filter(user=user, end_time__isnull=True)
-            .order_by("-start_time")
-            .first()
-        )
+        route = get_active_route(user.id)
         if not route:
             raise serializers.ValidationError(
                 "No active route. Call /api/routes/start/ first."
@@ -161,7 +173,10 @@ class CreateLocationSerializer(serializers.Serializer):
         attrs["route"] = route
         return attrs
 
+
+class CreateLocationSerializer(LocationInputSerializer):
     def create(self, validated_data):
+        from django.db import IntegrityError, transaction
         from django.utils import timezone
         route = validated_data["route"]
         latitude = validated_data["latitude"]
@@ -178,16 +193,30 @@ class CreateLocationSerializer(serializers.Serializer):
         route.is_online = is_online
         route.save(update_fields=['last_location_time', 'last_ping', 'is_online'])
         
-        return LocationPoint.objects.create(
-            route=route,
-            latitude=latitude,
-            longitude=longitude,
-            timestamp=timestamp,
-            accuracy=accuracy,
-            speed=speed,
-            battery_level=battery_level,
-            is_online=is_online,
-        )
+        try:
+            with transaction.atomic():
+                point = LocationPoint.objects.create(
+                    route=route,
+                    latitude=latitude,
+                    longitude=longitude,
+                    timestamp=timestamp,
+                    accuracy=accuracy,
+                    speed=speed,
+                    battery_level=battery_level,
+                    is_online=is_online,
+                )
+        except IntegrityError:
+            # Təkrar göndəriş (eyni route + timestamp) — mövcud nöqtəni qaytar
+            return LocationPoint.objects.get(route=route, timestamp=timestamp)
+        dashboard_counters.record_points([timestamp])
+        user_activity.record_points(route, [timestamp])
+        if compact_points.dual_write_enabled():
+            compact_points.insert_point(
+                route, latitude, longitude, timestamp, accuracy, speed, battery_level, is_online
+            )
+        LastLocation.record(route, latitude, longitude, timestamp, battery_level)
+        throttled_update_route_stats(route, timestamp)
+        return point
 
 
 class VisitScheduleSerializer(serializers.ModelSerializer):
@@ -0,0 +1,126 @@
+"""
+Solvey Doctor Directory
+/api/solvey/doctors/ üçün həkim kataloqu.
+
+- həkimlər və klinika adları bir sorğu ilə (klinika adı korrelyasiyalı subquery
+  ilə — SolveyDoctor-da FK yoxdur) və .values() ilə çəkilir; həkim başına
+  SolveyHospital sorğusu və logging üçün count() yoxdur
+- hazır siyahı Django cache-də (region, city, hospital) filtrləri üzrə
+  SOLVEY_DIRECTORY_CACHE_TTL saniyə saxlanılır (0 — keş yoxdur); versiya və
+  sətir hash-ləri (tracking.catalog_versions) keş doldurularkən bir dəfə
+  hesablanıb siyahı ilə birlikdə saxlanılır
+- invalidate() versiya açarını artırır — bütün filtr kombinasiyaları birdən köhnəlir
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "solvey-doctors:v{}:{}:{}:{}:{}"
+VERSION_KEY = "solvey-doctors:version"
+FIELDS = ("id", "ad", "ixtisas", "kategoriya", "derece", "cinsiyyet", "number",
+          "bolge_id", "city_id", "klinika_id", "previous_debt")
+
+
+def _cache_ttl() -> int:
+    return int(getattr(settings, "SOLVEY_DIRECTORY_CACHE_TTL", 600))
+
+
+def _version() -> int:
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def split_degree(derece) -> Tuple[str, str]:
+    """derece → (vip, dərəcə): "VIP" → ("VIP", ""), "VIP II" → ("VIP", "II"), "II" → ("", "II")"""
+    if not derece:
+        return "", ""
+    value = str(derece).strip().upper()
+    if value.startswith("VIP"):
+        return "VIP", value[3:].strip()
+    return "", value
+
+
+def _doctor_data(row: Dict) -> Dict:
+    vip, degree = split_degree(row["derece"])
+    debt = row["previous_debt"]
+    return {
+        "id": row["id"],
+        "name": row["ad"] or "",
+        "specialty": row["ixtisas"] or "",
+        "category": row["kategoriya"] or "",
+        "degree": degree,  # Yalnız dərəcə (I, II, III)
+        "vip": vip,
+        "gender": row["cinsiyyet"] or "",
+        "region_id": row["bolge_id"],
+        "city_id": row["city_id"],
+        "hospital_id": row["klinika_id"],
+        "hospital": row["hospital_name"] or "",
+        "phone": (row["number"] or "").strip(),
+        "previous_debt": float(debt) if debt is not None else None,  # Əvvəlki borc
+    }
+
+
+def load_doctors(region_id: Optional[int] = None, city_id: Optional[int] = None,
+                 hospital_id: Optional[int] = None, using: Optional[str] = None) -> List[Dict]:
+    """Keşsiz oxu — bir SQL sorğusu (using — default: solvey_read_db(); "default" — lokal güzgü)"""
+    from .db_router import solvey_read_db
+    from .models_solvey import MIRRORS, SolveyDoctor, SolveyHospital
+
+    using = using or solvey_read_db()
+    doctor_model, hospital_model = SolveyDoctor, SolveyHospital
+    if using == "default":
+        doctor_model, hospital_model = MIRRORS[SolveyDoctor], MIRRORS[SolveyHospital]
+    hospital_name = hospital_model.objects.using(using).filter(id=OuterRef("klinika_id")).values("hospital_name")[:1]
+    doctors = doctor_model.objects.using(using).all()
+    if region_id is not None:
+        doctors = doctors.filter(bolge_id=region_id)
+    if city_id is not None:
+        doctors = doctors.filter(city_id=city_id)
+    if hospital_id is not None:
+        doctors = doctors.filter(klinika_id=hospital_id)
+    rows = doctors.annotate(hospital_name=Subquery(hospital_name)).order_by("ad").values(*FIELDS, "hospital_name")
+    return [_doctor_data(row) for row in rows]
+
+
+def _entry(data: List[Dict]) -> Dict:
+    from .catalog_versions import snapshot
+
+    return {"data": data, **snapshot("doctors", data)}
+
+
+def get_catalog(region_id: Optional[int] = None, city_id: Optional[int] = None,
+                hospital_id: Optional[int] = None, using: Optional[str] = None) -> Dict:
+    """Hazır kataloq: {"data", "version", "hashes"}"""
+    from .db_router import solvey_read_db
+
+    using = using or solvey_read_db()
+    ttl = _cache_ttl()
+    if ttl <= 0:
+        return _entry(load_doctors(region_id, city_id, hospital_id, using))
+
+    key = CACHE_KEY.format(_version(), using, region_id, city_id, hospital_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _entry(load_doctors(region_id, city_id, hospital_id, using))
+        cache.set(key, entry, ttl)
+        logger.info(
+            f"[SOLVEY_DOCTORS] Loaded {len(entry['data'])} doctors "
+            f"(region={region_id}, city={city_id}, hospital={hospital_id})"
+        )
+    return entry
+
+
+def get_doctors(region_id: Optional[int] = None, city_id: Optional[int] = None,
+                hospital_id: Optional[int] = None, using: Optional[str] = None) -> List[Dict]:
+    return get_catalog(region_id, city_id, hospital_id, using)["data"]
@@ -0,0 +1,156 @@
+"""
+Solvey Mirror
+Solvey arayış cədvəllərinin (bölgə, şəhər, xəstəxana, həkim, dərman) default DB-də
+lokal güzgüsü — SOLVEY_READ_MODE=mirror olduqda mobil sorğular uzaq DB-yə getmir
+(WAN gecikməsi yoxdur, Solvey yavaş/əlçatmaz olanda da işləyir).
+
+- full — uzaq cədvəl id keyset hissələri ilə oxunur və upsert olunur, uzaqda
+  olmayan sətirlər silinir; hamısı bir transaction-da (oxuyan yarımçıq güzgü görmür)
+- incremental — yalnız güzgüdəki maksimum id-dən sonrakı sətirlər (yeni qeydlər).
+  Uzaq cədvəllərdə dəyişmə vaxtı sütunu yoxdur — dəyişən sahələr (borc, qiymət)
+  SOLVEY_MIRROR_FULL_EVERY saniyədə bir full sync ilə yenilənir
+- sync() hər cədvəl üçün özü seçir: full heç olmayıbsa və ya vaxtı keçibsə full,
+  əks halda incremental. Vəziyyət və son xəta SolveyMirrorState-də
+- dərman cədvəlinin adı Solvey-də fərqli ola bilər (SOLVEY_MEDICINES_TABLE) —
+  ad external_service.ExternalSchema-dan (keşli) götürülür
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DB = "external"
+
+
+def _tables() -> Dict:
+    from .models_solvey import (
+        SolveyCity, SolveyCityMirror, SolveyDoctor, SolveyDoctorMirror, SolveyHospital,
+        SolveyHospitalMirror, SolveyMedicine, SolveyMedicineMirror, SolveyRegion, SolveyRegionMirror,
+    )
+    return {
+        "regions": (SolveyRegion, SolveyRegionMirror),
+        "cities": (SolveyCity, SolveyCityMirror),
+        "hospitals": (SolveyHospital, SolveyHospitalMirror),
+        "doctors": (SolveyDoctor, SolveyDoctorMirror),
+        "medicines": (SolveyMedicine, SolveyMedicineMirror),
+    }
+
+
+TABLE_NAMES = ("regions", "cities", "hospitals", "doctors", "medicines")
+
+
+def _chunk_size() -> int:
+    return int(getattr(settings, "SOLVEY_MIRROR_CHUNK", 5000))
+
+
+def _full_every() -> float:
+    return float(getattr(settings, "SOLVEY_MIRROR_FULL_EVERY", 3600))
+
+
+def _source_table(name, source_model, source) -> Optional[str]:
+    if name == "medicines":
+        # Dərman cədvəlinin adı Solvey-də fərqli ola bilər — keşli schema-dan
+        from .external_service import get_external_schema
+        return get_external_schema(source).table("medicines")
+    return source_model._meta.db_table
+
+
+def _fetch(cursor, table, columns, after_id, limit):
+    quote = cursor.db.ops.quote_name
+    cursor.execute(
+        f"SELECT {', '.join(quote(c) for c in columns)} FROM {quote(table)} "
+        f"WHERE {quote('id')} > %s ORDER BY {quote('id')} LIMIT %s",
+        [after_id, limit],
+    )
+    return cursor.fetchall()
+
+
+def sync_table(name: str, full: bool, source: str = SOURCE_DB) -> Dict:
+    """Bir cədvəli güzgülə; {"rows", "deleted", "full", "seconds"} qaytarır"""
+    source_model, mirror_model = _tables()[name]
+    fields = [f for f in source_model._meta.concrete_fields]
+    columns = [f.column for f in fields]
+    attnames = [f.attname for f in fields]
+    update_fields = [a for a in attnames if a != "id"] + ["synced_at"]
+    started = time.perf_counter()
+    synced_at = timezone.now()
+    chunk = _chunk_size()
+
+    with transaction.atomic(using="default"), connections[source].cursor() as cursor:
+        table = _source_table(name, source_model, source)
+        if table is None:
+            raise LookupError(f"{name}: Solvey-də cədvəl tapılmadı")
+        after_id = 0
+        if not full:
+            after_id = mirror_model.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+        rows = 0
+        while True:
+            batch = _fetch(cursor, table, columns, after_id, chunk)
+            if not batch:
+                break
+            mirror_model.objects.bulk_create(
+                [mirror_model(synced_at=synced_at, **dict(zip(attnames, row))) for row in batch],
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=update_fields,
+            )
+            rows += len(batch)
+            after_id = batch[-1][attnames.index("id")]
+
+        deleted = 0
+        if full:
+            # Bu sync-də görünməyən sətirlər Solvey-dən silinib
+            deleted, _ = mirror_model.objects.exclude(synced_at=synced_at).delete()
+
+    return {"rows": rows, "deleted": deleted, "full": full, "seconds": time.perf_counter() - started}
+
+
+def sync(names: Optional[Iterable[str]] = None, full: Optional[bool] = None, source: str = SOURCE_DB) -> Dict:
+    """Cədvəlləri güzgülə. full=None — vəziyyətə görə avtomatik seçim.
+    Bir cədvəlin xətası digərlərini dayandırmır; nəticə: ad → dict və ya {"error": ...}"""
+    from . import medicine_catalog, solvey_directory
+    from .models_solvey import SolveyMirrorState
+
+    results = {}
+    for name in names or TABLE_NAMES:
+        state, _ = SolveyMirrorState.objects.get_or_create(table=name)
+        now = timezone.now()
+        run_full = full
+        if run_full is None:
+            run_full = state.last_full_sync_at is None or (
+                now - state.last_full_sync_at > timedelta(seconds=_full_every())
+            )
+        try:
+            result = sync_table(name, run_full, source)
+        except Exception as e:
+            logger.error(f"[SOLVEY_MIRROR] {name} sync failed: {e}")
+            state.last_error = str(e)
+            state.save(update_fields=["last_error"])
+            results[name] = {"error": str(e)}
+            continue
+
+        _, mirror_model = _tables()[name]
+        state.last_sync_at = now
+        if run_full:
+            state.last_full_sync_at = now
+        state.row_count = mirror_model.objects.count()
+        state.last_error = ""
+        state.save()
+        results[name] = result
+        logger.info(
+            f"[SOLVEY_MIRROR] {name}: {'full' if run_full else 'incremental'} "
+            f"{result['rows']} rows, {result['deleted']} deleted, {result['seconds']:.1f}s"
+        )
+
+    if any(results.get(n, {}).get("rows") or results.get(n, {}).get("deleted") for n in ("doctors", "hospitals")):
+        solvey_directory.invalidate()
+    if results.get("medicines", {}).get("rows") or results.get("medicines", {}).get("deleted"):
+        medicine_catalog.invalidate()
+    return results
@@ -0,0 +1,252 @@
+"""
+Stop Detection
+Konum axınında dayanma (dwell) yerlərini tapır və xəstəxana koordinatları ilə
+uyğunlaşdırır — nümayəndəyə ziyarət təklif etmək üçün.
+
+Dayanma (vektorlaşdırılmış): nöqtədən DWELL_WINDOW_SECONDS sonrakı nöqtə
+DWELL_RADIUS_M daxilindədirsə nöqtə "yavaş" sayılır; ardıcıl yavaş nöqtələr
+DWELL_MIN_SECONDS-dan uzun davam edirsə dayanacaqdır. Pəncərə GPS titrəməsini
+udur (tək-tək seqment sürətindən fərqli olaraq).
+
+Uyğunlaşdırma: xəstəxanalar MATCH_RADIUS_M ölçülü grid hash-ə yığılır, hər
+dayanacaq üçün yalnız 3×3 qonşu xanalar yoxlanılır.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .route_analytics import haversine
+
+DWELL_RADIUS_M = 75.0
+DWELL_WINDOW_SECONDS = 120.0
+DWELL_MIN_SECONDS = 300.0
+MERGE_GAP_SECONDS = 180.0
+MATCH_RADIUS_M = 150.0
+
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+@dataclass
+class Stop:
+    route_id: Optional[int]
+    start: float  # epoch saniyə
+    end: float
+    latitude: float
+    longitude: float
+    point_count: int
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class Hospital:
+    name: str
+    latitude: float
+    longitude: float
+    source: str  # 'schedule' | 'visit'
+
+
+def detect_stops(lat: np.ndarray, lng: np.ndarray, ts: np.ndarray, route_id: Optional[int] = None) -> List[Stop]:
+    """Bir route-un (vaxta görə sıralı) nöqtələrindən dayanacaqlar"""
+    n = len(ts)
+    if n < 2:
+        return []
+
+    # Hər nöqtə üçün pəncərənin sonundakı nöqtə
+    j = np.minimum(np.searchsorted(ts, ts + DWELL_WINDOW_SECONDS, side="left"), n - 1)
+    slow = (j > np.arange(n)) & (haversine(lat, lng, lat[j], lng[j]) <= DWELL_RADIUS_M)
+    if not slow.any():
+        return []
+
+    edges = np.diff(np.concatenate(([0], slow.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1
+    # Dayanacaq pəncərənin sonuna qədər uzanır
+    span_ends = j[run_ends]
+
+    # Mərkəz: span daxilindəki nöqtələrin ortası (kumulyativ cəm ilə)
+    lat_cum = np.concatenate(([0.0], np.cumsum(lat)))
+    lng_cum = np.concatenate(([0.0], np.cumsum(lng)))
+    counts = span_ends - run_starts + 1
+    centre_lat = (lat_cum[span_ends + 1] - lat_cum[run_starts]) / counts
+    centre_lng = (lng_cum[span_ends + 1] - lng_cum[run_starts]) / counts
+
+    stops: List[Stop] = []
+    for k in range(len(run_starts)):
+        stop = Stop(
+            route_id=route_id,
+            start=float(ts[run_starts[k]]),
+            end=float(ts[span_ends[k]]),
+            latitude=float(centre_lat[k]),
+            longitude=float(centre_lng[k]),
+            point_count=int(counts[k]),
+        )
+        previous = stops[-1] if stops else None
+        if previous and stop.start - previous.end <= MERGE_GAP_SECONDS and _distance(previous, stop) <= DWELL_RADIUS_M:
+            # Qısa titrəmə ilə bölünmüş eyni dayanacaq
+            total = previous.point_count + stop.point_count
+            previous.latitude = (previous.latitude * previous.point_count + stop.latitude * stop.point_count) / total
+            previous.longitude = (previous.longitude * previous.point_count + stop.longitude * stop.point_count) / total
+            previous.end = max(previous.end, stop.end)
+            previous.point_count = total
+            continue
+        stops.append(stop)
+    return [s for s in stops if s.duration_seconds >= DWELL_MIN_SECONDS]
+
+
+def _distance(a, b) -> float:
+    return float(haversine(a.latitude, a.longitude, b.latitude, b.longitude))
+
+
+def detect_stops_grouped(route_ids: np.ndarray, lat: np.ndarray, lng: np.ndarray, ts: np.ndarray) -> List[Stop]:
+    """Bir neçə route-un (route_id, timestamp üzrə sıralı) birləşik massivlərindən dayanacaqlar"""
+    if not len(route_ids):
+        return []
+    boundaries = np.flatnonzero(np.diff(route_ids)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(route_ids)]))
+    stops: List[Stop] = []
+    for start, end in zip(starts, ends):
+        stops.extend(detect_stops(lat[start:end], lng[start:end], ts[start:end], int(route_ids[start])))
+    return stops
+
+
+class HospitalIndex:
+    """Xəstəxana koordinatları üçün grid hash (xana ölçüsü = uyğunlaşma radiusu)"""
+
+    def __init__(self, hospitals: Iterable[Hospital], radius_m: float = MATCH_RADIUS_M):
+        self.radius_m = radius_m
+        self.hospitals = list(hospitals)
+        ref_lat = float(np.mean([h.latitude for h in self.hospitals])) if self.hospitals else 0.0
+        self.cell_lat = radius_m / METERS_PER_DEGREE_LAT
+        self.cell_lng = radius_m / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(ref_lat)), 0.01))
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for idx, hospital in enumerate(self.hospitals):
+            self.cells.setdefault(self._cell(hospital.latitude, hospital.longitude), []).append(idx)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return int(math.floor(latitude / self.cell_lat)), int(math.floor(longitude / self.cell_lng))
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Tuple[Hospital, float]]:
+        """Radius daxilində ən yaxın xəstəxana və məsafəsi (metr)"""
+        row, col = self._cell(latitude, longitude)
+        candidates = [
+            idx
+            for d_row in (-1, 0, 1)
+            for d_col in (-1, 0, 1)
+            for idx in self.cells.get((row + d_row, col + d_col), ())
+        ]
+        if not candidates:
+            return None
+        lats = np.array([self.hospitals[i].latitude for i in candidates])
+        lngs = np.array([self.hospitals[i].longitude for i in candidates])
+        distances = haversine(latitude, longitude, lats, lngs)
+        best = int(np.argmin(distances))
+        if distances[best] > self.radius_m:
+            return None
+        return self.hospitals[candidates[best]], float(distances[best])
+
+
+def load_hospitals() -> List[Hospital]:
+    """VisitSchedule və HospitalVisit-dəki koordinatlı xəstəxanalar (ad + koordinat üzrə unikal)"""
+    from .models import HospitalVisit, VisitSchedule
+
+    seen = set()
+    hospitals = []
+    for source, model in (("schedule", VisitSchedule), ("visit", HospitalVisit)):
+        rows = (
+            model.objects.filter(hospital_latitude__isnull=False, hospital_longitude__isnull=False)
+            .values_list("hospital_name", "hospital_latitude", "hospital_longitude")
+            .distinct()
+        )
+        for name, lat, lng in rows:
+            key = (name.strip().lower(), round(float(lat), 4), round(float(lng), 4))
+            if key in seen:
+                continue
+            seen.add(key)
+            hospitals.append(Hospital(name=name, latitude=float(lat), longitude=float(lng), source=source))
+    return hospitals
+
+
+def match_stops(stops: Iterable[Stop], index: HospitalIndex) -> List[Tuple[Stop, Hospital, float]]:
+    """Hər dayanacağı ən yaxın xəstəxana ilə cütləşdir (radiusdan kənardakılar atılır)"""
+    matches = []
+    for stop in stops:
+        found = index.nearest(stop.latitude, stop.longitude)
+        if found:
+            matches.append((stop, found[0], found[1]))
+    return matches
+
+
+def load_point_arrays(queryset):
+    """LocationPoint queryset → (route_ids, lat, lng, ts) massivləri, route və vaxt üzrə sıralı"""
+    from .geometry import timestamps_ms
+
+    rows = list(
+        queryset.order_by("route_id", "timestamp", "id")
+        .values_list("route_id", "latitude", "longitude", "timestamp")
+    )
+    route_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    lat = np.array([r[1] for r in rows], dtype=np.float64)
+    lng = np.array([r[2] for r in rows], dtype=np.float64)
+    ts = timestamps_ms([r[3] for r in rows]) / 1000.0
+    return route_ids, lat, lng, ts
+
+
+def suggest_visits(user, date, hospitals: Optional[List[Hospital]] = None) -> List[Dict]:
+    """
+    İstifadəçinin həmin gün xəstəxana yaxınlığındakı dayanacaqları — ziyarət təklifləri.
+    Artıq qeyd olunmuş ziyarətlər (eyni gün, eyni xəstəxana adı) təklif olunmur; eyni
+    xəstəxana yanında bir neçə dayanacaq varsa yalnız ən uzunu təklif olunur.
+    Nəticə HospitalVisitSerializer sahələri ilə uyğundur.
+    """
+    from datetime import datetime, timedelta
+
+    from django.utils import timezone
+
+    from .models import HospitalVisit, LocationPoint
+
+    if hospitals is None:
+        hospitals = load_hospitals()
+    if not hospitals:
+        return []
+
+    # timestamp__date partition pruning-ə mane olur — günün sərhədləri ilə aralıq
+    tz = timezone.get_current_timezone()
+    day_start = timezone.make_aware(datetime.combine(date, datetime.min.time()), tz)
+    points = LocationPoint.objects.filter(route__user=user).between(day_start, day_start + timedelta(days=1))
+    stops = detect_stops_grouped(*load_point_arrays(points))
+    matches = match_stops(stops, HospitalIndex(hospitals))
+
+    logged = {
+        name.strip().lower()
+        for name in HospitalVisit.objects.filter(user=user, visit_date=date).values_list("hospital_name", flat=True)
+    }
+    longest = {}
+    for stop, hospital, distance in matches:
+        name = hospital.name.strip().lower()
+        if name in logged:
+            continue
+        if name not in longest or stop.duration_seconds > longest[name][0].duration_seconds:
+            longest[name] = (stop, hospital, distance)
+    suggestions = []
+    for stop, hospital, distance in sorted(longest.values(), key=lambda match: match[0].start):
+        arrival = datetime.fromtimestamp(stop.start, tz=tz)
+        departure = datetime.fromtimestamp(stop.end, tz=tz)
+        suggestions.append({
+            "route": stop.route_id,
+            "hospital_name": hospital.name,
+            "hospital_latitude": round(hospital.latitude, 6),
+            "hospital_longitude": round(hospital.longitude, 6),
+            "source": hospital.source,
+            "distance_m": round(distance, 1),
+            "visit_date": arrival.date().isoformat(),
+            "check_in_time": arrival.time().replace(microsecond=0).isoformat(),
+            "check_out_time": departure.time().replace(microsecond=0).isoformat(),
+            "duration_minutes": int(stop.duration_seconds / 60),
+        })
+    return suggestions
@@ -18,6 +18,9 @@ from .views import (
     CurrentUserView,
     LastLocationsView,
     RoutesListView,
+    RouteSummaryListView,
+    RoutePointsView,
+    RouteGeometryView,
     VisitScheduleViewSet,
     HospitalVisitViewSet,
     NotificationListView,
@@ -51,7 +54,9 @@ urlpatterns = [
     path("users/register/", RegisterView.as_view(), name="register-users"),  # Mobile app compatibility
     path("users/login/", LoginView.as_view(), name="login-users"),  # Mobile app compatibility
     path("movqe-son-json/", LastLocationsView.as_view(), name="last-locations"),
+    path("movqe-son-stream/", views.live_locations_stream, name="last-locations-stream"),
     path("routes/", RoutesListView.as_view(), name="routes-list"),
+    path("routes/summary/", RouteSummaryListView.as_view(), name="routes-summary"),
     path("routes/start/", StartRouteView.as_view(), name="route-start"),
     path("routes/stop/", StopRouteView.as_view(), name="route-stop"),
     path("routes/heartbeat/", HeartbeatView.as_view(), name="route-heartbeat"),
@@ -60,6 +65,8 @@ urlpatterns = [
     path("locations/", CreateLocationView.as_view(), name="location-create"),
     path("locations/batch/", BatchLocationView.as_view(), name="location-batch"),
     path("routes/<int:pk>/", RouteDetailView.as_view(), name="route-detail"),
+    path("routes/<int:pk>/points/", RoutePointsView.as_view(), name="route-points"),
+    path("routes/<int:pk>/geometry/", RouteGeometryView.as_view(), name="route-geometry"),
     path("notifications/", NotificationListView.as_view(), name="notification-list"),
     path("notifications/create/", NotificationCreateView.as_view(), name="notification-create"),
     path("notifications/<int:pk>/mark-read/", NotificationMarkReadView.as_view(), name="notification-mark-read"),
@@ -98,6 +105,7 @@ urlpatterns = [
     path("visited-doctors/", views.add_visited_doctor, name="add-visited-doctor"),
     path("visited-doctors/list/", views.get_visited_doctors, name="get-visited-doctors"),
     path("cron/reset-visited-doctors/", views.cron_reset_visited_doctors, name="cron-reset-visited-doctors"),
+    path("metrics/", views.query_metrics_view, name="query-metrics"),
     # Medicines
     path("medicines/", views.get_medicines, name="get-medicines"),
     path("medicines/<int:medicine_id>/", views.get_medicine_detail, name="get-medicine-detail"),
@@ -0,0 +1,142 @@
+"""
+User Activity
+UserActivity xülasəsinin (route sayı, nöqtə sayı, son aktivlik, aktiv route) saxlanması.
+
+- nöqtələr — ingest yolları yazılan nöqtələrin vaxtlarını record_points() ilə bildirir
+- route başlanğıcı/bitişi/silinməsi — Route post_save/post_delete siqnalları
+- yeniləmələr commit-dən sonra qısa UPDATE ilə; sətir yoxdursa istifadəçi
+  mənbədən (Route + RouteStats, fan-out olmadan) yenidən hesablanır
+- rebuild_users() — hamısını və ya verilmiş istifadəçiləri yenidən hesablayır
+  (rebuild_user_activity əmri, migration)
+"""
+import logging
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+def _later(newest):
+    """last_activity = max(last_activity, newest) — NULL-u da nəzərə alır"""
+    return Case(
+        When(Q(last_activity__isnull=True) | Q(last_activity__lt=newest), then=Value(newest)),
+        default=F("last_activity"),
+    )
+
+
+def _after_commit(fn, *args) -> None:
+    def apply():
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"[USER_ACTIVITY] Update failed: {e}")
+
+    transaction.on_commit(apply)
+
+
+def _apply_points(user_id: int, count: int, newest) -> None:
+    from .models import UserActivity
+
+    updated = UserActivity.objects.filter(user_id=user_id).update(
+        point_count=F("point_count") + count, last_activity=_later(newest)
+    )
+    if not updated:
+        rebuild_users([user_id])
+
+
+def _route_started(user_id: int, start_time) -> None:
+    from .models import UserActivity
+
+    updated = UserActivity.objects.filter(user_id=user_id).update(
+        route_count=F("route_count") + 1, has_active_route=True, last_activity=_later(start_time)
+    )
+    if not updated:
+        rebuild_users([user_id])
+
+
+def _refresh_active(user_id: int) -> None:
+    from .models import Route, UserActivity
+
+    active = Route.objects.filter(user_id=user_id, end_time__isnull=True).exists()
+    if not UserActivity.objects.filter(user_id=user_id).update(has_active_route=active):
+        rebuild_users([user_id])
+
+
+def record_points(route, timestamps: List) -> None:
+    if timestamps:
+        _after_commit(_apply_points, route.user_id, len(timestamps), max(timestamps))
+
+
+def _on_route_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        _after_commit(_route_started, instance.user_id, instance.start_time)
+    elif update_fields is None or "end_time" in update_fields:
+        _after_commit(_refresh_active, instance.user_id)
+
+
+def _on_route_delete(sender, instance, **kwargs):
+    _after_commit(rebuild_users, [instance.user_id])
+
+
+def connect_signals() -> None:
+    from django.db.models.signals import post_delete, post_save
+
+    from .models import Route
+
+    post_save.connect(_on_route_save, sender=Route, dispatch_uid="user_activity_route_save")
+    post_delete.connect(_on_route_delete, sender=Route, dispatch_uid="user_activity_route_delete")
+
+
+def rebuild_users(user_ids: Optional[Iterable[int]] = None, apps=None) -> int:
+    """Route + RouteStats-dan yenidən hesabla (nöqtə cədvəli sayılmır). Yazılan sətir sayı."""
+    if apps is None:
+        from django.apps import apps
+    Route = apps.get_model("tracking", "Route")
+    UserActivity = apps.get_model("tracking", "UserActivity")
+
+    routes = Route.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        routes = routes.filter(user_id__in=user_ids)
+    # Route ilə RouteStats bir-birə — JOIN sətir sayını artırmır
+    rows = routes.values("user_id").annotate(
+        route_count=Count("id"),
+        point_count=Sum("stats__point_count"),
+        last_start=Max("start_time"),
+        last_point=Max("last_location_time"),
+        active=Count("id", filter=Q(end_time__isnull=True)),
+    ).order_by()
+
+    objects = {}
+    for row in rows:
+        moments = [m for m in (row["last_start"], row["last_point"]) if m is not None]
+        objects[row["user_id"]] = UserActivity(
+            user_id=row["user_id"],
+            route_count=row["route_count"],
+            point_count=row["point_count"] or 0,
+            last_activity=max(moments) if moments else None,
+            has_active_route=row["active"] > 0,
+        )
+    if user_ids:
+        # Route-u qalmayan (amma özü silinməmiş) istifadəçilər sıfırlanır
+        User = UserActivity._meta.get_field("user").related_model
+        for user_id in User.objects.filter(id__in=user_ids).values_list("id", flat=True):
+            objects.setdefault(user_id, UserActivity(user_id=user_id))
+
+    if not objects and user_ids is not None:
+        return 0
+    with transaction.atomic():
+        if user_ids is None:
+            UserActivity.objects.exclude(user_id__in=list(objects)).delete()
+        UserActivity.objects.bulk_create(
+            list(objects.values()),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["route_count", "point_count", "last_activity", "has_active_route", "updated_at"],
+        )
+    return len(objects)
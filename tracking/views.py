@@ -1,16 +1,23 @@
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.response import Response
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.views import APIView
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
-from django.db.models import Max, Count, Q
-from django.shortcuts import render, get_object_or_404
+from django.db import DatabaseError
+from django.db.models import F, Max, Count, Q, Sum
+from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponse
 from django.contrib.auth.decorators import user_passes_test, login_required
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from datetime import datetime, timedelta, timezone as dt_timezone
+import hashlib
+import json
+import re
 import requests
 import os
 import logging
@@ -18,6 +25,9 @@ import logging
 from .models import (
     Route,
     LocationPoint,
+    LastLocation,
+    LocationBatch,
+    RouteStats,
     VisitSchedule,
     HospitalVisit,
     UserProfile,
@@ -26,14 +36,33 @@ from .models import (
     LocationPermissionReport,
     Medicine,
 )
+from . import liveness
+from .active_routes import get_active_route, remember as remember_active_route
+from .geometry import (
+    POLYLINE_PRECISION,
+    encode_binary_routes,
+    encode_polyline,
+    encode_signed,
+    get_route_geometry,
+    timestamps_ms,
+)
+from .renderers import PolylineRenderer, RouteBinaryRenderer
+from .route_analytics import safe_update_route_stats
+from .live_feed import event_stream, get_broker, publish_heartbeat, publish_location
 from .models_solvey import SolveyRegion, SolveyCity, SolveyHospital, SolveyDoctor, SolveyMedicine
+from .db_router import solvey_objects, solvey_read_db
+from .external_service import get_external_schema
+from . import catalog_versions, medicine_catalog
 from .serializers import (
     RegisterSerializer,
     LoginSerializer,
     RouteSerializer,
+    RouteSummarySerializer,
+    LocationPointSerializer,
     StartRouteSerializer,
     StopRouteSerializer,
     CreateLocationSerializer,
+    LocationInputSerializer,
     VisitScheduleSerializer,
     HospitalVisitSerializer,
     UserProfileSerializer,
@@ -48,6 +77,8 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # Logger təyin et
 logger = logging.getLogger(__name__)
 
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -109,18 +140,14 @@ class StopRouteView(APIView):
 class HeartbeatView(APIView):
     """
     Hər 30 saniyədə bir mobil tərəfdən gələn 'mən buradayam' siqnalı.
-    Aktiv route-un last_ping sahəsini yeniləyir.
+    Aktiv route-un last_ping sahəsini yeniləyir — HEARTBEAT_FLUSH_SECONDS > 0 olduqda
+    cache-ə (tracking.liveness), DB-yə isə dövri bulk UPDATE ilə.
     Konum məlumatı deyil — yalnız bağlantı canlılığını göstərir.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        route = (
-            Route.objects
-            .filter(user=request.user, end_time__isnull=True)
-            .order_by('-start_time')
-            .first()
-        )
+        route = get_active_route(request.user.id)
         if not route:
             return Response(
                 {"detail": "Aktiv route tapılmadı."},
@@ -129,6 +156,7 @@ class HeartbeatView(APIView):
         route.last_ping = timezone.now()
         update_fields = ['last_ping']
 
+        battery_int = None
         battery = request.data.get('battery_level')
         if battery is not None:
             try:
@@ -136,10 +164,16 @@ class HeartbeatView(APIView):
                 if 0 <= battery_int <= 100:
                     route.last_battery_level = battery_int
                     update_fields.append('last_battery_level')
+                else:
+                    battery_int = None
             except (ValueError, TypeError):
-                pass
+                battery_int = None
 
-        route.save(update_fields=update_fields)
+        if liveness.enabled():
+            liveness.record(route, battery_int)
+        else:
+            route.save(update_fields=update_fields)
+        publish_heartbeat(route)
         return Response({"ok": True, "last_ping": route.last_ping})
 
 
@@ -149,7 +183,7 @@ class PauseRouteView(APIView):
 
     def post(self, request):
         user = request.user
-        route = Route.objects.filter(user=user, end_time__isnull=True).order_by('-start_time').first()
+        route = get_active_route(user.id, fresh=True)
         
         if not route:
             return Response(
@@ -166,6 +200,8 @@ class PauseRouteView(APIView):
         route.is_paused = True
         route.paused_at = timezone.now()
         route.save(update_fields=['is_paused', 'paused_at'])
+        remember_active_route(route)
+        LastLocation.touch(user.id)
         
         return Response({
             "message": "Route duraklatıldı.",
@@ -180,7 +216,7 @@ class ResumeRouteView(APIView):
 
     def post(self, request):
         user = request.user
-        route = Route.objects.filter(user=user, end_time__isnull=True).order_by('-start_time').first()
+        route = get_active_route(user.id, fresh=True)
         
         if not route:
             return Response(
@@ -202,6 +238,8 @@ class ResumeRouteView(APIView):
         route.is_paused = False
         route.paused_at = None
         route.save(update_fields=['is_paused', 'paused_at', 'total_paused_duration'])
+        remember_active_route(route)
+        LastLocation.touch(user.id)
         
         return Response({
             "message": "Route devam ettiriliyor.",
@@ -218,6 +256,21 @@ class CreateLocationView(generics.CreateAPIView):
         ctx["request"] = self.request
         return ctx
 
+    def create(self, request, *args, **kwargs):
+        from . import ingest_queue
+
+        if not ingest_queue.enabled():
+            return super().create(request, *args, **kwargs)
+        # Write-behind: nöqtə jurnala yazılır, DB-yə drain_location_queue yazır
+        serializer = LocationInputSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        ingest_queue.enqueue(request.user.id, serializer.validated_data)
+        return Response({"queued": True}, status=status.HTTP_202_ACCEPTED)
+
+    def perform_create(self, serializer):
+        point = serializer.save()
+        publish_location(point.route, point.latitude, point.longitude, point.battery_level)
+
 
 class BatchLocationView(APIView):
     """
@@ -229,13 +282,18 @@ class BatchLocationView(APIView):
       "points": [
         {"latitude": ..., "longitude": ..., "timestamp": "...", "accuracy": ..., "speed": ...},
         ...
-      ]
+      ],
+      "batch_id": "..."   // opsional, client-in yaratdığı unikal id
     }
+    Eyni batch_id ilə təkrar göndəriş heç nə yazmır və əvvəlki nəticəni 200 ilə qaytarır.
+    batch_id olmadan da (route, timestamp) unikal olduğu üçün təkrar nöqtələr yazılmır.
+    Limit settings.LOCATION_BATCH_MAX_POINTS (uzun offline müddətdən sonra minlərlə nöqtə).
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        from django.db import transaction
+        from django.db import IntegrityError, transaction
+        from .ingest import insert_points, max_batch_points, validate_points
 
         points_data = request.data.get('points', [])
         if not isinstance(points_data, list) or len(points_data) == 0:
@@ -244,18 +302,26 @@ class BatchLocationView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if len(points_data) > 500:
+        batch_id = request.data.get('batch_id')
+        if batch_id is not None:
+            batch_id = str(batch_id).strip()
+            if not batch_id or len(batch_id) > 64:
+                return Response(
+                    {"detail": "batch_id 1-64 simvol olmalıdır."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            already = self._already_accepted(request.user, batch_id)
+            if already is not None:
+                return already
+
+        max_points = max_batch_points()
+        if len(points_data) > max_points:
             return Response(
-                {"detail": "Maksimum 500 nöqtə qəbul edilir."},
+                {"detail": f"Maksimum {max_points} nöqtə qəbul edilir."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        route = (
-            Route.objects
-            .filter(user=request.user, end_time__isnull=True)
-            .order_by('-start_time')
-            .first()
-        )
+        route = get_active_route(request.user.id)
         if not route:
             # Aktiv route yoxdursa, son tamamlanmış routu tap (bufer çox gec göndərilibsə)
             route = (
@@ -270,64 +336,154 @@ class BatchLocationView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        created_points = []
-        errors = []
-
-        with transaction.atomic():
-            for idx, p in enumerate(points_data):
-                try:
-                    lat = p.get('latitude')
-                    lng = p.get('longitude')
-                    ts_raw = p.get('timestamp')
-                    if lat is None or lng is None or ts_raw is None:
-                        errors.append({"index": idx, "error": "latitude/longitude/timestamp tələb olunur."})
-                        continue
-
-                    from django.utils.dateparse import parse_datetime
-                    ts = parse_datetime(str(ts_raw))
-                    if ts is None:
-                        errors.append({"index": idx, "error": f"Yanlış timestamp: {ts_raw}"})
-                        continue
-
-                    # Timezone-aware et
-                    if ts.tzinfo is None:
-                        from django.utils import timezone as tz
-                        ts = tz.make_aware(ts)
-
-                    point = LocationPoint(
-                        route=route,
-                        latitude=lat,
-                        longitude=lng,
-                        timestamp=ts,
-                        accuracy=p.get('accuracy'),
-                        speed=p.get('speed'),
-                        is_online=False,  # offline buferdən gəldiyi üçün
+        # Bütün batch sütun-sütun yoxlanılır, model instance-ları yaradılmır
+        batch = validate_points(points_data)
+        errors = batch.errors
+        created = 0
+        latest = None
+
+        try:
+            with transaction.atomic():
+                if batch_id:
+                    # Eyni batch_id paralel gəlsə ikincisi burada IntegrityError alır
+                    record = LocationBatch.objects.create(
+                        user=request.user, batch_id=batch_id, route=route,
+                        received=len(points_data), errors=len(errors),
                     )
-                    created_points.append(point)
-                except Exception as e:
-                    errors.append({"index": idx, "error": str(e)})
 
-            if created_points:
-                LocationPoint.objects.bulk_create(created_points, ignore_conflicts=True)
+                if len(batch):
+                    # offline buferdən gəldiyi üçün is_online=False
+                    created = insert_points(route, batch, is_online=False)
+
+                    # Route-un son konum vaxtını yenilə
+                    i = batch.newest_index
+                    newest_ts = batch.timestamps[i]
+                    newest_lat = batch.coordinate(batch.latitude[i])
+                    newest_lng = batch.coordinate(batch.longitude[i])
+                    # Şərtli UPDATE — keşdəki route-un last_location_time-ı köhnə ola bilər
+                    advanced = Route.objects.filter(pk=route.pk).filter(
+                        Q(last_location_time__isnull=True) | Q(last_location_time__lt=newest_ts)
+                    ).update(last_location_time=newest_ts)
+                    if advanced:
+                        route.last_location_time = newest_ts
+                        latest = (newest_lat, newest_lng)
+                    LastLocation.record(route, newest_lat, newest_lng, newest_ts, batch.battery_level[i])
+
+                if batch_id:
+                    record.created = created
+                    record.duplicates = len(batch) - created
+                    record.save(update_fields=['created', 'duplicates'])
+        except IntegrityError:
+            if not batch_id:
+                raise
+            already = self._already_accepted(request.user, batch_id)
+            if already is None:
+                return Response(
+                    {"detail": "Bu batch hazırda emal olunur."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return already
+
+        if created:
+            # Statistikanı yalnız yeni quyruq üzrə yenilə
+            safe_update_route_stats(route, oldest=batch.oldest_timestamp)
 
-                # Route-un son konum vaxtını yenilə
-                latest_ts = max(p.timestamp for p in created_points)
-                if not route.last_location_time or latest_ts > route.last_location_time:
-                    route.last_location_time = latest_ts
-                    route.save(update_fields=['last_location_time'])
+        if latest is not None:
+            liveness.attach([route])
+            publish_location(route, latest[0], latest[1], status=route.connection_status)
 
         return Response({
-            "created": len(created_points),
+            "batch_id": batch_id,
+            "created": created,
+            "duplicates": len(batch) - created,
             "errors": len(errors),
             "error_details": errors[:10] if errors else [],
         }, status=status.HTTP_201_CREATED)
 
+    def _already_accepted(self, user, batch_id):
+        """Təkrar göndərilən batch — heç nə yazılmır, əvvəlki nəticə qaytarılır"""
+        record = LocationBatch.objects.filter(user=user, batch_id=batch_id).first()
+        if record is None:
+            return None
+        return Response({
+            "batch_id": batch_id,
+            "created": record.created,
+            "duplicates": record.duplicates,
+            "errors": record.errors,
+            "error_details": [],
+            "already_accepted": True,
+        }, status=status.HTTP_200_OK)
+
+
+COMPACT_ROUTE_RENDERERS = [JSONRenderer, BrowsableAPIRenderer, PolylineRenderer, RouteBinaryRenderer]
+
+
+def _compact_routes_response(request, routes):
+    """
+    Route-ları ?format=polyline / ?format=bin ilə kompakt qaytar.
+    Bütün route-ların nöqtələri bir sorğu ilə oxunur; Decimal→str çevirməsi yoxdur.
+    """
+    import numpy as np
+
+    routes = list(routes)
+    rows_by_route = {route.id: [] for route in routes}
+    if rows_by_route:
+        rows = (
+            LocationPoint.objects.for_routes(routes)
+            .order_by('route_id', 'timestamp', 'id')
+            .values_list('route_id', 'latitude', 'longitude', 'timestamp')
+        )
+        for route_id, lat, lng, ts in rows.iterator(chunk_size=2000):
+            rows_by_route[route_id].append((lat, lng, ts))
+
+    encoded = []
+    for route in routes:
+        rows = rows_by_route[route.id]
+        latlng = np.array([(lat, lng) for lat, lng, _ in rows], dtype=np.float64).reshape(-1, 2)
+        encoded.append((route, latlng, timestamps_ms([ts for _, _, ts in rows])))
+
+    if request.accepted_renderer.format == RouteBinaryRenderer.format:
+        return Response(encode_binary_routes(encoded))
+
+    data = []
+    for route, latlng, ts_ms in encoded:
+        data.append({
+            "id": route.id,
+            "start_time": route.start_time,
+            "end_time": route.end_time,
+            "point_count": len(latlng),
+            "precision": POLYLINE_PRECISION,
+            "polyline": encode_polyline(latlng),
+            # İlk nöqtənin vaxtı (epoch ms) + hər nöqtə üçün ms fərqi (polyline simvolları ilə)
+            "t0": int(ts_ms[0]) if len(ts_ms) else None,
+            "time_deltas": encode_signed(np.diff(ts_ms).tolist()) if len(ts_ms) else "",
+        })
+    return Response(data)
+
+
+def _wants_compact(request):
+    return request.accepted_renderer.format in (PolylineRenderer.format, RouteBinaryRenderer.format)
+
 
 class RouteDetailView(generics.RetrieveAPIView):
+    """
+    Route detalı nöqtələrlə birlikdə
+    ?format=polyline və ya ?format=bin (və ya uyğun Accept) — kompakt nöqtə formatı
+    """
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
     permission_classes = [permissions.AllowAny]  # Dashboard için
-    
+    renderer_classes = COMPACT_ROUTE_RENDERERS
+
+    def retrieve(self, request, *args, **kwargs):
+        if _wants_compact(request):
+            route = self.get_object()
+            response = _compact_routes_response(request, [route])
+            if isinstance(response.data, list):
+                response.data = response.data[0]
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
     def get_queryset(self):
         # Staff user ise tüm route'ları görebilir
         if self.request.user.is_authenticated and (self.request.user.is_staff or self.request.user.is_superuser):
@@ -418,10 +574,22 @@ class CurrentUserView(APIView):
 
 
 class RoutesListView(generics.ListAPIView):
-    """Kullanıcının tüm route'larını listeler"""
+    """Kullanıcının tüm route'larını listeler
+
+    ?format=polyline və ya ?format=bin — nöqtələr kompakt formatda (bax RouteDetailView)
+    """
     serializer_class = RouteSerializer
     # Dashboard için tüm route'ları görebilmek için AllowAny
     permission_classes = [permissions.AllowAny]
+    renderer_classes = COMPACT_ROUTE_RENDERERS
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if _wants_compact(request):
+            return _compact_routes_response(request, queryset)
+        # Nöqtələr bütün route-lar üçün bir sorğu ilə (route başına sorğu yox)
+        serializer = self.get_serializer(queryset.prefetch_related("points"), many=True)
+        return Response(serializer.data)
 
     def get_queryset(self):
         user_id = self.request.query_params.get('user')
@@ -436,11 +604,179 @@ class RoutesListView(generics.ListAPIView):
             return Route.objects.none()
 
 
+def _visible_routes(request):
+    """Staff bütün route-ları, normal user yalnız öz route-larını görür"""
+    user = request.user
+    if user.is_authenticated and (user.is_staff or user.is_superuser):
+        return Route.objects.all()
+    if user.is_authenticated:
+        return Route.objects.filter(user=user)
+    return Route.objects.none()
+
+
+class RouteSummaryListView(generics.ListAPIView):
+    """
+    Route siyahısı nöqtələrsiz (yalnız say)
+    GET /api/routes/summary/?user=<id>
+    """
+    serializer_class = RouteSummarySerializer
+    permission_classes = [permissions.AllowAny]  # Dashboard için
+
+    def get_queryset(self):
+        routes = _visible_routes(self.request)
+        user_id = self.request.query_params.get('user')
+        if user_id:
+            routes = routes.filter(user_id=user_id)
+        elif self.request.user.is_authenticated:
+            routes = routes.filter(user=self.request.user)
+        return routes.annotate(point_count=Count('points')).order_by('-start_time')
+
+
+class RoutePointsView(APIView):
+    """
+    Bir route-un nöqtələri, (timestamp, id) üzrə keyset pagination ilə
+    GET /api/routes/<id>/points/?cursor=<next_cursor>&limit=1000
+
+    ?stream=ndjson — cursor-dan sonrakı bütün nöqtələr, hər sətirdə bir JSON
+    ?stream=json   — eyni, JSON array kimi
+    Stream rejimində nöqtələr DB-dən hissə-hissə oxunur, yaddaşda toplanmır.
+    """
+    permission_classes = [permissions.AllowAny]  # Dashboard için
+
+    DEFAULT_LIMIT = 1000
+    MAX_LIMIT = 10000
+    STREAM_CHUNK_SIZE = 2000
+
+    def get(self, request, pk):
+        route = get_object_or_404(_visible_routes(request), pk=pk)
+
+        points = LocationPoint.objects.for_route(route).order_by('timestamp', 'id')
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                ts, last_id = _decode_keyset_cursor(cursor)
+            except ValueError:
+                return Response({"detail": "Yanlış cursor."}, status=status.HTTP_400_BAD_REQUEST)
+            points = points.filter(Q(timestamp__gt=ts) | Q(timestamp=ts, id__gt=last_id))
+
+        rows = points.values_list('id', 'latitude', 'longitude', 'timestamp')
+        stream = request.query_params.get('stream')
+        if stream in ('ndjson', 'json'):
+            return self._stream(rows, stream)
+        if stream:
+            return Response({"detail": "stream ndjson və ya json olmalıdır."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        limit = max(limit, 1)
+
+        page = list(rows[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = _encode_keyset_cursor(page[-1][3], page[-1][0])
+
+        to_dict = self._row_serializer()
+        return Response({
+            "route": route.id,
+            "results": [to_dict(row) for row in page],
+            "next_cursor": next_cursor,
+        })
+
+    def _stream(self, rows, mode):
+        from django.http import StreamingHttpResponse
+
+        to_dict = self._row_serializer()
+        iterator = rows.iterator(chunk_size=self.STREAM_CHUNK_SIZE)
+
+        def ndjson():
+            for row in iterator:
+                yield json.dumps(to_dict(row)) + "\n"
+
+        def json_array():
+            yield "["
+            first = True
+            for row in iterator:
+                yield ("" if first else ",") + json.dumps(to_dict(row))
+                first = False
+            yield "]"
+
+        if mode == 'ndjson':
+            return StreamingHttpResponse(ndjson(), content_type="application/x-ndjson")
+        return StreamingHttpResponse(json_array(), content_type="application/json")
+
+    @staticmethod
+    def _row_serializer():
+        """values_list sətrini LocationPointSerializer formatına çevirən funksiya"""
+        fields = LocationPointSerializer().fields
+        lat_field, lng_field, ts_field = fields['latitude'], fields['longitude'], fields['timestamp']
+
+        def to_dict(row):
+            return {
+                "id": row[0],
+                "latitude": lat_field.to_representation(row[1]),
+                "longitude": lng_field.to_representation(row[2]),
+                "timestamp": ts_field.to_representation(row[3]),
+            }
+        return to_dict
+
+
+class RouteGeometryView(APIView):
+    """
+    Route-un sadələşdirilmiş xətti (Douglas–Peucker)
+    GET /api/routes/<id>/geometry/?zoom=15      — zoom səviyyəsində bir piksel tolerance
+    GET /api/routes/<id>/geometry/?tolerance=5  — metrlə tolerance
+    ?format=polyline — coordinates əvəzinə encoded polyline
+    Nəticə route-a yeni nöqtə gələnə qədər keşlənir.
+    """
+    permission_classes = [permissions.AllowAny]  # Dashboard için
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, PolylineRenderer]
+
+    def get(self, request, pk):
+        route = get_object_or_404(_visible_routes(request), pk=pk)
+        zoom = request.query_params.get('zoom')
+        tolerance = request.query_params.get('tolerance')
+        try:
+            if zoom is not None:
+                zoom = min(max(int(zoom), 0), 22)
+                geometry = get_route_geometry(route, zoom=zoom)
+            else:
+                tolerance = float(tolerance) if tolerance is not None else 0.0
+                geometry = get_route_geometry(route, tolerance=tolerance)
+        except ValueError:
+            return Response(
+                {"detail": "zoom tam ədəd, tolerance isə rəqəm olmalıdır."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.accepted_renderer.format == PolylineRenderer.format:
+            import numpy as np
+
+            coordinates = geometry["coordinates"]
+            geometry = {key: value for key, value in geometry.items() if key != "coordinates"}
+            lnglat = np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+            geometry["precision"] = POLYLINE_PRECISION
+            geometry["polyline"] = encode_polyline(lnglat[:, ::-1])
+        return Response(geometry)
+
+
 class LastLocationsView(APIView):
-    """Tüm kullanıcıların son konumlarını döndürür (harita için)"""
+    """Tüm kullanıcıların son konumlarını döndürür (harita için)
+
+    Delta rejimi: GET /api/movqe-son-json/?since=<cursor>
+    Yalnız cursor-dan sonra konumu, batareyası və ya bağlantı statusu dəyişən
+    istifadəçiləri qaytarır. Hər cavabda yeni cursor (body + X-Feed-Cursor header)
+    və ETag var; If-None-Match uyğun gələrsə 304 qaytarılır.
+    """
     # Dashboard için session authentication kullanılır
     permission_classes = [permissions.AllowAny]
 
+    # Cursor-a yaxın commit olunan yazılar itməsin deyə pəncərə bir az geri çəkilir
+    DELTA_OVERLAP = timedelta(seconds=5)
+
     def get(self, request):
         # Session authentication ile gelen istekler için kontrol
         # Eğer authenticated değilse ve staff user değilse boş döndür
@@ -456,48 +792,150 @@ class LastLocationsView(APIView):
                 "error": "Bu endpoint'e sadece admin kullanıcılar erişebilir."
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Bütün istifadəçilər – konum paylaşanlar (online) yaşıl, digərləri boz
-        users = User.objects.all()
-        features = []
+        since = None
+        since_raw = request.query_params.get('since')
+        if since_raw:
+            try:
+                since = datetime.fromtimestamp(int(since_raw) / 1000, tz=dt_timezone.utc)
+            except (ValueError, OverflowError, OSError):
+                return Response(
+                    {"features": [], "error": "Yanlış since cursor."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        for user in users:
-            last_location = LocationPoint.objects.filter(
-                route__user=user
-            ).order_by('-timestamp').first()
+        now = timezone.now()
+        cursor = str(int(now.timestamp() * 1000))
 
-            if last_location:
-                route = last_location.route
-                battery = (
-                    last_location.battery_level
-                    if last_location.battery_level is not None
-                    else (route.last_battery_level if route else None)
-                )
-                features.append({
-                    "id": user.id,
-                    "ad": user.username,
-                    "username": user.username,
-                    "lat": float(last_location.latitude),
-                    "lng": float(last_location.longitude),
-                    "status": route.connection_status if route else "unknown",
-                    "is_paused": route.is_paused if route else False,
-                    "battery_level": battery,
-                })
-            else:
-                # Konum paylaşmayan istifadəçi – siyahıda görünsün, xəritədə marker yox
-                features.append({
-                    "id": user.id,
-                    "ad": user.username,
-                    "username": user.username,
-                    "lat": None,
-                    "lng": None,
-                    "status": "offline",
-                    "is_paused": False,
-                    "battery_level": None,
-                })
+        # Bütün istifadəçilər – konum paylaşanlar (online) yaşıl, digərləri boz.
+        # Son konum LastLocation cədvəlindən bir JOIN sorğusu ilə gəlir (N+1 yoxdur)
+        users = (
+            User.objects
+            .select_related('last_location__route')
+            .order_by('id')
+        )
+        if since is not None:
+            users = users.filter(
+                self._changed_since(since - self.DELTA_OVERLAP, now)
+                | Q(id__in=self._live_changed_since(since - self.DELTA_OVERLAP, now))
+            )
+        users = list(users)
+        # Flush olunmamış heartbeat-lər — bir cache get_many
+        last_locations = [getattr(user, 'last_location', None) for user in users]
+        liveness.attach(location.route for location in last_locations if location)
+        features = [_last_location_feature(user) for user in users]
+
+        etag = quote_etag(hashlib.md5(
+            json.dumps(features, sort_keys=True, default=str).encode()
+        ).hexdigest())
+        headers = {"ETag": etag, "X-Feed-Cursor": cursor, "Cache-Control": "no-cache"}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
         return Response({
-            "features": features
-        })
+            "features": features,
+            "cursor": cursor,
+            "delta": since is not None,
+        }, headers=headers)
+
+    @staticmethod
+    def _changed_since(since, now):
+        """Feed-də görünən sahələri since-dən sonra dəyişə bilən istifadəçilər"""
+        # Heartbeat-i OFFLINE_AFTER həddini (since, now] aralığında keçən route-lar
+        # heç bir yazı olmadan online → offline olur
+        offline_from = since - Route.OFFLINE_AFTER
+        offline_to = now - Route.OFFLINE_AFTER
+        return (
+            Q(date_joined__gt=since)
+            | Q(last_location__updated_at__gt=since)
+            | Q(last_location__route__last_ping__gt=since)
+            | Q(
+                last_location__route__last_ping__gt=offline_from,
+                last_location__route__last_ping__lte=offline_to,
+            )
+        )
+
+    @staticmethod
+    def _live_changed_since(since, now):
+        """Yalnız cache-də (hələ DB-də yox) heartbeat-i since-dən sonra dəyişən istifadəçilər"""
+        if not liveness.enabled():
+            return []
+        active = dict(Route.objects.filter(end_time__isnull=True).values_list('id', 'user_id'))
+        offline_from = since - Route.OFFLINE_AFTER
+        offline_to = now - Route.OFFLINE_AFTER
+        return [
+            active[route_id]
+            for route_id, ping in liveness.pings_for(active).items()
+            if ping > since or offline_from < ping <= offline_to
+        ]
+
+
+def live_locations_stream(request):
+    """
+    Dashboard xəritəsi üçün canlı konum axını (Server-Sent Events)
+    GET /api/movqe-son-stream/
+    Hadisələr: location (yeni konum), heartbeat (status/batareya)
+    """
+    from django.conf import settings
+    from django.http import JsonResponse, StreamingHttpResponse
+
+    if not (request.user.is_authenticated and is_staff_user(request.user)):
+        return JsonResponse(
+            {"error": "Bu endpoint'e sadece admin kullanıcılar erişebilir."}, status=403
+        )
+    if not getattr(settings, "LIVE_FEED_ENABLED", False):
+        return JsonResponse({"error": "Canlı axın deaktivdir."}, status=404)
+
+    # Subscription cavab qayıtmamış yaradılır ki, arada gələn hadisələr itməsin
+    subscription = get_broker().subscribe()
+    response = StreamingHttpResponse(
+        event_stream(
+            subscription,
+            max_seconds=getattr(settings, "LIVE_FEED_STREAM_SECONDS", 25),
+            keepalive=getattr(settings, "LIVE_FEED_KEEPALIVE_SECONDS", 10),
+        ),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx buferləməsin
+    return response
+
+
+def _last_location_feature(user):
+    """LastLocationsView üçün bir istifadəçinin xəritə feature-ı"""
+    try:
+        last_location = user.last_location
+    except LastLocation.DoesNotExist:
+        last_location = None
+
+    if last_location is None:
+        # Konum paylaşmayan istifadəçi – siyahıda görünsün, xəritədə marker yox
+        return {
+            "id": user.id,
+            "ad": user.username,
+            "username": user.username,
+            "lat": None,
+            "lng": None,
+            "status": "offline",
+            "is_paused": False,
+            "battery_level": None,
+        }
+
+    route = last_location.route
+    battery = (
+        last_location.battery_level
+        if last_location.battery_level is not None
+        else (route.last_battery_level if route else None)
+    )
+    return {
+        "id": user.id,
+        "ad": user.username,
+        "username": user.username,
+        "lat": float(last_location.latitude),
+        "lng": float(last_location.longitude),
+        "status": route.connection_status if route else "unknown",
+        "is_paused": route.is_paused if route else False,
+        "battery_level": battery,
+    }
 
 
 class NotificationListView(generics.ListAPIView):
@@ -602,33 +1040,54 @@ def is_staff_user(user):
     return user.is_staff or user.is_superuser
 
 
-@user_passes_test(is_staff_user)
-def admin_dashboard_home(request):
-    """Admin dashboard - ana səhifə"""
-    
-    total_users = User.objects.count()
-    active_users = User.objects.filter(routes__end_time__isnull=True).distinct().count()
-    total_routes = Route.objects.count()
-    active_routes = Route.objects.filter(end_time__isnull=True).count()
-    total_locations = LocationPoint.objects.count()
-    total_hospital_visits = HospitalVisit.objects.count()
-    total_visited_doctors = VisitedDoctor.objects.count()
-    total_schedules = VisitSchedule.objects.count()
-    total_location_reports = LocationPermissionReport.objects.count()
-    
-    last_24h = timezone.now() - timedelta(hours=24)
-    routes_last_24h = Route.objects.filter(start_time__gte=last_24h).count()
-    locations_last_24h = LocationPoint.objects.filter(timestamp__gte=last_24h).count()
-    hospital_visits_last_24h = HospitalVisit.objects.filter(visit_date__gte=last_24h.date()).count()
-    location_reports_last_24h = LocationPermissionReport.objects.filter(timestamp__gte=last_24h).count()
+def _encode_keyset_cursor(ts, row_id):
+    """(datetime, id) keyset cursor-u — URL-də təhlükəsiz base64"""
+    import base64
+    raw = f"{ts.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
-    active_routes_list = (
+
+def _decode_keyset_cursor(cursor):
+    import base64
+    from django.utils.dateparse import parse_datetime
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts_raw, id_raw = raw.rsplit("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+    ts = parse_datetime(ts_raw)
+    if ts is None:
+        raise ValueError("invalid cursor")
+    return ts, int(id_raw)
+
+
+def _active_routes_panel(limit):
+    """Dashboard-un aktiv route siyahısı — nöqtələr yüklənmir.
+    point_count RouteStats-dan (ingest-də yenilənir), son nöqtə vaxtı Route.last_location_time-dır."""
+    from django.db.models.functions import Coalesce
+
+    return (
         Route.objects.filter(end_time__isnull=True)
         .select_related("user")
-        .prefetch_related("points")
-        .order_by("-start_time")[:20]
+        .annotate(point_count=Coalesce("stats__point_count", 0))
+        .order_by("-start_time")[:limit]
     )
 
+
+@user_passes_test(is_staff_user)
+def admin_dashboard_home(request):
+    """Admin dashboard - ana səhifə"""
+    from .dashboard_counters import snapshot
+
+    # Cəmlər və son 24 saat saatlıq sayğaclardan — bir sorğu (tracking.dashboard_counters)
+    counters = snapshot()
+    # Aktiv route-lar partial index (route_active_user_idx) ilə sayılır
+    active = Route.objects.filter(end_time__isnull=True)
+    active_users = active.values('user_id').distinct().count()
+    active_routes = active.count()
+
+    active_routes_list = _active_routes_panel(20)
+
     recent_location_reports = (
         LocationPermissionReport.objects.select_related("user")
         .order_by("-timestamp")[:50]
@@ -636,42 +1095,66 @@ def admin_dashboard_home(request):
 
     context = {
         "active_page": "home",
-        "total_users": total_users,
+        "total_users": counters["users"]["total"],
         "active_users": active_users,
-        "total_routes": total_routes,
+        "total_routes": counters["routes"]["total"],
         "active_routes": active_routes,
-        "total_locations": total_locations,
-        "routes_last_24h": routes_last_24h,
-        "locations_last_24h": locations_last_24h,
-        "hospital_visits_last_24h": hospital_visits_last_24h,
-        "location_reports_last_24h": location_reports_last_24h,
+        "total_locations": counters["locations"]["total"],
+        "routes_last_24h": counters["routes"]["last_24h"],
+        "locations_last_24h": counters["locations"]["last_24h"],
+        "hospital_visits_last_24h": counters["hospital_visits"]["last_24h"],
+        "location_reports_last_24h": counters["location_reports"]["last_24h"],
         "active_routes_list": active_routes_list,
         "recent_location_reports": recent_location_reports,
-        "total_hospital_visits": total_hospital_visits,
-        "total_visited_doctors": total_visited_doctors,
-        "total_schedules": total_schedules,
-        "total_location_reports": total_location_reports,
+        "total_hospital_visits": counters["hospital_visits"]["total"],
+        "total_visited_doctors": counters["visited_doctors"]["total"],
+        "total_schedules": counters["schedules"]["total"],
+        "total_location_reports": counters["location_reports"]["total"],
     }
     return render(request, "dashboard_home.html", context)
 
 
+USERS_PAGE_SIZE = 100
+
+
 @user_passes_test(is_staff_user)
 def admin_dashboard_users(request):
-    """Admin dashboard - istifadəçilər"""
+    """Admin dashboard - istifadəçilər
+    Rəqəmlər UserActivity xülasəsindən (JOIN fan-out yoxdur); səhifələmə
+    (date_joined, id) keyset cursor-u ilə: ?after=<cursor>
+    """
+    from django.db.models.functions import Coalesce
+    from .dashboard_counters import snapshot
 
     users = (
         User.objects.annotate(
-            route_count=Count("routes"),
-            location_count=Count("routes__points"),
-            last_activity=Max("routes__start_time"),
-            has_active_route=Count("routes", filter=Q(routes__end_time__isnull=True)),
+            route_count=Coalesce("activity__route_count", 0),
+            location_count=Coalesce("activity__point_count", 0),
+            last_activity=F("activity__last_activity"),
+            has_active_route=Coalesce("activity__has_active_route", False),
         )
-        .order_by("-date_joined")[:100]
+        .order_by("-date_joined", "-id")
     )
+    cursor = request.GET.get("after")
+    if cursor:
+        try:
+            joined, last_id = _decode_keyset_cursor(cursor)
+        except ValueError:
+            return redirect("dashboard_users")
+        users = users.filter(Q(date_joined__lt=joined) | Q(date_joined=joined, id__lt=last_id))
+
+    page = list(users[:USERS_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > USERS_PAGE_SIZE:
+        page = page[:USERS_PAGE_SIZE]
+        next_cursor = _encode_keyset_cursor(page[-1].date_joined, page[-1].id)
+
     context = {
         "active_page": "users",
-        "users": users,
-        "total_users": users.count(),
+        "users": page,
+        "total_users": snapshot()["users"]["total"],
+        "next_cursor": next_cursor,
+        "is_first_page": not cursor,
     }
     return render(request, "dashboard_users.html", context)
 
@@ -681,12 +1164,7 @@ def admin_dashboard_routes(request):
     """Admin dashboard - route və xəstəxana ziyarətləri"""
 
     active_routes = Route.objects.filter(end_time__isnull=True).count()
-    active_routes_list = (
-        Route.objects.filter(end_time__isnull=True)
-        .select_related("user")
-        .prefetch_related("points")
-        .order_by("-start_time")[:50]
-    )
+    active_routes_list = _active_routes_panel(50)
     recent_hospital_visits = (
         HospitalVisit.objects.select_related("user")
         .order_by("-visit_date", "-check_in_time")[:50]
@@ -743,6 +1221,7 @@ def admin_dashboard_map(request):
     context = {
         "active_page": "map",
         "mapbox_token": getattr(settings, "MAPBOX_ACCESS_TOKEN", "") or "",
+        "live_feed_enabled": getattr(settings, "LIVE_FEED_ENABLED", False),
     }
     return render(request, "dashboard_map.html", context)
 
@@ -897,6 +1376,22 @@ def cron_reset_visited_doctors(request):
     return JsonResponse({"ok": True, "deleted": deleted})
 
 
+def query_metrics_view(request):
+    """
+    Endpoint metrikaları — Prometheus text formatı (tracking.query_metrics)
+    GET /api/metrics/ — staff sessiyası və ya Authorization: Bearer <QUERY_METRICS_TOKEN>
+    """
+    from django.conf import settings
+    from . import query_metrics
+
+    expected = getattr(settings, "QUERY_METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    token_ok = bool(expected) and auth == f"Bearer {expected}"
+    if not token_ok and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(query_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 class VisitScheduleViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing visit schedules
@@ -937,6 +1432,49 @@ class HospitalVisitViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def suggestions(self, request):
+        """
+        Konum axınından avtomatik ziyarət təklifləri
+        GET /api/visits/suggestions/?date=2025-01-15
+        Xəstəxana yaxınlığında 5+ dəqiqəlik dayanacaqlar; staff ?user=<id> verə bilər.
+        """
+        from django.utils.dateparse import parse_date
+        from .stop_detection import suggest_visits
+
+        date_raw = request.query_params.get('date')
+        try:
+            date = parse_date(date_raw) if date_raw else timezone.localdate()
+        except ValueError:
+            # Formatı düzgün, amma mövcud olmayan tarix (məs. 2025-02-30)
+            date = None
+        if date is None:
+            return Response(
+                {'success': False, 'error': 'date YYYY-MM-DD formatında olmalıdır.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = request.user
+        user_id = request.query_params.get('user')
+        if user_id and (user.is_staff or user.is_superuser):
+            try:
+                user = get_object_or_404(User, pk=user_id)
+            except ValueError:
+                return Response(
+                    {'success': False, 'error': 'user rəqəm olmalıdır.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            data = suggest_visits(user, date)
+        except Exception as e:
+            logger.error(f"[VISIT_SUGGESTIONS] Error: {e}")
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response({'success': True, 'date': date.isoformat(), 'count': len(data), 'data': data})
+
 
 # ============================================================================
 # Solvey Database API Endpoints
@@ -948,9 +1486,10 @@ def get_solvey_regions(request):
     """
     Solvey database-dən bütün bölgələri çəkir
     GET /api/solvey/regions/
+    ETag / ?since_version=<v> — dəyişməyibsə 304, əks halda yalnız fərq (tracking.catalog_versions)
     """
     try:
-        regions = SolveyRegion.objects.using('external').all().order_by('region_name')
+        regions = solvey_objects(SolveyRegion).all().order_by('region_name')
         data = [
             {
                 'id': r.id,
@@ -959,7 +1498,7 @@ def get_solvey_regions(request):
             }
             for r in regions
         ]
-        return Response({'success': True, 'data': data})
+        return catalog_versions.respond(request, 'regions', data)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -970,9 +1509,10 @@ def get_solvey_cities(request):
     """
     Solvey database-dən şəhərləri çəkir
     GET /api/solvey/cities/?region_id=X (opsional)
+    ETag / ?since_version=<v> — dəyişməyibsə 304, əks halda yalnız fərq (tracking.catalog_versions)
     """
     try:
-        cities = SolveyCity.objects.using('external').all()
+        cities = solvey_objects(SolveyCity).all()
         
         # Region filter (opsional)
         region_id = request.GET.get('region_id')
@@ -992,7 +1532,7 @@ def get_solvey_cities(request):
             }
             for c in cities
         ]
-        return Response({'success': True, 'data': data})
+        return catalog_versions.respond(request, 'cities', data)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -1003,9 +1543,10 @@ def get_solvey_hospitals(request):
     """
     Solvey database-dən xəstəxanaları çəkir
     GET /api/solvey/hospitals/?city_id=X&region_id=X (opsional)
+    ETag / ?since_version=<v> — dəyişməyibsə 304, əks halda yalnız fərq (tracking.catalog_versions)
     """
     try:
-        hospitals = SolveyHospital.objects.using('external').all()
+        hospitals = solvey_objects(SolveyHospital).all()
         
         # City filter (opsional)
         city_id = request.GET.get('city_id')
@@ -1035,7 +1576,7 @@ def get_solvey_hospitals(request):
             }
             for h in hospitals
         ]
-        return Response({'success': True, 'data': data})
+        return catalog_versions.respond(request, 'hospitals', data)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -1046,128 +1587,35 @@ def get_solvey_doctors(request):
     """
     Solvey database-dən həkimləri çəkir
     GET /api/solvey/doctors/?region_id=X&city_id=X&hospital_id=X (opsional)
+    Həkimlər klinika adları ilə bir sorğuda çəkilir və filtrlər üzrə keşlənir (tracking.solvey_directory)
+    ETag / ?since_version=<v> — dəyişməyibsə 304, əks halda yalnız fərq (tracking.catalog_versions)
     """
+    from . import solvey_directory
+
+    filters = {}
+    for param in ('region_id', 'city_id', 'hospital_id'):
+        value = request.GET.get(param)
+        if not value:
+            continue
+        try:
+            filters[param] = int(value)
+        except ValueError:
+            logger.error(f"[SOLVEY_DOCTORS] Invalid {param} format: {value}")
+            return Response({'success': False, 'error': f'Invalid {param}'}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        logger.info("[SOLVEY_DOCTORS] Starting get_solvey_doctors")
-        # External database-dən həkimləri çək
-        doctors = SolveyDoctor.objects.using('external').all()
-        logger.info(f"[SOLVEY_DOCTORS] Initial doctors count: {doctors.count()}")
-        
-        # Region filter (opsional)
-        region_id = request.GET.get('region_id')
-        if region_id:
-            try:
-                region_id = int(region_id)
-                logger.info(f"[SOLVEY_DOCTORS] Filtering by region_id={region_id}")
-                doctors_before = doctors.count()
-                doctors = doctors.filter(bolge_id=region_id)
-                doctors_after = doctors.count()
-                logger.info(f"[SOLVEY_DOCTORS] Before filter: {doctors_before}, After filter: {doctors_after}")
-                
-                # Əgər həkim tapılmadısa, bəlkə bölgə ID-si yanlışdır
-                if doctors_after == 0:
-                    logger.warning(f"[SOLVEY_DOCTORS] No doctors found for region_id={region_id}")
-                    # Bölgədə həkim olub-olmadığını yoxla
-                    try:
-                        region = SolveyRegion.objects.using('external').filter(id=region_id).first()
-                        if region:
-                            logger.info(f"[SOLVEY_DOCTORS] Region exists: {region.region_name} (ID: {region.id})")
-                        else:
-                            logger.warning(f"[SOLVEY_DOCTORS] Region with ID {region_id} does not exist in database")
-                    except Exception as e:
-                        logger.error(f"[SOLVEY_DOCTORS] Error checking region: {e}")
-            except ValueError:
-                logger.error(f"[SOLVEY_DOCTORS] Invalid region_id format: {region_id}")
-                return Response({'success': False, 'error': 'Invalid region_id'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # City filter (opsional)
-        city_id = request.GET.get('city_id')
-        if city_id:
-            try:
-                city_id = int(city_id)
-                doctors = doctors.filter(city_id=city_id)
-                logger.info(f"[SOLVEY_DOCTORS] Filtered by city_id={city_id}, count: {doctors.count()}")
-            except ValueError:
-                return Response({'success': False, 'error': 'Invalid city_id'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Hospital filter (opsional)
-        hospital_id = request.GET.get('hospital_id')
-        if hospital_id:
-            try:
-                hospital_id = int(hospital_id)
-                doctors = doctors.filter(klinika_id=hospital_id)
-                logger.info(f"[SOLVEY_DOCTORS] Filtered by hospital_id={hospital_id}, count: {doctors.count()}")
-            except ValueError:
-                return Response({'success': False, 'error': 'Invalid hospital_id'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        doctors = doctors.order_by('ad')
-        logger.info(f"[SOLVEY_DOCTORS] Final doctors count before processing: {doctors.count()}")
-        data = []
-        for d in doctors:
-            # Hospital name-i tap
-            hospital_name = ''
-            if d.klinika_id:
-                try:
-                    hospital = SolveyHospital.objects.using('external').filter(id=d.klinika_id).first()
-                    if hospital:
-                        hospital_name = hospital.hospital_name or ''
-                except Exception as e:
-                    logger.error(f"[SOLVEY_DOCTORS] Error fetching hospital for doctor {d.id}: {e}")
-                    pass
-            
-            # Dərəcə field-indən VIP və dərəcəni ayır
-            # derece field-ində: VIP, I, II, III ola bilər
-            derece_value = d.derece or ''
-            vip_value = ''
-            degree_value = ''
-            
-            try:
-                if derece_value:
-                    derece_str = str(derece_value).strip().upper()
-                    # Əgər tam olaraq "VIP" və ya "VIP I", "VIP II", "VIP III" varsa
-                    if derece_str == 'VIP':
-                        # Yalnız VIP var, dərəcə yoxdur
-                        vip_value = 'VIP'
-                        degree_value = ''
-                    elif derece_str.startswith('VIP'):
-                        # VIP I, VIP II, VIP III formatı
-                        vip_value = 'VIP'
-                        # VIP-dən sonra qalan hissə dərəcədir
-                        degree_value = derece_str.replace('VIP', '').strip()
-                    else:
-                        # Yalnız dərəcə var (I, II, III)
-                        degree_value = derece_str
-                        vip_value = ''
-            except Exception as e:
-                # Parsing xətası olsa, dərəcəni olduğu kimi saxla
-                degree_value = str(derece_value).strip() if derece_value else ''
-                vip_value = ''
-            
-            # Əvvəlki borc məlumatını al
-            previous_debt_value = None
-            try:
-                if hasattr(d, 'previous_debt') and d.previous_debt is not None:
-                    previous_debt_value = float(d.previous_debt)
-            except (AttributeError, ValueError, TypeError):
-                previous_debt_value = None
-            
-            data.append({
-                'id': d.id,
-                'name': d.ad or '',
-                'specialty': d.ixtisas or '',
-                'category': d.kategoriya or '',
-                'degree': degree_value,  # Yalnız dərəcə (I, II, III)
-                'vip': vip_value,  # VIP dərəcəsi (I, II, III)
-                'gender': d.cinsiyyet or '',
-                'region_id': d.bolge_id,
-                'city_id': d.city_id,
-                'hospital_id': d.klinika_id,
-                'hospital': hospital_name,
-                'phone': (d.number or '').strip(),
-                'previous_debt': previous_debt_value  # Əvvəlki borc
-            })
-        logger.info(f"[SOLVEY_DOCTORS] Returning {len(data)} doctors")
-        return Response({'success': True, 'data': data})
+        catalog = solvey_directory.get_catalog(**filters)
+        data = catalog['data']
+        if not data and 'region_id' in filters:
+            # Bölgədə həkim olub-olmadığını yoxla — bəlkə bölgə ID-si yanlışdır
+            region = solvey_objects(SolveyRegion).filter(id=filters['region_id']).first()
+            if region:
+                logger.warning(f"[SOLVEY_DOCTORS] No doctors found for region {region.region_name} (ID: {region.id})")
+            else:
+                logger.warning(f"[SOLVEY_DOCTORS] Region with ID {filters['region_id']} does not exist in database")
+        return catalog_versions.respond(
+            request, 'doctors', data, version=catalog['version'], hashes=catalog['hashes'],
+        )
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -1336,6 +1784,23 @@ def get_visited_doctors(request):
         )
 
 
+def _route_stats_data(route):
+    """RouteStats-dan əvvəlcədən hesablanmış rəqəmlər (select_related('stats') ilə)"""
+    try:
+        stats = route.stats
+    except RouteStats.DoesNotExist:
+        return None
+    return {
+        'distance_km': stats.distance_km,
+        'moving_minutes': int(stats.moving_seconds / 60),
+        'idle_minutes': int(stats.idle_seconds / 60),
+        'stop_count': stats.stop_count,
+        'max_speed_kmh': round(stats.max_speed_kmh, 1),
+        'speed_p50_kmh': stats.speed_percentile(50),
+        'speed_p95_kmh': stats.speed_percentile(95),
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_dashboard(request):
@@ -1347,6 +1812,7 @@ def user_dashboard(request):
         from django.utils import timezone
         from datetime import timedelta
         from django.db.models import Count, Q, Max, Min
+        from django.db.models.functions import Coalesce
         from django.contrib.auth.models import User
         
         user = request.user
@@ -1355,17 +1821,17 @@ def user_dashboard(request):
         active_route = Route.objects.filter(
             user=user,
             end_time__isnull=True
-        ).order_by('-start_time').first()
+        ).select_related('stats').order_by('-start_time').first()
         
         active_route_data = None
         if active_route:
             # Son konum
-            last_location = LocationPoint.objects.filter(
-                route=active_route
+            last_location = LocationPoint.objects.for_route(
+                active_route
             ).order_by('-timestamp').first()
             
             # Konum nöqtələrinin sayı
-            location_count = LocationPoint.objects.filter(route=active_route).count()
+            location_count = LocationPoint.objects.for_route(active_route).count()
             
             # Başlama zamanından indiyə qədər keçən vaxt
             duration_seconds = (timezone.now() - active_route.start_time).total_seconds()
@@ -1386,6 +1852,7 @@ def user_dashboard(request):
                 'duration_minutes': duration_minutes,
                 'duration_hours': duration_hours,
                 'duration_formatted': f"{duration_hours}s {duration_minutes % 60}d",
+                'stats': _route_stats_data(active_route),
                 'last_location': {
                     'latitude': float(last_location.latitude) if last_location else None,
                     'longitude': float(last_location.longitude) if last_location else None,
@@ -1399,6 +1866,9 @@ def user_dashboard(request):
         recent_routes = Route.objects.filter(
             user=user,
             start_time__gte=thirty_days_ago
+        ).select_related('stats').annotate(
+            # Route başına COUNT(*) əvəzinə RouteStats-dakı say (bax _active_routes_panel)
+            point_count=Coalesce('stats__point_count', 0)
         ).order_by('-start_time')[:50]
         
         routes_data = []
@@ -1419,14 +1889,15 @@ def user_dashboard(request):
                 'duration_seconds': int(duration_seconds) if duration_seconds else None,
                 'duration_minutes': int(duration_seconds / 60) if duration_seconds else None,
                 'duration_hours': int(duration_seconds / 3600) if duration_seconds else None,
-                'location_count': LocationPoint.objects.filter(route=route).count(),
+                'location_count': route.point_count,
+                'stats': _route_stats_data(route),
             })
         
         # 3. Görülən həkimlər (son 30 gün)
         visited_doctors = VisitedDoctor.objects.filter(
             user=user,
             visit_date__gte=thirty_days_ago
-        ).order_by('-visit_date', '-created_at')[:50]
+        ).order_by('-visit_date', '-id')[:50]
         
         visited_doctors_data = []
         for doctor in visited_doctors:
@@ -1438,8 +1909,9 @@ def user_dashboard(request):
                 'doctor_hospital': doctor.doctor_hospital,
                 'visit_date': doctor.visit_date.isoformat(),
                 'visit_date_formatted': doctor.visit_date.strftime('%Y-%m-%d %H:%M:%S'),
-                'created_at': doctor.created_at.isoformat(),
-                'created_at_formatted': doctor.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                # VisitedDoctor-da ayrıca created_at yoxdur — visit_date auto_now_add ilə yaradılma vaxtıdır
+                'created_at': doctor.visit_date.isoformat(),
+                'created_at_formatted': doctor.visit_date.strftime('%Y-%m-%d %H:%M:%S'),
             })
         
         # 4. Planlamalar (visit schedules)
@@ -1490,7 +1962,10 @@ def user_dashboard(request):
         
         # 6. Statistika
         total_routes = Route.objects.filter(user=user).count()
-        total_locations = LocationPoint.objects.filter(route__user=user).count()
+        # RouteStats ingest-də saxlanılır — bütün partition-ları saymağa ehtiyac yoxdur
+        total_locations = RouteStats.objects.filter(route__user=user).aggregate(
+            total=Sum('point_count')
+        )['total'] or 0
         total_visited_doctors = VisitedDoctor.objects.filter(user=user).count()
         total_schedules = VisitSchedule.objects.filter(user=user, is_active=True).count()
         
@@ -1540,116 +2015,45 @@ def user_dashboard(request):
         )
 
 
+def _medicine_catalog_response(request, catalog):
+    """Tam kataloq — hazır JSON bytes və ya gzip nüsxəsi"""
+    use_gzip = bool(ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')))
+    response = HttpResponse(
+        catalog['gzip'] if use_gzip else catalog['body'],
+        content_type='application/json',
+    )
+    if use_gzip:
+        response['Content-Encoding'] = 'gzip'
+    response['Content-Length'] = str(len(response.content))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_medicines(request):
     """
     Solvey database-dən aktiv dərmanların siyahısını qaytarır
     GET /api/medicines/
+    GET /api/medicines/?since_version=<v> — yalnız dəyişənlər (tracking.catalog_versions)
+    Cavab keşlənmiş kataloqdan gəlir (tracking.medicine_catalog); Accept-Encoding: gzip
+    olduqda əvvəlcədən sıxılmış nüsxə göndərilir.
     """
     try:
-        logger.info("[SOLVEY_MEDICINES] Starting get_medicines")
-        
-        # Cədvəl adını environment variable-dan al
-        import os
-        medicines_table = os.getenv('SOLVEY_MEDICINES_TABLE', 'tracking_medical')
-        
-        # Raw SQL query ilə dərmanları çək
-        from django.db import connections
-        import os
-        medicines_table = os.getenv('SOLVEY_MEDICINES_TABLE', 'medicine_medical')
-        
-        with connections['external'].cursor() as cursor:
-            # Əvvəlcə cədvəlin mövcud olub-olmadığını yoxla
-            cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND (table_name = %s OR table_name = %s OR table_name = %s OR table_name = %s OR table_name = %s)
-                LIMIT 1
-            """, [medicines_table, 'medicine_medical', 'medical', 'tracking_medical', 'medicines'])
-            
-            table_row = cursor.fetchone()
-            if table_row:
-                actual_table_name = table_row[0]
-                logger.info(f"[SOLVEY_MEDICINES] Found table: {actual_table_name}")
-            else:
-                # Cədvəl tapılmadı, boş siyahı qaytar
-                logger.warning(f"[SOLVEY_MEDICINES] Medicine table not found. Tried: {medicines_table}, medicine_medical, medical, tracking_medical, medicines")
-                return Response({
-                    'success': True,
-                    'count': 0,
-                    'data': [],
-                    'message': 'Dərmanlar cədvəli tapılmadı'
-                })
-            
-            # Dərmanları çək
-            cursor.execute(f"""
-                SELECT id, med_name, med_full_name, med_price, komissiya, status
-                FROM "{actual_table_name}"
-                WHERE status = true
-                ORDER BY med_name
-            """)
-            
-            columns = [col[0] for col in cursor.description]
-            medicines_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        logger.info(f"[SOLVEY_MEDICINES] Found {len(medicines_data)} medicines")
-        
-        data = []
-        for med in medicines_data:
-            med_id = med['id']
-            # Local Medicine modelindən annotasiya məlumatını çək
-            annotation_data = {}
-            try:
-                local_medicine = Medicine.objects.filter(solvey_id=med_id).first()
-                if local_medicine:
-                    annotation_data = {
-                        'annotation': local_medicine.annotation or '',
-                        'active_ingredient': local_medicine.active_ingredient or '',
-                        'dosage': local_medicine.dosage or '',
-                        'indications': local_medicine.indications or '',
-                        'contraindications': local_medicine.contraindications or '',
-                        'side_effects': local_medicine.side_effects or '',
-                        'storage_conditions': local_medicine.storage_conditions or '',
-                        'manufacturer': local_medicine.manufacturer or '',
-                        'barcode': local_medicine.barcode or '',
-                        'image': local_medicine.image.url if local_medicine.image else None,
-                    }
-            except Exception as e:
-                logger.warning(f"[SOLVEY_MEDICINES] Could not fetch local annotation for medicine {med_id}: {e}")
-            
-            data.append({
-                'id': med_id,
-                'name': med.get('med_name') or '',
-                'name_az': med.get('med_full_name') or med.get('med_name') or '',
-                'price': float(med['med_price']) if med.get('med_price') else None,
-                'komissiya': float(med['komissiya']) if med.get('komissiya') else None,
-                'description': med.get('med_full_name') or med.get('med_name') or '',
-                'annotation': annotation_data.get('annotation', ''),
-                'active_ingredient': annotation_data.get('active_ingredient', ''),
-                'dosage': annotation_data.get('dosage', ''),
-                'indications': annotation_data.get('indications', ''),
-                'contraindications': annotation_data.get('contraindications', ''),
-                'side_effects': annotation_data.get('side_effects', ''),
-                'storage_conditions': annotation_data.get('storage_conditions', ''),
-                'manufacturer': annotation_data.get('manufacturer', ''),
-                'barcode': annotation_data.get('barcode', ''),
-                'image': annotation_data.get('image'),
-                'is_active': med.get('status', True),
-            })
-        
-        logger.info(f"[SOLVEY_MEDICINES] Returning {len(data)} medicines")
-        return Response({
-            'success': True,
-            'count': len(data),
-            'data': data
-        })
+        catalog = medicine_catalog.get_catalog()
+        logger.info(f"[SOLVEY_MEDICINES] Returning {catalog['count']} medicines ({catalog['version']})")
+        return catalog_versions.respond(
+            request, 'medicines', catalog['data'], version=catalog['version'], hashes=catalog['hashes'],
+            full=lambda: _medicine_catalog_response(request, catalog),
+        )
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
         logger.error(f"[SOLVEY_MEDICINES] Error fetching medicines: {e}")
         logger.error(f"[SOLVEY_MEDICINES] Traceback: {error_trace}")
+        if isinstance(e, DatabaseError) and solvey_read_db() == 'external':
+            # Cədvəl adı dəyişmiş ola bilər — növbəti sorğu schema-nı yenidən yükləsin
+            get_external_schema().invalidate()
         return Response({
             'success': False,
             'error': str(e),
@@ -1667,93 +2071,25 @@ def get_medicine_detail(request, medicine_id):
     try:
         logger.info(f"[SOLVEY_MEDICINES] Fetching medicine detail for ID: {medicine_id}")
         
-        # Cədvəl adını tap
-        import os
-        from django.db import connections
-        medicines_table = os.getenv('SOLVEY_MEDICINES_TABLE', 'medicine_medical')
-        
-        with connections['external'].cursor() as cursor:
-            cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND (table_name = %s OR table_name = %s OR table_name = %s OR table_name = %s OR table_name = %s)
-                LIMIT 1
-            """, [medicines_table, 'medicine_medical', 'medical', 'tracking_medical', 'medicines'])
-            
-            table_row = cursor.fetchone()
-            if not table_row:
-                return Response({
-                    'success': False,
-                    'error': 'Dərmanlar cədvəli tapılmadı'
-                }, status=status.HTTP_404_NOT_FOUND)
-            
-            actual_table_name = table_row[0]
-            
-            # Dərmanı çək
-            cursor.execute(f"""
-                SELECT id, med_name, med_full_name, med_price, komissiya, status
-                FROM "{actual_table_name}"
-                WHERE id = %s AND status = true
-            """, [medicine_id])
-            
-            med_row = cursor.fetchone()
-            if not med_row:
-                return Response({
-                    'success': False,
-                    'error': 'Dərman tapılmadı'
-                }, status=status.HTTP_404_NOT_FOUND)
-            
-            columns = [col[0] for col in cursor.description]
-            med = dict(zip(columns, med_row))
-        
-        # Əgər annotasiya bizim Medicine modelində varsa, onu da çək
-        annotation_data = ''
-        try:
-            local_medicine = Medicine.objects.filter(solvey_id=medicine_id).first()
-            if local_medicine:
-                annotation_data = local_medicine.annotation or ''
-        except Exception as e:
-            logger.warning(f"[SOLVEY_MEDICINES] Could not fetch local annotation: {e}")
-        
-        data = {
-            'id': med['id'],
-            'name': med.get('med_name') or '',
-            'name_az': med.get('med_full_name') or med.get('med_name') or '',
-            'price': float(med['med_price']) if med.get('med_price') else None,
-            'komissiya': float(med['komissiya']) if med.get('komissiya') else None,
-            'description': med.get('med_full_name') or med.get('med_name') or '',
-            'annotation': annotation_data,  # Annotasiya bizim Medicine modelindən gəlir
-            'active_ingredient': '',
-            'dosage': '',
-            'indications': '',
-            'contraindications': '',
-            'side_effects': '',
-            'storage_conditions': '',
-            'manufacturer': '',
-            'barcode': '',
-            'image': None,
-            'is_active': med.get('status', True),
-        }
+        medicines = medicine_catalog.load_solvey_medicines(medicine_id)
+        if medicines is None:
+            return Response({
+                'success': False,
+                'error': 'Dərmanlar cədvəli tapılmadı'
+            }, status=status.HTTP_404_NOT_FOUND)
+        if not medicines:
+            return Response({
+                'success': False,
+                'error': 'Dərman tapılmadı'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        # Əgər local Medicine modelində məlumat varsa, onu da əlavə et
+        # Annotasiya bizim Medicine modelindən gəlir (bir sorğu)
+        annotation = None
         try:
-            local_medicine = Medicine.objects.filter(solvey_id=medicine_id).first()
-            if local_medicine:
-                data.update({
-                    'annotation': local_medicine.annotation or '',
-                    'active_ingredient': local_medicine.active_ingredient or '',
-                    'dosage': local_medicine.dosage or '',
-                    'indications': local_medicine.indications or '',
-                    'contraindications': local_medicine.contraindications or '',
-                    'side_effects': local_medicine.side_effects or '',
-                    'storage_conditions': local_medicine.storage_conditions or '',
-                    'manufacturer': local_medicine.manufacturer or '',
-                    'barcode': local_medicine.barcode or '',
-                    'image': local_medicine.image.url if local_medicine.image else None,
-                })
+            annotation = medicine_catalog.annotations_by_solvey_id([medicine_id]).get(medicine_id)
         except Exception as e:
             logger.warning(f"[SOLVEY_MEDICINES] Could not fetch local medicine data: {e}")
+        data = medicine_catalog.medicine_data(medicines[0], annotation)
         
         logger.info(f"[SOLVEY_MEDICINES] Returning medicine detail for ID: {medicine_id}")
         return Response({
@@ -1765,6 +2101,9 @@ def get_medicine_detail(request, medicine_id):
         error_trace = traceback.format_exc()
         logger.error(f"[SOLVEY_MEDICINES] Error fetching medicine {medicine_id}: {e}")
         logger.error(f"[SOLVEY_MEDICINES] Traceback: {error_trace}")
+        if isinstance(e, DatabaseError) and solvey_read_db() == 'external':
+            # Cədvəl adı dəyişmiş ola bilər — növbəti sorğu schema-nı yenidən yükləsin
+            get_external_schema().invalidate()
         return Response({
             'success': False,
             'error': str(e),